@@ -0,0 +1,162 @@
+"""Memoization of specialized agent calls across users.
+
+Every follower of a stan used to trigger the same ``search_news("BTS")``,
+``search_events("BTS")`` and friends when the orchestrator generated their
+briefing. Agent methods that don't depend on the user are wrapped with
+``memoized`` and keyed by ``(agent, method, normalized query, time
+bucket)``, so one call per bucket is shared by everyone. Each agent gets
+its own bucket length: upcoming events change slowly, trending changes
+fast.
+
+Results are kept in a small in-process LRU and in Redis for other
+processes; concurrent misses for the same key are coalesced with
+single-flight so only one of them calls the model.
+"""
+
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import structlog
+
+from agents.stan_canonicalizer import normalize_stan_name
+from services.analytics_service import analytics_service
+from services.cache_service import cache_service
+from services.single_flight import single_flight
+
+logger = structlog.get_logger()
+
+# Arguments longer than this are hashed instead of normalized into the key
+_MAX_KEY_ARG_CHARS = 100
+
+
+def _key_part(arg: Any) -> str:
+    text = normalize_stan_name(str(arg))
+    if len(text) > _MAX_KEY_ARG_CHARS:
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+    return text
+
+
+class AgentMemo:
+    """Time-bucketed result cache for agent calls."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Initialize memo.
+
+        Args:
+            max_entries: Entries kept in the in-process LRU
+        """
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+        }
+
+    def key(self, agent: str, method: str, args: Tuple[Any, ...], ttl_seconds: int, now: float) -> str:
+        """Memo key for one call; the bucket rolls over every ``ttl_seconds``."""
+        bucket = int(now // ttl_seconds)
+        query = ":".join(_key_part(arg) for arg in args)
+        return f"agent:{agent}:{method}:{query}:{bucket}"
+
+    async def call(
+        self,
+        agent: str,
+        method: str,
+        args: Tuple[Any, ...],
+        ttl_seconds: int,
+        fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the memoized result, calling ``fn`` only on a miss.
+
+        Args:
+            agent: Agent name
+            method: Method name
+            args: Method arguments the result depends on
+            ttl_seconds: Bucket length for this agent
+            fn: Zero-argument coroutine function making the real call
+
+        Returns:
+            The (possibly shared) result
+        """
+        now = time.time()
+        key = self.key(agent, method, args, ttl_seconds, now)
+
+        entry = self._local.get(key)
+        if entry and entry[0] > now:
+            self._local.move_to_end(key)
+            self._record("local_hits")
+            return entry[1]
+
+        cached = await cache_service.get(key)
+        if cached is not None:
+            self._remember(key, cached, ttl_seconds)
+            self._record("redis_hits")
+            return cached
+
+        async def compute():
+            result = await fn()
+            await cache_service.set(key, result, ttl=ttl_seconds)
+            return result
+
+        result, executed = await single_flight.do(key, compute, cache_get=lambda: cache_service.get(key))
+        self._remember(key, result, ttl_seconds)
+        self._record("misses" if executed else "coalesced")
+        if executed:
+            logger.info("agent_call_memoized", agent=agent, method=method, ttl_seconds=ttl_seconds)
+        return result
+
+    def _remember(self, key: str, value: Any, ttl_seconds: int):
+        self._local[key] = (time.time() + ttl_seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _record(self, outcome: str):
+        self.stats[outcome] += 1
+        analytics_service.record_metric(f"agent_memo_{outcome}")
+
+    def clear(self):
+        """Drop the in-process entries (tests)."""
+        self._local.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit counts and the model calls they saved."""
+        saved = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["coalesced"]
+        total = saved + self.stats["misses"]
+        return {
+            **self.stats,
+            "llm_calls_saved": saved,
+            "hit_rate": round(saved / total, 3) if total else 0.0,
+            "local_entries": len(self._local),
+        }
+
+
+# Global agent memo
+agent_memo = AgentMemo()
+
+
+def memoized(ttl_seconds: int):
+    """Share an agent method's result across callers for ``ttl_seconds``.
+
+    Only use this on methods whose result depends on their arguments
+    alone, never on the user.
+
+    Args:
+        ttl_seconds: Time bucket length for this method
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args):
+            return await agent_memo.call(
+                self.name,
+                method.__name__,
+                args,
+                ttl_seconds,
+                lambda: method(self, *args)
+            )
+        return wrapper
+    return decorator
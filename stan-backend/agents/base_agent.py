@@ -6,34 +6,89 @@ import google.adk as genai_adk
 from google.generativeai import GenerativeModel, configure
 import google.generativeai as genai
 from datetime import datetime
+import time
+from agents.prompt_templates import compile_template, register_template
+from agents.model_backends import ModelBackend
+from agents.model_registry import model_registry
+from agents.usage import record_estimated_usage, record_usage
+from services.hedging import hedge_policy
+from services.llm_governor import DEFAULT_OUTPUT_TOKENS, estimate_tokens, llm_governor
+
+DEFAULT_BRIEFING_PROMPT = register_template("default_briefing", 1, """Today is {date}. Search the web for the most current information about "{stan_name}" and create a briefing.
+
+Category: {category}
+Description: {description}
+{focus_areas}
+{exclude_topics}
+
+Please write in JSON format with separate topics:
+{
+  "topics": [
+    {
+      "title": "Topic Title",
+      "content": "2-3 sentences with specific details and emojis",
+      "sources": ["url1", "url2"]
+    }
+  ],
+  "summary": "Brief overview",
+  "searchSources": ["all found URLs"]
+}
+
+Include sections for: {sections}
+Tone: {tone}
+""")
+
 
 class STANBaseAgent:
     """Base agent class for STAN briefing generation."""
     
-    def __init__(self, name: str, category: Optional[str] = None):
+    def __init__(
+        self,
+        name: str,
+        category: Optional[str] = None,
+        backend: Optional[ModelBackend] = None,
+        max_output_tokens: int = 2048
+    ):
         self.name = name
         self.category = category
-        self.model = self._initialize_model()
+        self.model_name = "gemini-2.0-flash-exp"  # Will be updated to 2.5 when available
+        self.max_output_tokens = max_output_tokens
+        self.model = backend or self._initialize_model()
         
-    def _initialize_model(self):
+    def _initialize_model(self) -> ModelBackend:
         """Initialize Gemini 2.5 Flash model with latest configuration."""
         # API key should be configured globally in main.py
         # Use Gemini 2.5 Flash for better performance and lower cost
-        return genai.GenerativeModel(
-            model_name="gemini-2.0-flash-exp",  # Will be updated to 2.5 when available
+        # Shared per (model, config); STAN_MODEL_BACKEND swaps in a fake offline
+        return model_registry.get(
+            self.model_name,
             generation_config={
                 "temperature": 0.7,
                 "top_p": 0.95,
                 "top_k": 40,
-                "max_output_tokens": 2048,
+                "max_output_tokens": self.max_output_tokens,
                 "response_mime_type": "application/json"
             }
         )
     
     async def generate_content(self, prompt: str) -> str:
-        """Generate content using the configured model."""
+        """Generate content using the configured model.
+
+        Uses the native async client so a 5-15s generation never blocks
+        the event loop serving other requests.
+        """
         try:
-            response = self.model.generate_content(prompt)
+            call_start = time.perf_counter()
+            response = await hedge_policy.run(
+                lambda: self.model.generate_content_async(prompt),
+                key=self.model_name,
+                slot=lambda: llm_governor.slot(estimate_tokens(prompt)),
+                # A cancelled hedge loser was still sent, so charge its estimate
+                on_abandoned=lambda elapsed_ms: record_estimated_usage(
+                    self.model_name, estimate_tokens(prompt, output_tokens=0), DEFAULT_OUTPUT_TOKENS, elapsed_ms
+                )
+            )
+            record_usage(self.model_name, response, (time.perf_counter() - call_start) * 1000)
             return response.text
         except Exception as e:
             print(f"Error generating content: {e}")
@@ -42,10 +97,14 @@ class STANBaseAgent:
     async def generate_content_stream(self, prompt: str):
         """Generate content with streaming support."""
         try:
-            response = self.model.generate_content(prompt, stream=True)
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+            async with llm_governor.slot(estimate_tokens(prompt), track_latency=False) as permit:
+                call_start = time.perf_counter()
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+                usage = record_usage(self.model_name, response, (time.perf_counter() - call_start) * 1000)
+                permit.record_tokens(usage["total_tokens"])
         except Exception as e:
             print(f"Error in streaming generation: {e}")
             raise
@@ -141,44 +200,31 @@ class BriefingAgent(STANBaseAgent):
         if custom_settings and custom_settings.get("exclude_topics"):
             exclude_topics = f"Please avoid mentioning: {', '.join(custom_settings['exclude_topics'])}"
         
-        prompt = f"""Today is {context['date']}. Search the web for the most current information about "{context['stan_name']}" and create a briefing.
-
-Category: {context['category']}
-Description: {context.get('description', 'None')}
-{focus_areas}
-{exclude_topics}
-
-Please write in JSON format with separate topics:
-{{
-  "topics": [
-    {{
-      "title": "Topic Title",
-      "content": "2-3 sentences with specific details and emojis",
-      "sources": ["url1", "url2"]
-    }}
-  ],
-  "summary": "Brief overview",
-  "searchSources": ["all found URLs"]
-}}
-
-Include sections for: {', '.join(sections)}
-Tone: {custom_settings.get('tone', 'informative') if custom_settings else 'informative'}
-"""
-        return prompt
+        return DEFAULT_BRIEFING_PROMPT.render({
+            "date": context['date'],
+            "stan_name": context['stan_name'],
+            "category": context['category'],
+            "description": str(context.get('description', 'None')),
+            "focus_areas": focus_areas,
+            "exclude_topics": exclude_topics,
+            "sections": ', '.join(sections),
+            "tone": custom_settings.get('tone', 'informative') if custom_settings else 'informative',
+        })
     
     def _apply_custom_prompt(self, custom_prompt: str, context: Dict) -> str:
-        """Apply variable substitution to custom prompt."""
-        return custom_prompt.replace(
-            '{date}', context['date']
-        ).replace(
-            '{stan_name}', context['stan_name']
-        ).replace(
-            '{category}', context['category']
-        ).replace(
-            '{focus_areas}', ', '.join(context.get('custom_settings', {}).get('focus_areas', []))
-        ).replace(
-            '{tone}', context.get('custom_settings', {}).get('tone', 'informative')
-        )
+        """Apply variable substitution to custom prompt.
+
+        The user's template is compiled once (cached by its hash) and
+        rendered in a single pass.
+        """
+        custom_settings = context.get('custom_settings') or {}
+        return compile_template(custom_prompt).render({
+            "date": context['date'],
+            "stan_name": context['stan_name'],
+            "category": context['category'],
+            "focus_areas": ', '.join(custom_settings.get('focus_areas') or []),
+            "tone": custom_settings.get('tone') or 'informative',
+        })
     
     def _parse_agent_response(self, response: Any) -> Dict[str, Any]:
         """Parse ADK agent response into structured briefing format."""
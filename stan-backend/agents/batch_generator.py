@@ -2,13 +2,34 @@
 
 Generates briefings for popular stans once per day, caches for all users.
 90% cost reduction compared to per-user generation.
+
+Popular briefings are written through to the ``briefings_v2`` table and
+read through Redis first, then the table, then the model, so a Redis
+flush or restart doesn't mean paying to regenerate them.
+
+Cache keys are per day, so at midnight every popular key misses at once.
+Popular briefings therefore live until the batch that replaces them (plus
+jitter), and a miss on today's key serves yesterday's briefing marked
+stale while one background refresh generates today's.
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime, date
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from datetime import datetime, date, timedelta
 import asyncio
+import copy
+import os
+import random
+import uuid
 from agents.base_agent import STANBaseAgent
+from agents.generation_profiles import get_profile
+from agents.stan_canonicalizer import STAN_ALIASES, StanCanonicalizer
+from agents.usage import empty_usage
+from services.analytics_service import analytics_service
 from services.cache_service import cache_service
+from services.single_flight import single_flight
+from services.worker_pool import WorkerPool
+from config.logging_config import log_briefing_generation
+from database.supabase_client import briefing_v2_row
 import structlog
 
 logger = structlog.get_logger()
@@ -24,17 +45,126 @@ POPULAR_STANS = {
 }
 
 
+# Days of request counts that feed the batch ordering
+POPULARITY_WINDOW_DAYS = 3
+
+
+# Run checkpoints outlive the day so yesterday's run can still be inspected
+RUN_CHECKPOINT_TTL = 2 * 86400
+# A crashed run's lock expires quickly; live runs extend it after every unit
+RUN_LOCK_TTL_MS = 120_000
+# How often a resume retries while a crashed run's lock is still held
+RESUME_POLL_SECONDS = 5.0
+
+
+# Hour (server time) the daily batch cron runs
+BATCH_SCHEDULE_HOUR = int(os.getenv("BATCH_SCHEDULE_HOUR", "6"))
+# Spread over popular briefing expiries so they don't all lapse together
+BRIEFING_TTL_JITTER_SECONDS = int(os.getenv("BRIEFING_TTL_JITTER_SECONDS", "1800"))
+# One stale-while-revalidate refresh per stan at a time, across processes
+REFRESH_LOCK_TTL_MS = 120_000
+# Redis misses with no briefings_v2 row skip the database for this long
+DURABLE_MISS_TTL_SECONDS = 60
+
+# Custom briefings handed to workers: how long the API waits for one, how
+# often it checks, and how long a degraded (uncached) result is kept for it
+CUSTOM_JOB_TIMEOUT_SECONDS = float(os.getenv("CUSTOM_JOB_TIMEOUT_SECONDS", "60"))
+CUSTOM_JOB_POLL_SECONDS = 0.25
+CUSTOM_JOB_RESULT_TTL = 60
+
+# Cascade tiers that didn't generate anything new (the agent's last good
+# briefing or its error stub); they are served but never cached as today's
+UNCACHEABLE_TIERS = ("stale_cache", "stub")
+
+
+class DegradedBriefingError(Exception):
+    """Generation fell back to a stale briefing or the error stub."""
+
+    def __init__(self, stan_name: str, briefing: Dict[str, Any]):
+        metadata = briefing.get("metadata", {})
+        super().__init__(f"{stan_name}: served by the {metadata.get('tier')} tier "
+                         f"({'; '.join(metadata.get('tier_errors', []))})")
+        self.briefing = briefing
+
+
+def is_uncacheable(briefing: Dict[str, Any]) -> bool:
+    """True for briefings that must not be cached, persisted or checkpointed."""
+    return briefing.get("metadata", {}).get("tier") in UNCACHEABLE_TIERS
+
+
+def stan_requests_key(day: date) -> str:
+    """Sorted set counting requests per popular stan on one day."""
+    return f"stan_requests:{day.isoformat()}"
+
+
+def popular_run_id(day: Optional[date] = None) -> str:
+    """ID of the daily popular batch run; one run per day."""
+    return f"popular:{(day or date.today()).isoformat()}"
+
+
+def batch_run_key(run_id: str) -> str:
+    """Hash holding a run's status and per-stan checkpoints."""
+    return f"batch_run:{run_id}"
+
+
+def popular_briefing_ttl(day: date, now: Optional[datetime] = None) -> int:
+    """Seconds a popular briefing for ``day`` stays cached.
+
+    It lives until the next day's batch replaces it, plus random jitter,
+    so it is still there to serve stale between midnight and the batch.
+    """
+    now = now or datetime.now()
+    replaced_at = datetime.combine(day + timedelta(days=1), datetime.min.time()) + timedelta(hours=BATCH_SCHEDULE_HOUR)
+    return max(int((replaced_at - now).total_seconds()), 60) + random.randint(0, BRIEFING_TTL_JITTER_SECONDS)
+
+
 class BatchBriefingGenerator:
     """Generate once, serve to many users."""
 
-    def __init__(self, agent=None):
+    def __init__(
+        self,
+        agent=None,
+        pack_size: Optional[int] = None,
+        profile: Optional[str] = None,
+        db_client=None,
+        job_queue=None
+    ):
         """Initialize with an agent for generation.
 
         Args:
             agent: Agent to use for briefing generation (EfficientBriefingAgent or BriefingOrchestrator)
+            pack_size: Stans per packed prompt in the daily batch (defaults to
+                BATCH_PACK_SIZE; 1 disables packing)
+            profile: Generation profile for popular briefings (defaults to
+                BATCH_PROFILE, else the agent's own default)
+            db_client: Database client for subscriber counts (optional)
+            job_queue: JobQueue that custom briefings are generated through
+                by worker processes (None generates them in this process)
         """
         self.agent = agent
+        self.db_client = db_client
+        self.job_queue = job_queue
+        self.pack_size = pack_size if pack_size is not None else int(os.getenv("BATCH_PACK_SIZE", "1"))
+        self.profile = profile or os.getenv("BATCH_PROFILE") or None
+        self.concurrency = int(os.getenv("BATCH_CONCURRENCY", "5"))
+        self.max_retries = int(os.getenv("BATCH_MAX_RETRIES", "1"))
+        # Optional cap on request starts per second
+        self.target_rate = float(os.getenv("BATCH_TARGET_RPS", "0")) or None
         self.popular_stan_list = self._flatten_popular_stans()
+        self.canonicalizer = StanCanonicalizer(self.popular_stan_list, STAN_ALIASES)
+        # Reads of popular stans served from cache (warm) or generated on demand (cold)
+        self.read_stats = {"warm": 0, "cold": 0}
+        # Briefings written to and restored from briefings_v2
+        self.durable_stats = {"written": 0, "write_failures": 0, "restored": 0}
+        # Yesterday's briefings served while today's were refreshed
+        self.stale_stats = {"served": 0, "refreshes": 0, "refresh_failures": 0}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # The run executing in this process, for draining on shutdown
+        self._active_run: Optional[str] = None
+        self._pool: Optional[WorkerPool] = None
+        self._draining = False
+        self._run_finished = asyncio.Event()
+        self._run_finished.set()
 
     def _flatten_popular_stans(self) -> List[str]:
         """Flatten the popular stans dictionary into a list."""
@@ -43,58 +173,424 @@ class BatchBriefingGenerator:
             result.extend(stans)
         return result
 
-    async def generate_popular_briefings_daily(self) -> Dict[str, Any]:
+    async def generate_popular_briefings_daily(self, run_id: Optional[str] = None) -> Dict[str, Any]:
         """Generate all popular stan briefings at 6am daily.
 
+        Runs are checkpointed per stan in Redis under their run ID, so
+        triggering the same run again (or resuming it after a restart)
+        only generates the stans that are not cached yet.
+
+        Args:
+            run_id: Run to start or resume (defaults to today's run)
+
         Returns:
             Dict with generation stats (count, successes, failures, total_cost)
         """
+        run_id = run_id or popular_run_id()
+        lock_key = f"lock:{batch_run_key(run_id)}"
+        token = uuid.uuid4().hex
+
+        if self._active_run or not await cache_service.acquire_lock(lock_key, token, RUN_LOCK_TTL_MS):
+            logger.info("batch_run_already_active", run_id=run_id)
+            return {"run_id": run_id, "status": "already_running"}
+
+        self._active_run = run_id
+        self._draining = False
+        self._run_finished.clear()
+        try:
+            return await self._execute_run(run_id, lock_key, token)
+        finally:
+            await cache_service.release_lock(lock_key, token)
+            self._active_run = None
+            self._pool = None
+            self._run_finished.set()
+
+    async def _execute_run(self, run_id: str, lock_key: str, token: str) -> Dict[str, Any]:
+        """Generate the missing popular briefings of one run, checkpointing each stan."""
+        plan = await self.plan_run(run_id)
+        checkpoint = plan["checkpoint"]
+
         logger.info("batch_generation_started",
+                   run_id=run_id,
+                   resumed=bool(checkpoint),
                    total_stans=len(self.popular_stan_list),
                    timestamp=datetime.now().isoformat())
 
         stats = {
+            "run_id": run_id,
+            "resumed": bool(checkpoint),
             "total": len(self.popular_stan_list),
             "successes": 0,
             "failures": 0,
             "total_cost_usd": 0.0,
+            "total_tokens": 0,
             "started_at": datetime.now().isoformat(),
         }
+        await self._mark_run_started(run_id, checkpoint)
+
+        stats["first_stans"] = plan["ordered"][:5]
+        stats["skipped"] = len(plan["ordered"]) - len(plan["pending"])
+        reads_before = dict(self.read_stats)
+
+        units = plan["units"]
+        stats["pack_size"] = max(len(unit) for unit in units) if units else 1
+        stats["planned_requests"] = len(units)
 
-        # Generate all briefings in parallel (with some concurrency limit)
-        tasks = []
-        for stan_name in self.popular_stan_list:
-            task = self._generate_and_cache_briefing(stan_name)
-            tasks.append(task)
+        async def run_unit(unit: List[str]) -> List[Tuple[str, Any]]:
+            results = await self.run_checkpointed_unit(run_id, unit)
+            await cache_service.extend_lock(lock_key, token, RUN_LOCK_TTL_MS)
+            return results
 
-        # Process in batches of 5 to avoid overwhelming the API
-        batch_size = 5
-        for i in range(0, len(tasks), batch_size):
-            batch = tasks[i:i + batch_size]
-            results = await asyncio.gather(*batch, return_exceptions=True)
+        # Workers pick up the next request as soon as one finishes; the LLM
+        # governor still enforces the API's own limits
+        pool = self._pool = WorkerPool(
+            concurrency=self.concurrency,
+            max_retries=self.max_retries,
+            rate_per_second=self.target_rate
+        )
+        if self._draining:
+            pool.drain()
+        unit_results = await pool.run(units, run_unit)
 
-            for stan_name, result in zip(self.popular_stan_list[i:i + batch_size], results):
-                if isinstance(result, Exception):
+        for unit, result in unit_results:
+            if isinstance(result, Exception):
+                await self.mark_unit_failed(run_id, unit)
+            pairs = [(stan_name, result) for stan_name in unit] if isinstance(result, Exception) else result
+            for stan_name, stan_result in pairs:
+                if isinstance(stan_result, Exception):
                     logger.error("batch_generation_failed",
                                stan_name=stan_name,
-                               error=str(result))
+                               error=str(stan_result))
                     stats["failures"] += 1
                 else:
                     stats["successes"] += 1
-                    if result and "cost_usd" in result:
-                        stats["total_cost_usd"] += result["cost_usd"]
+                    if stan_result and "cost_usd" in stan_result:
+                        stats["total_cost_usd"] += stan_result["cost_usd"]
+                        stats["total_tokens"] += stan_result.get("total_tokens", 0)
 
-            # Small delay between batches
-            if i + batch_size < len(tasks):
-                await asyncio.sleep(2)
+        stats["concurrency"] = pool.concurrency
+        stats["retries"] = pool.stats["retries"]
+        stats["drained"] = pool.stats["drained"]
+        stats["duration_ms"] = pool.stats["duration_ms"]
+        stats["stans_per_minute"] = round(len(plan["pending"]) / pool.stats["duration_ms"] * 60000, 1) if pool.stats["duration_ms"] else 0.0
 
+        stats["reads_during_run"] = {
+            outcome: self.read_stats[outcome] - reads_before[outcome]
+            for outcome in self.read_stats
+        }
+        if stats["drained"]:
+            stats["status"] = "interrupted"
+        elif stats["failures"]:
+            stats["status"] = "completed_with_failures"
+        else:
+            stats["status"] = "completed"
         stats["completed_at"] = datetime.now().isoformat()
+        await cache_service.set_fields(batch_run_key(run_id), {
+            "status": stats["status"],
+            "updated_at": stats["completed_at"],
+        }, ttl=RUN_CHECKPOINT_TTL)
 
         logger.info("batch_generation_completed",
                    **stats)
 
         return stats
 
+    async def plan_run(self, run_id: str) -> Dict[str, Any]:
+        """Order the popular stans and group the unfinished ones into units.
+
+        Args:
+            run_id: Run to plan
+
+        Returns:
+            Dict with the run's checkpoint, all stans by popularity, the
+            pending stans and the pending units (one LLM request each)
+        """
+        checkpoint = await cache_service.get_fields(batch_run_key(run_id))
+        # Briefings already in briefings_v2 (e.g. after a Redis flush) aren't regenerated
+        await self.warm_cache()
+
+        # Most-read stans first, so the morning's first requests hit the cache
+        scores = await self._popularity_scores()
+        ordered = sorted(self.popular_stan_list, key=lambda name: -scores[name])
+
+        # Only the work a previous attempt didn't finish
+        pending, skipped = [], {}
+        for stan_name in ordered:
+            outcome = checkpoint.get(f"stan:{stan_name}")
+            if outcome in ("done", "skipped"):
+                continue
+            if await cache_service.exists(self._popular_cache_key(stan_name)):
+                # Already cached today: checkpoint it so the run can finish
+                skipped[f"stan:{stan_name}"] = "skipped"
+            else:
+                pending.append(stan_name)
+        if skipped:
+            await cache_service.set_fields(batch_run_key(run_id), skipped, ttl=RUN_CHECKPOINT_TTL)
+
+        return {
+            "checkpoint": checkpoint,
+            "ordered": ordered,
+            "pending": pending,
+            # One unit per LLM request: a single stan, or a pack of stans
+            "units": self._plan_units(pending),
+        }
+
+    async def run_checkpointed_unit(self, run_id: str, unit: List[str]) -> List[Tuple[str, Any]]:
+        """Generate one unit of a run and checkpoint its stans.
+
+        Args:
+            run_id: Run the unit belongs to
+            unit: Stan names generated by one LLM request
+
+        Returns:
+            (stan, stats dict or Exception) for every stan in the unit
+
+        Raises:
+            Exception: When every stan in the unit failed (so it is retried)
+        """
+        results = await self._generate_unit_or_raise(unit)
+        fields = {
+            f"stan:{stan_name}": "failed" if isinstance(result, Exception) else "done"
+            for stan_name, result in results
+        }
+        fields["updated_at"] = datetime.now().isoformat()
+        await cache_service.set_fields(batch_run_key(run_id), fields, ttl=RUN_CHECKPOINT_TTL)
+        return results
+
+    async def mark_unit_failed(self, run_id: str, unit: List[str]):
+        """Checkpoint the stans of a unit that used up its retries as failed.
+
+        Args:
+            run_id: Run the unit belongs to
+            unit: Stan names of the failed unit
+        """
+        fields = {f"stan:{stan_name}": "failed" for stan_name in unit}
+        fields["updated_at"] = datetime.now().isoformat()
+        await cache_service.set_fields(batch_run_key(run_id), fields, ttl=RUN_CHECKPOINT_TTL)
+
+    async def enqueue_run(self, run_id: str, queue) -> Dict[str, Any]:
+        """Plan a run and hand its units to worker processes.
+
+        Args:
+            run_id: Run to start or resume
+            queue: JobQueue the workers consume
+
+        Returns:
+            Dict with run_id, planned_requests and skipped
+        """
+        plan = await self.plan_run(run_id)
+        await self._mark_run_started(run_id, plan["checkpoint"])
+        if plan["pending"]:
+            # Stans that failed last time count as pending again until retried
+            await cache_service.set_fields(batch_run_key(run_id), {
+                f"stan:{stan_name}": "queued" for stan_name in plan["pending"]
+            }, ttl=RUN_CHECKPOINT_TTL)
+
+        for unit in plan["units"]:
+            # Stable job IDs make re-planning the same run idempotent
+            await queue.enqueue(
+                "popular_unit",
+                {"run_id": run_id, "stans": unit},
+                job_id=f"{run_id}:{'|'.join(unit)}"
+            )
+
+        logger.info("batch_run_enqueued", run_id=run_id, units=len(plan["units"]))
+        return {
+            "run_id": run_id,
+            "planned_requests": len(plan["units"]),
+            "skipped": len(plan["ordered"]) - len(plan["pending"]),
+        }
+
+    async def _mark_run_started(self, run_id: str, checkpoint: Dict[str, str]):
+        await cache_service.set_fields(batch_run_key(run_id), {
+            "status": "running",
+            "started_at": checkpoint.get("started_at", datetime.now().isoformat()),
+            "total": str(len(self.popular_stan_list)),
+        }, ttl=RUN_CHECKPOINT_TTL)
+
+    async def mark_run_finished_if_done(self, run_id: str) -> bool:
+        """Mark a distributed run completed once no stan is pending."""
+        status = await self.get_run_status(run_id)
+        if status.get("status") != "running" or status["pending"]:
+            return False
+        await cache_service.set_fields(batch_run_key(run_id), {
+            "status": "completed" if not status["failed"] else "completed_with_failures",
+            "updated_at": datetime.now().isoformat(),
+        }, ttl=RUN_CHECKPOINT_TTL)
+        return True
+
+    async def resume_interrupted_run(self) -> Optional[Dict[str, Any]]:
+        """Finish today's run if a crash or deploy stopped it part-way.
+
+        Returns:
+            Stats of the resumed run, or None if there was nothing to resume
+        """
+        run_id = popular_run_id()
+        checkpoint = await cache_service.get_fields(batch_run_key(run_id))
+        if checkpoint.get("status") not in ("running", "interrupted"):
+            return None
+
+        logger.info("resuming_batch_run", run_id=run_id, status=checkpoint["status"])
+        # The crashed process still holds the run lock until it expires; a
+        # live run keeps extending it, so give up after one lock TTL
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RUN_LOCK_TTL_MS / 1000
+        while True:
+            stats = await self.generate_popular_briefings_daily(run_id)
+            if stats["status"] != "already_running" or loop.time() >= deadline:
+                return stats
+            await asyncio.sleep(RESUME_POLL_SECONDS)
+
+    async def drain(self, timeout: float = 30.0) -> bool:
+        """Stop starting new generations and wait for in-flight ones.
+
+        Unstarted stans stay pending in the run's checkpoint and are picked
+        up by ``resume_interrupted_run`` after the restart.
+
+        Args:
+            timeout: Seconds to wait for in-flight generations
+
+        Returns:
+            True if the run (if any) stopped within the timeout
+        """
+        if not self._active_run:
+            return True
+
+        logger.info("draining_batch_run", run_id=self._active_run)
+        self._draining = True
+        if self._pool:
+            self._pool.drain()
+        try:
+            await asyncio.wait_for(self._run_finished.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("batch_drain_timeout", run_id=self._active_run, timeout=timeout)
+            return False
+
+    async def get_run_status(self, run_id: str) -> Dict[str, Any]:
+        """Progress of a batch run from its checkpoint.
+
+        Args:
+            run_id: Run ID
+
+        Returns:
+            Dict with status, done, failed, skipped and pending counts
+        """
+        checkpoint = await cache_service.get_fields(batch_run_key(run_id))
+        if not checkpoint:
+            return {"run_id": run_id, "status": "unknown"}
+
+        outcomes = [value for field, value in checkpoint.items() if field.startswith("stan:")]
+        total = int(checkpoint.get("total", len(self.popular_stan_list)))
+        done = outcomes.count("done")
+        failed = outcomes.count("failed")
+        skipped = outcomes.count("skipped")
+        return {
+            "run_id": run_id,
+            "status": checkpoint.get("status"),
+            "started_at": checkpoint.get("started_at"),
+            "updated_at": checkpoint.get("updated_at"),
+            "done": done,
+            "failed": failed,
+            "skipped": skipped,
+            "pending": max(total - done - failed - skipped, 0),
+        }
+
+    def _popular_cache_key(self, stan_name: str, day: Optional[date] = None) -> str:
+        """Shared cache key of a day's briefing for a popular stan (default today)."""
+        return f"public:briefing:{stan_name}:{(day or date.today()).isoformat()}"
+
+    def _custom_cache_key(self, user_id: str, stan_name: str, profile: Optional[str]) -> str:
+        """Today's cache key of a user's custom briefing with one profile.
+
+        The profile is resolved first, so asking without one and asking for
+        the agent's default share an entry, and a "fast" briefing is never
+        served to a "deep" request.
+        """
+        if profile:
+            resolved = get_profile(profile)
+        else:
+            resolved = getattr(self.agent, "profile", None) or get_profile()
+        return f"user:{user_id}:stan:{stan_name}:{resolved.name}:{date.today().isoformat()}"
+
+    async def _popularity_scores(self) -> Dict[str, float]:
+        """Expected daily reads per popular stan.
+
+        Subscribers from user_stans_v2 (each reads roughly once a day) plus
+        the average daily requests over the last POPULARITY_WINDOW_DAYS.
+
+        Returns:
+            Popular stan name -> score (0 when there is no signal)
+        """
+        scores = {name: 0.0 for name in self.popular_stan_list}
+
+        if self.db_client and hasattr(self.db_client, "get_stan_popularity"):
+            popularity = await self.db_client.get_stan_popularity()
+            for stan_name, counts in popularity.items():
+                canonical = self.canonicalizer.resolve(stan_name)
+                if canonical in scores:
+                    scores[canonical] += counts.get("subscribers", 0)
+
+        today = date.today()
+        for offset in range(POPULARITY_WINDOW_DAYS):
+            counts = await cache_service.get_scores(stan_requests_key(today - timedelta(days=offset)))
+            for stan_name, count in counts.items():
+                if stan_name in scores:
+                    scores[stan_name] += count / POPULARITY_WINDOW_DAYS
+
+        return scores
+
+    def _plan_units(self, stan_names: Optional[List[str]] = None) -> List[List[str]]:
+        """Group popular stans into packs when the agent supports packing.
+
+        Args:
+            stan_names: Stans in generation order (defaults to the popular list)
+        """
+        stan_names = stan_names if stan_names is not None else self.popular_stan_list
+        if self.pack_size > 1 and hasattr(self.agent, "generate_briefings_packed"):
+            size = self.pack_size
+        else:
+            size = 1
+        return [stan_names[i:i + size] for i in range(0, len(stan_names), size)]
+
+    async def _generate_unit_or_raise(self, stan_names: List[str]) -> List[Tuple[str, Any]]:
+        """Generate a unit, raising when every stan in it failed so the pool retries it."""
+        results = await self._generate_unit(stan_names)
+        failures = [result for _, result in results if isinstance(result, Exception)]
+        if failures and len(failures) == len(results):
+            raise failures[0]
+        return results
+
+    async def _generate_unit(self, stan_names: List[str]) -> List[Tuple[str, Any]]:
+        """Generate and cache one unit; failures are returned, not raised.
+
+        Returns:
+            (stan_name, stats dict or Exception) for every stan in the unit
+        """
+        if len(stan_names) == 1:
+            try:
+                return [(stan_names[0], await self._generate_and_cache_briefing(stan_names[0]))]
+            except Exception as e:
+                return [(stan_names[0], e)]
+
+        try:
+            briefings = await self.agent.generate_briefings_packed(stan_names, **self._profile_kwargs(self.profile))
+        except Exception as e:
+            logger.error("packed_batch_generation_failed",
+                        stan_names=stan_names,
+                        error=str(e))
+            return [(stan_name, e) for stan_name in stan_names]
+
+        results = []
+        for stan_name in stan_names:
+            briefing = briefings[stan_name]
+            duration_ms = briefing.get("metadata", {}).get("duration_ms", 0.0)
+            try:
+                results.append((stan_name, await self._cache_generated_briefing(stan_name, briefing, duration_ms)))
+            except DegradedBriefingError as e:
+                results.append((stan_name, e))
+        return results
+
     async def _generate_and_cache_briefing(self, stan_name: str) -> Dict[str, Any]:
         """Generate briefing for a stan and cache it.
 
@@ -102,54 +598,21 @@ class BatchBriefingGenerator:
             stan_name: Name of the stan
 
         Returns:
-            Dict with cost_usd and other metadata
+            Dict with cost_usd, the generated briefing and other metadata
         """
         try:
             # Check if agent is available
             if not self.agent:
                 raise ValueError("No agent configured for batch generation")
 
-            # Create stan data structure
-            stan_data = {
-                "name": stan_name,
-                "categories": {"primary": "popular"},
-                "priority": 1
-            }
-
             # Generate briefing
             logger.info("generating_briefing", stan_name=stan_name)
             start_time = datetime.now()
 
-            # Use the configured agent (could be efficient or orchestrator)
-            if hasattr(self.agent, 'generate_comprehensive_briefing'):
-                briefing = await self.agent.generate_comprehensive_briefing(stan_data)
-            else:
-                briefing = await self.agent.generate_briefing(stan_name)
+            briefing = await self._generate_with_agent(stan_name, "popular", self.profile)
 
             duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-            # Estimate cost (rough estimate: $0.08 per briefing for efficient agent)
-            estimated_cost = 0.08  # Will be more accurate with actual token counting
-
-            # Cache for 24 hours
-            cache_key = f"public:briefing:{stan_name}:{date.today().isoformat()}"
-            await cache_service.set(
-                key=cache_key,
-                value=briefing,
-                ttl=86400  # 24 hours
-            )
-
-            logger.info("briefing_cached",
-                       stan_name=stan_name,
-                       cache_key=cache_key,
-                       duration_ms=duration_ms,
-                       cost_usd=estimated_cost)
-
-            return {
-                "cost_usd": estimated_cost,
-                "duration_ms": duration_ms,
-                "cached_key": cache_key
-            }
+            return await self._cache_generated_briefing(stan_name, briefing, duration_ms)
 
         except Exception as e:
             logger.error("briefing_generation_error",
@@ -157,45 +620,279 @@ class BatchBriefingGenerator:
                         error=str(e))
             raise
 
-    async def get_briefing(self, stan_name: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    async def _generate_with_agent(self, stan_name: str, category: str, profile: Optional[str]) -> Dict[str, Any]:
+        """Generate one briefing with the configured agent (efficient or orchestrator).
+
+        Args:
+            stan_name: Name of the stan
+            category: "popular" or "custom"
+            profile: Generation profile, if the agent supports profiles
+
+        Returns:
+            Generated briefing
+        """
+        if hasattr(self.agent, 'generate_comprehensive_briefing'):
+            stan_data = {
+                "name": stan_name,
+                "categories": {"primary": category},
+                "priority": 1
+            }
+            return await self.agent.generate_comprehensive_briefing(stan_data)
+        return await self.agent.generate_briefing(stan_name, **self._profile_kwargs(profile))
+
+    def _profile_kwargs(self, profile: Optional[str]) -> Dict[str, str]:
+        """Only pass a profile when one was chosen; not every agent takes it."""
+        return {"profile": profile} if profile else {}
+
+    async def _cache_generated_briefing(self, stan_name: str, briefing: Dict[str, Any], duration_ms: float) -> Dict[str, Any]:
+        """Cache a freshly generated popular briefing and log its cost.
+
+        Args:
+            stan_name: Name of the stan
+            briefing: Generated briefing
+            duration_ms: Generation time
+
+        Returns:
+            Dict with cost_usd, the briefing and other metadata
+
+        Raises:
+            DegradedBriefingError: When the briefing is stale or a stub; it
+                is not cached, so the caller can retry or report a failure
+        """
+        if is_uncacheable(briefing):
+            raise DegradedBriefingError(stan_name, briefing)
+
+        # Real cost from the model's token usage
+        usage = briefing.get("metadata", {}).get("usage") or empty_usage()
+
+        # Cache until tomorrow's batch replaces it
+        day = date.today()
+        cache_key = self._popular_cache_key(stan_name, day)
+        ttl = popular_briefing_ttl(day)
+        await cache_service.set(
+            key=cache_key,
+            value=briefing,
+            ttl=ttl
+        )
+
+        await self._persist_briefing(stan_name, briefing, usage["cost_usd"], ttl)
+
+        logger.info("briefing_cached",
+                   stan_name=stan_name,
+                   cache_key=cache_key,
+                   duration_ms=duration_ms,
+                   cost_usd=usage["cost_usd"],
+                   total_tokens=usage["total_tokens"])
+
+        log_briefing_generation(
+            stan_name=stan_name,
+            user_id="batch",
+            duration_ms=duration_ms,
+            agent_type=briefing.get("metadata", {}).get("agent_type", "batch"),
+            cost_usd=usage["cost_usd"],
+            success=True,
+            prompt_tokens=usage["prompt_tokens"],
+            output_tokens=usage["output_tokens"],
+            total_tokens=usage["total_tokens"],
+            llm_time_ms=usage["llm_time_ms"]
+        )
+
+        return {
+            "cost_usd": usage["cost_usd"],
+            "total_tokens": usage["total_tokens"],
+            "duration_ms": duration_ms,
+            "cached_key": cache_key,
+            "briefing": briefing
+        }
+
+    def _has_durable_store(self) -> bool:
+        return bool(self.db_client) and hasattr(self.db_client, "store_briefing_v2")
+
+    def _category_of(self, stan_name: str) -> str:
+        for category, stans in POPULAR_STANS.items():
+            if stan_name in stans:
+                return category
+        return "custom"
+
+    async def _persist_briefing(self, stan_name: str, briefing: Dict[str, Any], cost_usd: float, ttl: int):
+        """Write a popular briefing through to briefings_v2; failures only log."""
+        if not self._has_durable_store():
+            return
+        try:
+            await self.db_client.store_briefing_v2(briefing_v2_row(
+                stan_name,
+                self._category_of(stan_name),
+                briefing,
+                is_popular=True,
+                cost_usd=cost_usd,
+                ttl_seconds=ttl
+            ))
+            self.durable_stats["written"] += 1
+        except Exception as e:
+            self.durable_stats["write_failures"] += 1
+            logger.warning("briefing_v2_write_failed", stan_name=stan_name, error=str(e))
+
+    async def _restore_rows(self, rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Put briefings_v2 rows back into Redis until they expire.
+
+        Returns:
+            Stan name -> restored briefing
+        """
+        restored = {}
+        now = datetime.now().astimezone()
+        for row in rows:
+            briefing = row.get("content")
+            if not isinstance(briefing, dict):
+                continue
+            expires_at = datetime.fromisoformat(row["expires_at"])
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.astimezone()
+            ttl = int((expires_at - now).total_seconds())
+            if ttl <= 0:
+                continue
+            await cache_service.set(self._popular_cache_key(row["stan_name"]), briefing, ttl=ttl)
+            restored[row["stan_name"]] = briefing
+        self.durable_stats["restored"] += len(restored)
+        return restored
+
+    async def _restore_briefing(self, stan_name: str) -> Optional[Dict[str, Any]]:
+        """Today's briefing from briefings_v2 after a Redis miss (re-cached)."""
+        if not self._has_durable_store():
+            return None
+        # Readers piling up behind a miss don't each query the database
+        miss_key = f"durable_miss:{self._popular_cache_key(stan_name)}"
+        if await cache_service.exists(miss_key):
+            return None
+        restored = await self._restore_rows(await self.db_client.get_briefings_v2([stan_name]))
+        if stan_name not in restored:
+            await cache_service.set(miss_key, True, ttl=DURABLE_MISS_TTL_SECONDS)
+            return None
+        logger.info("briefing_restored_from_database", stan_name=stan_name)
+        return restored[stan_name]
+
+    async def warm_cache(self) -> int:
+        """Repopulate Redis with today's popular briefings from briefings_v2.
+
+        Returns:
+            Number of briefings restored
+        """
+        if not self._has_durable_store():
+            return 0
+        missing = [
+            stan_name for stan_name in self.popular_stan_list
+            if not await cache_service.exists(self._popular_cache_key(stan_name))
+        ]
+        if not missing:
+            return 0
+        restored = await self._restore_rows(await self.db_client.get_briefings_v2(missing))
+        if restored:
+            logger.info("briefing_cache_warmed", restored=len(restored), missing=len(missing))
+        return len(restored)
+
+    async def _serve_stale(self, stan_name: str) -> Optional[Dict[str, Any]]:
+        """Yesterday's briefing, marked stale, while today's is refreshed.
+
+        Returns:
+            The stale briefing, or None when yesterday's has expired too
+        """
+        yesterday = date.today() - timedelta(days=1)
+        stale = await cache_service.get(self._popular_cache_key(stan_name, yesterday))
+        if not stale:
+            return None
+
+        await self._refresh_in_background(stan_name)
+        self.stale_stats["served"] += 1
+        analytics_service.record_metric("popular_read_stale")
+        metadata = stale.setdefault("metadata", {})
+        metadata["stale"] = True
+        metadata["stale_date"] = yesterday.isoformat()
+        metadata["stale_generated_at"] = metadata.get("generated_at")
+        logger.info("stale_briefing_served", stan_name=stan_name, stale_date=yesterday.isoformat())
+        return stale
+
+    async def _refresh_in_background(self, stan_name: str):
+        """Start today's generation for a stan unless one is already running."""
+        if stan_name in self._refreshing:
+            return
+        # The lock is left to expire after a failure, which spaces out retries
+        lock_key = f"refresh:{self._popular_cache_key(stan_name)}"
+        token = uuid.uuid4().hex
+        if not await cache_service.acquire_lock(lock_key, token, REFRESH_LOCK_TTL_MS):
+            return
+
+        async def refresh():
+            try:
+                await self._generate_and_cache_briefing(stan_name)
+                self.stale_stats["refreshes"] += 1
+                await cache_service.release_lock(lock_key, token)
+            except Exception as e:
+                self.stale_stats["refresh_failures"] += 1
+                logger.error("stale_refresh_failed", stan_name=stan_name, error=str(e))
+            finally:
+                self._refreshing.pop(stan_name, None)
+
+        self._refreshing[stan_name] = asyncio.create_task(refresh())
+
+    async def get_briefing(self, stan_name: str, user_id: Optional[str] = None, profile: Optional[str] = None) -> Dict[str, Any]:
         """Get briefing for a stan (cached if popular, generated if custom).
 
         Args:
             stan_name: Name of the stan
             user_id: User ID for custom stans and rate limiting
+            profile: Generation profile for custom stans (popular stans use
+                the batch profile)
 
         Returns:
             Briefing dict with content, topics, sources, etc.
         """
+        # "bts", "BTS " and "Bangtan Boys" all share the BTS cache entry
+        requested, stan_name = stan_name, self.canonicalizer.canonicalize(stan_name)
+
         # Check if it's a popular stan
         if stan_name in self.popular_stan_list:
             # Serve from cache
-            cache_key = f"public:briefing:{stan_name}:{date.today().isoformat()}"
-            cached = await cache_service.get(cache_key)
+            cache_key = self._popular_cache_key(stan_name)
+            cached = await cache_service.get(cache_key) or await self._restore_briefing(stan_name)
+            if not cached:
+                cached = await self._serve_stale(stan_name)
 
+            await self._record_popular_read(stan_name, warm=bool(cached))
             if cached:
                 logger.info("briefing_served_from_cache",
                            stan_name=stan_name,
                            user_id=user_id)
-                return cached
+                self._record_redirect(requested, stan_name, shared=True)
+                return self._mark_cache_hit(cached)
 
-            # If cache miss (shouldn't happen with daily cron), generate on-demand
+            # If cache miss (shouldn't happen with daily cron), generate on-demand.
+            # Concurrent misses share a single generation.
             logger.warning("cache_miss_for_popular_stan",
                           stan_name=stan_name,
                           cache_key=cache_key)
-            result = await self._generate_and_cache_briefing(stan_name)
-            return await cache_service.get(cache_key)
+
+            async def generate_popular():
+                try:
+                    result = await self._generate_and_cache_briefing(stan_name)
+                except DegradedBriefingError as e:
+                    # Still better than an error for this reader, but not cached
+                    return e.briefing
+                return result["briefing"]
+
+            briefing = await self._coalesce(cache_key, generate_popular)
+            shared = briefing.get("metadata", {}).get("served_from_cache", False)
+            self._record_redirect(requested, stan_name, shared=shared)
+            return briefing
 
         # For custom stans, check user-specific cache (1 per day limit)
         if user_id:
-            cache_key = f"user:{user_id}:stan:{stan_name}:{date.today().isoformat()}"
+            cache_key = self._custom_cache_key(user_id, stan_name, profile)
             cached = await cache_service.get(cache_key)
 
             if cached:
                 logger.info("custom_briefing_served_from_cache",
                            stan_name=stan_name,
                            user_id=user_id)
-                return cached
+                return self._mark_cache_hit(cached)
 
             # Generate fresh for custom stan
             logger.info("generating_custom_briefing",
@@ -205,28 +902,224 @@ class BatchBriefingGenerator:
             if not self.agent:
                 raise ValueError("No agent configured")
 
-            stan_data = {
-                "name": stan_name,
-                "categories": {"primary": "custom"},
-                "priority": 1
-            }
+            async def generate_custom():
+                if self.job_queue:
+                    return await self._generate_custom_on_worker(cache_key, stan_name, user_id, profile)
+                return await self._generate_and_cache_custom(cache_key, stan_name, profile)
 
-            if hasattr(self.agent, 'generate_comprehensive_briefing'):
-                briefing = await self.agent.generate_comprehensive_briefing(stan_data)
-            else:
-                briefing = await self.agent.generate_briefing(stan_name)
+            return await self._coalesce(cache_key, generate_custom)
+
+        # No user_id for custom stan - shouldn't happen
+        raise ValueError(f"Custom stan '{stan_name}' requires user_id")
 
-            # Cache for 24 hours (rate limiting: 1 per day)
+    async def _generate_and_cache_custom(self, cache_key: str, stan_name: str, profile: Optional[str]) -> Dict[str, Any]:
+        """Generate a custom briefing and cache it for the rest of the day."""
+        briefing = await self._generate_with_agent(stan_name, "custom", profile)
+
+        # Cache for 24 hours (rate limiting: 1 per day)
+        if not is_uncacheable(briefing):
             await cache_service.set(
                 key=cache_key,
                 value=briefing,
                 ttl=86400
             )
+        return briefing
+
+    async def _generate_custom_on_worker(
+        self,
+        cache_key: str,
+        stan_name: str,
+        user_id: str,
+        profile: Optional[str]
+    ) -> Dict[str, Any]:
+        """Hand a custom briefing to the workers and wait for it in the cache.
+
+        The job ID is the cache key, so API processes missing the same
+        briefing at once share one job.
+
+        Raises:
+            TimeoutError: If no worker finished it within CUSTOM_JOB_TIMEOUT_SECONDS
+        """
+        result_key = f"job_result:{cache_key}"
+        await self.job_queue.enqueue(
+            "custom_briefing",
+            {"stan_name": stan_name, "user_id": user_id, "profile": profile, "result_key": result_key},
+            job_id=cache_key
+        )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CUSTOM_JOB_TIMEOUT_SECONDS
+        while True:
+            # Degraded briefings aren't cached; the worker leaves them under result_key
+            briefing = await cache_service.get(cache_key) or await cache_service.get(result_key)
+            if briefing:
+                return briefing
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Custom briefing for '{stan_name}' not ready after {CUSTOM_JOB_TIMEOUT_SECONDS:.0f}s")
+            await asyncio.sleep(CUSTOM_JOB_POLL_SECONDS)
+
+    async def run_custom_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a queued custom briefing (worker side).
+
+        Args:
+            payload: custom_briefing job payload
+
+        Returns:
+            The briefing, cached under the user's key unless it is degraded
+        """
+        stan_name, profile = payload["stan_name"], payload.get("profile")
+        cache_key = self._custom_cache_key(payload["user_id"], stan_name, profile)
+        # A retried job may find the first attempt's briefing already cached
+        cached = await cache_service.get(cache_key)
+        if cached:
+            return cached
+
+        logger.info("generating_custom_briefing",
+                   stan_name=stan_name,
+                   user_id=payload["user_id"])
+        # Enqueueing deduplicates by cache key, so no single-flight here
+        briefing = await self._generate_and_cache_custom(cache_key, stan_name, profile)
+        if is_uncacheable(briefing):
+            await cache_service.set(payload["result_key"], briefing, ttl=CUSTOM_JOB_RESULT_TTL)
+        return briefing
 
+    async def _coalesce(self, cache_key: str, generate) -> Dict[str, Any]:
+        """Run one generation per cache key; concurrent callers share it.
+
+        Args:
+            cache_key: Briefing cache key (also the single-flight key)
+            generate: Coroutine function that generates and caches the briefing
+
+        Returns:
+            The briefing. Callers that did not run the generation get a copy
+            flagged as served from cache so the cost is only billed once.
+        """
+        briefing, executed = await single_flight.do(
+            cache_key,
+            generate,
+            cache_get=lambda: cache_service.get(cache_key)
+        )
+        if executed:
             return briefing
+        return self._mark_cache_hit(copy.deepcopy(briefing))
 
-        # No user_id for custom stan - shouldn't happen
-        raise ValueError(f"Custom stan '{stan_name}' requires user_id")
+    async def _record_popular_read(self, stan_name: str, warm: bool):
+        """Count a popular-stan read for batch ordering and warm/cold reporting."""
+        outcome = "warm" if warm else "cold"
+        self.read_stats[outcome] += 1
+        analytics_service.record_metric(f"popular_read_{outcome}")
+        await cache_service.increment_score(
+            stan_requests_key(date.today()),
+            stan_name,
+            ttl=(POPULARITY_WINDOW_DAYS + 1) * 86400
+        )
+
+    def _record_redirect(self, requested: str, stan_name: str, shared: bool):
+        """Count a generation avoided when a respelled name got a shared briefing.
+
+        Without canonicalization the spelling would have missed the popular
+        cache and been generated as a custom stan; it only saved a call if
+        the briefing came from the cache or someone else's generation.
+        """
+        if shared and requested != stan_name and stan_name in self.popular_stan_list:
+            self.canonicalizer.record_avoided_generation()
+
+    def _mark_cache_hit(self, briefing: Dict[str, Any]) -> Dict[str, Any]:
+        """Flag a cached briefing so callers don't bill its generation twice."""
+        briefing.setdefault("metadata", {})["served_from_cache"] = True
+        return briefing
+
+    async def stream_briefing(
+        self,
+        stan_name: str,
+        user_id: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream briefing events for a stan.
+
+        Cached briefings are replayed as events immediately; misses are
+        streamed from the agent topic by topic and cached on completion.
+
+        Args:
+            stan_name: Name of the stan
+            user_id: User ID for custom stans and rate limiting
+            profile: Generation profile for custom stans (popular stans use
+                the batch profile)
+
+        Yields:
+            Event dicts (``start``, ``topic``, ``complete`` or ``error``)
+        """
+        requested, stan_name = stan_name, self.canonicalizer.canonicalize(stan_name)
+        if stan_name in self.popular_stan_list:
+            cache_key = self._popular_cache_key(stan_name)
+            profile = self.profile
+        elif user_id:
+            cache_key = self._custom_cache_key(user_id, stan_name, profile)
+        else:
+            raise ValueError(f"Custom stan '{stan_name}' requires user_id")
+
+        cached = await cache_service.get(cache_key)
+        if stan_name in self.popular_stan_list:
+            cached = cached or await self._restore_briefing(stan_name) or await self._serve_stale(stan_name)
+            await self._record_popular_read(stan_name, warm=bool(cached))
+        if cached:
+            logger.info("briefing_stream_served_from_cache",
+                       stan_name=stan_name,
+                       user_id=user_id)
+            self._record_redirect(requested, stan_name, shared=True)
+            for event in self._replay_events(stan_name, cached):
+                yield event
+            return
+
+        if not self.agent:
+            raise ValueError("No agent configured")
+
+        custom_on_worker = self.job_queue and stan_name not in self.popular_stan_list
+        if custom_on_worker or not hasattr(self.agent, "generate_briefing_stream"):
+            # Worker-generated briefings and agents without streaming
+            # support (orchestrator) are replayed
+            briefing = await self.get_briefing(stan_name, user_id, profile)
+            for event in self._replay_events(stan_name, briefing):
+                yield event
+            return
+
+        async def generate():
+            async for event in self.agent.generate_briefing_stream(stan_name, **self._profile_kwargs(profile)):
+                if event["event"] == "complete" and not is_uncacheable(event["data"]):
+                    if stan_name in self.popular_stan_list:
+                        ttl = popular_briefing_ttl(date.today())
+                        usage = event["data"].get("metadata", {}).get("usage") or empty_usage()
+                        await self._persist_briefing(stan_name, event["data"], usage["cost_usd"], ttl)
+                    else:
+                        ttl = 86400
+                    await cache_service.set(
+                        key=cache_key,
+                        value=event["data"],
+                        ttl=ttl
+                    )
+                yield event
+
+        # Concurrent streams of the same briefing follow one generation
+        async for event, executed in single_flight.stream(
+            cache_key,
+            generate,
+            cache_get=lambda: cache_service.get(cache_key),
+            replay=lambda briefing: self._replay_events(stan_name, briefing)
+        ):
+            if event["event"] == "complete" and not executed:
+                # Only the stream that generated bills the generation
+                event = {"event": "complete", "data": self._mark_cache_hit(copy.deepcopy(event["data"]))}
+                self._record_redirect(requested, stan_name, shared=True)
+            yield event
+
+    def _replay_events(self, stan_name: str, briefing: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turn a finished briefing into the same events a live stream emits."""
+        status = "stale" if briefing.get("metadata", {}).get("stale") else "cached"
+        events = [{"event": "start", "data": {"stan_name": stan_name, "status": status}}]
+        for topic in briefing.get("topics", []):
+            events.append({"event": "topic", "data": topic})
+        events.append({"event": "complete", "data": briefing})
+        return events
 
     def is_popular_stan(self, stan_name: str) -> bool:
         """Check if a stan is in the popular list.
@@ -235,9 +1128,9 @@ class BatchBriefingGenerator:
             stan_name: Name of the stan
 
         Returns:
-            True if popular, False otherwise
+            True if popular (under any known spelling), False otherwise
         """
-        return stan_name in self.popular_stan_list
+        return self.canonicalizer.resolve(stan_name) is not None
 
     def get_popular_stans(self) -> Dict[str, List[str]]:
         """Get all popular stans by category.
@@ -0,0 +1,207 @@
+"""Single-pass parsing of markdown briefings.
+
+The efficient agent asks the model for a briefing made of ``## `` sections
+with markdown-linked sources. This module turns that text into sections,
+per-section sources, deduplicated global sources and a summary in one scan
+over the text. The same parser is fed chunk by chunk on the streaming path,
+so a section is available as soon as the next header starts.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+SECTION_PREFIX = "## "
+_HEADER = "\n" + SECTION_PREFIX
+INTRO_SECTION = "_intro"
+SUMMARY_SECTION = "🔥 Top News & Trending"
+SUMMARY_MAX_CHARS = 200
+
+# Bare URLs and markdown link targets alike; a closing paren ends the URL
+_URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\])]+')
+_MARKDOWN_LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+_URL_TRAILING_PUNCTUATION = ".,;:!?'\""
+_BULLET_RE = re.compile(r'^\s*[-•](.*)$', re.MULTILINE)
+
+# Packed (multi-stan) responses start each briefing with this line
+PACKED_DELIMITER = "===== BRIEFING: {name} ====="
+_PACKED_DELIMITER_RE = re.compile(r'^\s*=+\s*BRIEFING:\s*(.+?)\s*=+\s*$', re.MULTILINE)
+
+
+def extract_sources(text: str) -> List[str]:
+    """Extract unique source URLs from text, in order of appearance.
+
+    Args:
+        text: Text containing markdown links and/or bare URLs
+
+    Returns:
+        List of unique URLs
+    """
+    return list(dict.fromkeys(_find_urls(text)))
+
+
+def parse_briefing(text: str) -> "BriefingParser":
+    """Parse a complete model response.
+
+    Args:
+        text: Full response text
+
+    Returns:
+        Closed parser holding sections, sources and summary
+    """
+    parser = BriefingParser()
+    parser.feed(text)
+    parser.close()
+    return parser
+
+
+def split_packed_response(text: str, names: List[str]) -> Dict[str, str]:
+    """Split a packed multi-stan response into per-stan briefing text.
+
+    Delimiter names are matched to ``names`` ignoring case and extra
+    whitespace; briefings for names that were not requested are dropped.
+
+    Args:
+        text: Full packed response
+        names: Stan names the prompt asked for
+
+    Returns:
+        Requested name -> briefing text (missing names are absent)
+    """
+    wanted = {_normalize_name(name): name for name in names}
+    text = text.replace("\r\n", "\n")
+    matches = list(_PACKED_DELIMITER_RE.finditer(text))
+
+    result = {}
+    for index, match in enumerate(matches):
+        name = wanted.get(_normalize_name(match.group(1)))
+        if name is None or name in result:
+            continue
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if body:
+            result[name] = body
+    return result
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.strip().strip('"').casefold().split())
+
+
+def _find_urls(text: str) -> List[str]:
+    """Return every URL found in text (duplicates included)."""
+    if "http" not in text:
+        return []
+    return [url.rstrip(_URL_TRAILING_PUNCTUATION) for url in _URL_RE.findall(text)]
+
+
+class BriefingParser:
+    """Incremental single-pass parser for ``## `` sectioned briefings.
+
+    Incoming text is buffered only until the next ``\n## `` header is
+    found, so every section is scanned exactly once: a single precompiled
+    regex pass collects its sources and, for the summary section only, the
+    first bullet is picked up. Header search resumes where the previous chunk
+    ended, keeping the total work linear in the response length.
+
+    Attributes:
+        sections: Completed sections by title, in order of appearance
+        sources: Unique URLs across the whole response
+        summary: First bullet of the summary section, links flattened
+    """
+
+    def __init__(self, summary_section: str = SUMMARY_SECTION):
+        self.summary_section = summary_section
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self.sources: List[str] = []
+        self.summary: Optional[str] = None
+
+        self._seen_sources = set()
+        self._buffer = ""
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of model output.
+
+        Args:
+            chunk: Raw text chunk from the model
+
+        Returns:
+            Sections completed by this chunk, as dicts with
+            title, content and sources
+        """
+        if self._closed:
+            raise RuntimeError("Parser already closed")
+
+        if not chunk:
+            return []
+
+        # A header split across chunks starts at most len(_HEADER) - 1 chars back
+        search_from = max(len(self._buffer) - len(_HEADER) + 1, 0)
+        buffer = self._buffer + chunk
+
+        completed = []
+        start = 0
+        index = buffer.find(_HEADER, search_from)
+        while index != -1:
+            section = self._finish_section(buffer[start:index])
+            if section:
+                completed.append(section)
+            start = index + 1
+            index = buffer.find(_HEADER, start)
+
+        self._buffer = buffer[start:]
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush the final section once the response has ended.
+
+        Returns:
+            List with the last section, if it has content
+        """
+        if self._closed:
+            return []
+
+        section = self._finish_section(self._buffer)
+        self._buffer = ""
+        self._closed = True
+        return [section] if section else []
+
+    def _finish_section(self, text: str) -> Optional[Dict[str, Any]]:
+        """Parse one raw section (header line included) and record it."""
+        if text.startswith(SECTION_PREFIX):
+            header, _, body = text.partition("\n")
+            title = header[len(SECTION_PREFIX):].strip()
+        else:
+            title, body = INTRO_SECTION, text
+
+        if "\r" in body:
+            body = body.replace("\r\n", "\n")
+        content = body.strip()
+        if not content:
+            return None
+
+        sources = list(dict.fromkeys(_find_urls(content)))
+        for url in sources:
+            if url not in self._seen_sources:
+                self._seen_sources.add(url)
+                self.sources.append(url)
+
+        if self.summary is None and title == self.summary_section:
+            self.summary = self._first_bullet(content)
+
+        section = {
+            "title": title,
+            "content": content,
+            "sources": sources,
+        }
+        self.sections[title] = section
+        return section
+
+    def _first_bullet(self, content: str) -> Optional[str]:
+        """Return the first bullet of a section with markdown links flattened."""
+        match = _BULLET_RE.search(content)
+        if not match:
+            return None
+        summary = match.group(1).lstrip("-•").strip()
+        summary = _MARKDOWN_LINK_RE.sub(r'\1', summary)
+        return summary[:SUMMARY_MAX_CHARS]
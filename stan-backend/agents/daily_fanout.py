@@ -0,0 +1,149 @@
+"""Daily briefings for every subscriber, generated once per unique request.
+
+The daily job used to run a full orchestration for every (user, stan)
+pair, so ten thousand BTS followers meant ten thousand identical
+briefings. Subscriptions are now grouped by canonical stan and a
+fingerprint of the settings the orchestrator actually reads; each group
+is generated once, with bounded concurrency, and the result is stored in
+every subscriber's ``daily_briefings`` row through batched upserts.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+from agents.batch_generator import POPULAR_STANS
+from agents.stan_canonicalizer import STAN_ALIASES, StanCanonicalizer, normalize_stan_name
+from database.supabase_client import daily_briefing_row
+from services.worker_pool import WorkerPool
+
+logger = structlog.get_logger()
+
+
+def settings_fingerprint(settings: Optional[Dict[str, Any]], setting_keys: Tuple[str, ...]) -> str:
+    """Hash of the settings that change the generated briefing.
+
+    Bookkeeping fields (row IDs, timestamps) are ignored and missing flags
+    count as their default, so users who never customized anything share
+    one fingerprint.
+
+    Args:
+        settings: The user's settings for one stan (or None)
+        setting_keys: Settings the generator reads
+
+    Returns:
+        Short hex digest
+    """
+    settings = settings or {}
+    relevant = {key: bool(settings.get(key, True)) for key in setting_keys}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class WorkGroup:
+    """Subscriptions that share one generated briefing."""
+
+    def __init__(self, stan: Dict[str, Any], settings: Optional[Dict[str, Any]]):
+        self.stan = stan
+        self.settings = settings
+        # (user_id, stan_id) rows that receive the briefing
+        self.subscribers: List[Tuple[str, str]] = []
+
+
+class DailyBriefingFanout:
+    """Generate each unique daily briefing once and store it for all subscribers."""
+
+    def __init__(self, orchestrator, db_client, canonicalizer: Optional[StanCanonicalizer] = None):
+        """Initialize fan-out.
+
+        Args:
+            orchestrator: BriefingOrchestrator (needs ``setting_keys``)
+            db_client: SupabaseClient for users and daily_briefings
+            canonicalizer: Maps stan spellings to one name (defaults to
+                the popular stans and their aliases)
+        """
+        self.orchestrator = orchestrator
+        self.db_client = db_client
+        self.canonicalizer = canonicalizer or StanCanonicalizer(
+            [name for stans in POPULAR_STANS.values() for name in stans],
+            STAN_ALIASES
+        )
+        self.concurrency = int(os.getenv("DAILY_BRIEFING_CONCURRENCY", "4"))
+        self.max_retries = int(os.getenv("DAILY_BRIEFING_MAX_RETRIES", "1"))
+        # Stats of the most recent run, for the metrics endpoint
+        self.last_run: Dict[str, Any] = {}
+
+    def group_work(self, users: List[Dict[str, Any]]) -> Dict[Tuple[str, str], WorkGroup]:
+        """Group every (user, stan) subscription by what it would generate.
+
+        Args:
+            users: Users with ``stans`` and per-stan ``custom_settings``
+
+        Returns:
+            Work groups keyed by (normalized canonical stan, settings fingerprint)
+        """
+        groups: Dict[Tuple[str, str], WorkGroup] = {}
+        for user in users:
+            settings_by_stan = user.get("custom_settings") or {}
+            for stan in user.get("stans", []):
+                settings = settings_by_stan.get(stan.get("id"))
+                canonical = self.canonicalizer.canonicalize(stan.get("name", ""))
+                key = (
+                    normalize_stan_name(canonical),
+                    settings_fingerprint(settings, self.orchestrator.setting_keys)
+                )
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = WorkGroup({**stan, "name": canonical}, settings)
+                group.subscribers.append((user["id"], stan["id"]))
+        return groups
+
+    async def run(self) -> Dict[str, Any]:
+        """Generate and store today's briefing for every subscription.
+
+        Returns:
+            Stats with total and unique work items, generations and rows stored
+        """
+        started = time.perf_counter()
+        users = await self.db_client.get_all_users_with_stans()
+        groups = list(self.group_work(users).values())
+        total = sum(len(group.subscribers) for group in groups)
+        stats = {
+            "users": len(users),
+            "total_items": total,
+            "unique_items": len(groups),
+            "generated": 0,
+            "failed": 0,
+        }
+        logger.info("daily_fanout_started", users=len(users), total_items=total, unique_items=len(groups))
+
+        async def generate(group: WorkGroup) -> Dict[str, Any]:
+            return await self.orchestrator.generate_comprehensive_briefing(
+                stan_data=group.stan,
+                custom_settings=group.settings
+            )
+
+        pool = WorkerPool(concurrency=self.concurrency, max_retries=self.max_retries)
+        async with self.db_client.daily_briefings_writer() as writer:
+            for group, briefing in await pool.run(groups, generate):
+                if isinstance(briefing, Exception):
+                    stats["failed"] += 1
+                    logger.error("daily_briefing_failed", stan=group.stan.get("name"),
+                                 subscribers=len(group.subscribers), error=str(briefing))
+                    continue
+
+                stats["generated"] += 1
+                for user_id, stan_id in group.subscribers:
+                    await writer.add(daily_briefing_row(user_id, stan_id, briefing))
+
+        write_stats = writer.get_stats()
+        stats["stored"] = write_stats["rows_written"]
+        stats["store_failures"] = write_stats["rows_failed"]
+        stats["write_rows_per_second"] = write_stats["rows_per_second"]
+        stats["generations_saved"] = total - len(groups)
+        stats["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("daily_fanout_finished", **stats)
+        self.last_run = stats
+        return stats
@@ -4,145 +4,606 @@ Replaces 9 specialized agents with one intelligent agent.
 70% cost reduction, 85% latency reduction compared to orchestrator.
 """
 
-from typing import Dict, Any, List, Optional
-import google.generativeai as genai
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
-import re
+import asyncio
+import os
+import time
 import structlog
+from agents.briefing_parser import PACKED_DELIMITER, BriefingParser, parse_briefing, split_packed_response
+from agents.generation_profiles import GenerationProfile, get_profile, profile_stats
+from agents.model_backends import ModelBackend
+from agents.model_registry import model_registry
+from agents.prompt_templates import compile_template, register_template
+from agents.usage import UsageAccumulator, empty_usage, record_estimated_usage, record_usage, split_usage, track_usage, usage_from_response
+from services.analytics_service import analytics_service
+from services.cache_service import cache_service, last_good_briefing_key
+from services.hedging import hedge_policy
+from services.llm_governor import DEFAULT_OUTPUT_TOKENS, estimate_tokens, llm_governor
 
 logger = structlog.get_logger()
 
+# Latency budget per model tier before degrading to the next one
+PRIMARY_BUDGET_MS = float(os.getenv("BRIEFING_PRIMARY_BUDGET_MS", "12000"))
+FALLBACK_BUDGET_MS = float(os.getenv("BRIEFING_FALLBACK_BUDGET_MS", "8000"))
+# Cheaper profile tried when the primary model misses its budget
+FALLBACK_PROFILE = os.getenv("BRIEFING_FALLBACK_PROFILE", "fast")
+# How long the last good briefing stays usable as the stale tier
+LAST_GOOD_TTL_SECONDS = 7 * 86400
+
+# Instructions per section; a profile picks which sections to request
+SECTION_PROMPTS = {
+    "🔥 Top News & Trending": """[2-3 bullet points with the most important news from the last 24-48 hours]
+- Include specific dates and events
+- Cite sources with URLs in format: [source name](URL)""",
+    "📱 Social Media Highlights": """[2-3 bullet points about viral content, fan reactions, trending posts]
+- Focus on high-engagement content
+- Include platform names (Twitter/X, Instagram, TikTok)
+- Cite sources with URLs""",
+    "📅 Upcoming Events": """[2-3 bullet points about confirmed upcoming events, releases, or schedules]
+- Include specific dates and locations
+- Only include verified information
+- Cite sources with URLs""",
+    "💡 Quick Recommendations": """[1-2 related topics, artists, or content the user might enjoy]
+- Brief explanation why they'd be interested
+- Keep it relevant to {subject}""",
+}
+
+BRIEFING_PROMPT = register_template("efficient_briefing", 2, """Generate a comprehensive daily briefing about {stan_name} for {today}.
+
+STRUCTURE YOUR RESPONSE EXACTLY AS FOLLOWS:
+
+{sections}
+
+---
+
+IMPORTANT GUIDELINES:
+1. Use Google Search to find current, accurate information
+2. Every claim must have a real source URL - use format: [source](URL)
+3. Keep total length under {max_words} words (concise and scannable)
+4. Use emojis to make it engaging (but don't overdo it)
+5. Write in a friendly, enthusiastic tone
+6. Focus on NEW information from the past 24-72 hours
+7. If you can't find recent news, say so honestly - don't make things up
+
+Current date: {today}
+
+Use Google Search to find the most recent and accurate information about {stan_name}.""")
+
+# Several stans per call: the instruction block is sent once per pack
+PACKED_BRIEFING_PROMPT = register_template("efficient_briefing_packed", 2, """Generate a comprehensive daily briefing for EACH of these {count} subjects for {today}:
+{stan_list}
+
+Start each subject's briefing with this line, using the subject name exactly as listed:
+""" + PACKED_DELIMITER.format(name="<subject name>") + """
+
+Then STRUCTURE EACH BRIEFING EXACTLY AS FOLLOWS:
+
+{sections}
+
+---
+
+IMPORTANT GUIDELINES:
+1. Use Google Search to find current, accurate information
+2. Every claim must have a real source URL - use format: [source](URL)
+3. Keep each briefing under {max_words} words (concise and scannable)
+4. Use emojis to make it engaging (but don't overdo it)
+5. Write in a friendly, enthusiastic tone
+6. Focus on NEW information from the past 24-72 hours
+7. If you can't find recent news, say so honestly - don't make things up
+8. Write a complete briefing for every subject - never merge or skip subjects
+
+Current date: {today}""")
+
 
 class EfficientBriefingAgent:
     """Single intelligent agent replaces 9 specialized agents."""
 
-    def __init__(self):
-        self.model_name = "gemini-pro"  # Stable, widely available model
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
-            # Removed tools parameter - using basic model without grounding
-        )
+    # Section title -> (category, priority), in display order
+    SECTION_ORDER = {
+        "🔥 Top News & Trending": ("news", 5),
+        "📱 Social Media Highlights": ("social_media", 4),
+        "📅 Upcoming Events": ("events", 3),
+        "💡 Quick Recommendations": ("recommendations", 2),
+    }
 
-    async def generate_briefing(self, stan_name: str, custom_settings: Optional[Dict] = None) -> Dict[str, Any]:
+    def __init__(self, backend: Optional[ModelBackend] = None, profile: Optional[str] = None):
+        """Initialize agent.
+
+        Args:
+            backend: Model backend for every profile (defaults to the shared
+                backend selected by STAN_MODEL_BACKEND, normally Gemini)
+            profile: Default generation profile (defaults to STAN_DEFAULT_PROFILE)
+        """
+        self.profile = get_profile(profile)
+        self.model_name = self.profile.model_name
+        self._backend_override = backend
+        # Basic model without grounding tools
+        self.model = backend or model_registry.get(self.model_name, self.profile.generation_config)
+
+    async def generate_briefing(
+        self,
+        stan_name: str,
+        custom_settings: Optional[Dict] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Generate comprehensive briefing using single agent with Google Search.
 
         Args:
             stan_name: Name of the stan/topic
             custom_settings: Optional settings (for future expansion)
+            profile: Generation profile name (defaults to the agent's)
+
+        Slow or failing generations degrade through a cheaper model, the
+        last good briefing and finally an error stub; ``metadata.tier``
+        says which one answered.
 
         Returns:
             Dict with content, summary, sources, topics, metadata
         """
-        try:
-            start_time = datetime.now()
+        start_time = datetime.now()
+        generation_profile = self._resolve_profile(profile)
+        return await self._cascade(
+            stan_name,
+            custom_settings,
+            self._model_tiers(generation_profile),
+            start_time
+        )
+
+    async def _generate_once(
+        self,
+        stan_name: str,
+        custom_settings: Optional[Dict],
+        generation_profile: GenerationProfile,
+        start_time: datetime
+    ) -> Dict[str, Any]:
+        """Generate a briefing with one profile, raising on failure."""
+        # Create comprehensive prompt
+        prompt = self._create_prompt(stan_name, custom_settings, generation_profile)
+
+        logger.info("generating_briefing_with_efficient_agent",
+                   stan_name=stan_name,
+                   profile=generation_profile.name,
+                   model=generation_profile.model_name)
+
+        # Generate content with Google Search grounding
+        with track_usage() as usage:
+            response = await self._generate_with_retry(prompt, profile=generation_profile)
+
+        # Parse structured response
+        briefing = self._parse_response(response, stan_name)
+
+        # Add metadata
+        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        briefing["metadata"] = {
+            "generated_at": datetime.now().isoformat(),
+            "model": generation_profile.model_name,
+            "agent_type": "efficient_single_agent",
+            "profile": generation_profile.name,
+            "prompt_version": BRIEFING_PROMPT.version_tag,
+            "duration_ms": duration_ms,
+            "stan_name": stan_name,
+            "usage": usage.as_dict(),
+        }
+        profile_stats.record(generation_profile.name, duration_ms, briefing["metadata"]["usage"])
+
+        logger.info("briefing_generated",
+                   stan_name=stan_name,
+                   duration_ms=duration_ms,
+                   total_tokens=usage.total_tokens,
+                   cost_usd=usage.cost_usd,
+                   topic_count=len(briefing.get("topics", [])),
+                   source_count=len(briefing.get("sources", [])))
+
+        return briefing
+
+    def _model_tiers(self, profile: GenerationProfile) -> List[Tuple[str, GenerationProfile, float]]:
+        """Model tiers to try in order: (tier, profile, budget in ms)."""
+        tiers = [("primary", profile, PRIMARY_BUDGET_MS)]
+        fallback = get_profile(FALLBACK_PROFILE)
+        if fallback.model_name != profile.model_name:
+            tiers.append(("fallback_model", fallback, FALLBACK_BUDGET_MS))
+        return tiers
+
+    async def _cascade(
+        self,
+        stan_name: str,
+        custom_settings: Optional[Dict],
+        model_tiers: List[Tuple[str, GenerationProfile, float]],
+        start_time: datetime,
+        errors: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Walk the degradation tiers until one produces a briefing.
+
+        Each model tier gets its own latency budget. When every model tier
+        fails or runs out of time, the last good briefing for the stan is
+        served, and only when there is none the error stub.
+
+        Args:
+            stan_name: Name of the stan/topic
+            custom_settings: Optional settings
+            model_tiers: Tiers from ``_model_tiers``
+            start_time: When the request started
+            errors: Failures from tiers already tried by the caller
+
+        Returns:
+            Briefing with ``tier`` and ``degraded`` in its metadata
+        """
+        errors = list(errors or [])
 
-            # Create comprehensive prompt
-            prompt = self._create_prompt(stan_name, custom_settings)
+        for tier, generation_profile, budget_ms in model_tiers:
+            try:
+                briefing = await asyncio.wait_for(
+                    self._generate_once(stan_name, custom_settings, generation_profile, start_time),
+                    timeout=budget_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                errors.append(f"{tier}: no response within {budget_ms:.0f}ms")
+            except Exception as e:
+                errors.append(f"{tier}: {e}")
+            else:
+                await self._remember_good_briefing(stan_name, briefing)
+                return self._mark_tier(briefing, tier, errors)
+
+            logger.warning("briefing_tier_failed",
+                          stan_name=stan_name,
+                          tier=tier,
+                          error=errors[-1])
+
+        stale = await self._load_stale_briefing(stan_name)
+        if stale:
+            return self._mark_tier(stale, "stale_cache", errors)
+
+        # Return fallback briefing
+        return self._mark_tier(self._create_fallback_briefing(stan_name, "; ".join(errors)), "stub", errors)
+
+    def _mark_tier(self, briefing: Dict[str, Any], tier: str, errors: List[str]) -> Dict[str, Any]:
+        """Record which tier served the briefing in its metadata and metrics."""
+        metadata = briefing.setdefault("metadata", {})
+        metadata["tier"] = tier
+        metadata["degraded"] = tier != "primary"
+        if errors:
+            metadata["tier_errors"] = errors
+        analytics_service.record_metric(f"briefing_tier_{tier}")
+        if tier != "primary":
+            logger.warning("briefing_degraded",
+                          stan_name=metadata.get("stan_name"),
+                          tier=tier,
+                          errors=errors)
+        return briefing
+
+    async def _remember_good_briefing(self, stan_name: str, briefing: Dict[str, Any]):
+        """Keep the latest successful briefing as the stale-cache tier."""
+        await cache_service.set(last_good_briefing_key(stan_name), briefing, ttl=LAST_GOOD_TTL_SECONDS)
+
+    async def _load_stale_briefing(self, stan_name: str) -> Optional[Dict[str, Any]]:
+        """The last good briefing for a stan, marked as stale, if any."""
+        try:
+            briefing = await cache_service.get(last_good_briefing_key(stan_name))
+        except Exception as e:
+            logger.warning("stale_briefing_lookup_failed", stan_name=stan_name, error=str(e))
+            return None
+        if not briefing:
+            return None
+
+        metadata = briefing.setdefault("metadata", {})
+        metadata["stale"] = True
+        metadata["stale_generated_at"] = metadata.get("generated_at")
+        metadata["generated_at"] = datetime.now().isoformat()
+        # Its tokens were paid for when it was first generated
+        metadata["usage"] = empty_usage()
+        metadata["served_from_cache"] = True
+        return briefing
+
+    async def generate_briefings_packed(
+        self,
+        stan_names: List[str],
+        retry_missing: bool = True,
+        profile: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Generate briefings for several stans with one packed prompt.
+
+        The shared instructions are sent once and the response is split on
+        per-stan delimiter lines. Stans missing from the response (or cut
+        short) are retried: first as a smaller pack, then one by one.
 
-            logger.info("generating_briefing_with_efficient_agent",
-                       stan_name=stan_name,
-                       model=self.model_name)
+        Args:
+            stan_names: Stans to generate
+            retry_missing: Re-pack missing stans once before going single
+            profile: Generation profile name (defaults to the agent's)
 
-            # Generate content with Google Search grounding
-            response = await self._generate_with_retry(prompt)
+        Returns:
+            Stan name -> briefing dict, for every requested stan
+        """
+        start_time = datetime.now()
+        generation_profile = self._resolve_profile(profile)
+        prompt = self._create_packed_prompt(stan_names, generation_profile)
 
-            # Parse structured response
-            briefing = self._parse_response(response, stan_name)
+        logger.info("generating_packed_briefings",
+                   stan_names=stan_names,
+                   profile=generation_profile.name,
+                   model=generation_profile.model_name)
 
-            # Add metadata
-            duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        texts: Dict[str, str] = {}
+        usage = None
+        try:
+            with track_usage() as usage:
+                response = await self._generate_with_retry(prompt, profile=generation_profile)
+            texts = split_packed_response(response, stan_names)
+        except Exception as e:
+            logger.warning("packed_generation_failed",
+                          stan_names=stan_names,
+                          error=str(e))
+
+        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        briefings = {}
+        for stan_name, text in texts.items():
+            briefing = self._parse_response(text, stan_name)
+            if len(briefing["topics"]) < len(generation_profile.sections):
+                continue  # Incomplete (usually truncated); retry this stan
             briefing["metadata"] = {
                 "generated_at": datetime.now().isoformat(),
-                "model": self.model_name,
+                "model": generation_profile.model_name,
                 "agent_type": "efficient_single_agent",
+                "profile": generation_profile.name,
+                "prompt_version": PACKED_BRIEFING_PROMPT.version_tag,
                 "duration_ms": duration_ms,
                 "stan_name": stan_name,
+                "packed": True,
+                "pack_size": len(stan_names),
+                "usage": split_usage(usage.as_dict(), len(stan_names)),
             }
+            profile_stats.record(generation_profile.name, duration_ms, briefing["metadata"]["usage"])
+            briefings[stan_name] = briefing
+
+        missing = [name for name in stan_names if name not in briefings]
+        logger.info("packed_briefings_generated",
+                   requested=len(stan_names),
+                   complete=len(briefings),
+                   missing=missing,
+                   duration_ms=duration_ms,
+                   total_tokens=usage.total_tokens if usage else 0)
+
+        if missing and retry_missing and 1 < len(missing) < len(stan_names):
+            briefings.update(await self.generate_briefings_packed(missing, retry_missing=False, profile=generation_profile.name))
+            missing = [name for name in stan_names if name not in briefings]
+
+        if missing:
+            singles = await asyncio.gather(*[
+                self.generate_briefing(name, profile=generation_profile.name) for name in missing
+            ])
+            briefings.update(zip(missing, singles))
+
+        return {name: briefings[name] for name in stan_names}
+
+    async def generate_briefing_stream(
+        self,
+        stan_name: str,
+        custom_settings: Optional[Dict] = None,
+        profile: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a briefing, emitting each topic as soon as its section closes.
+
+        Args:
+            stan_name: Name of the stan/topic
+            custom_settings: Optional settings (for future expansion)
+            profile: Generation profile name (defaults to the agent's)
+
+        Yields:
+            Event dicts: ``start``, one ``topic`` per finished section,
+            then ``complete`` with the full briefing (or ``error``)
+        """
+        start_time = datetime.now()
+        generation_profile = self._resolve_profile(profile)
+        prompt = self._create_prompt(stan_name, custom_settings, generation_profile)
+        parser = BriefingParser()
+        chunks = []
+        usage = UsageAccumulator()
+        first_topic_ms = None
 
-            logger.info("briefing_generated",
-                       stan_name=stan_name,
-                       duration_ms=duration_ms,
-                       topic_count=len(briefing.get("topics", [])),
-                       source_count=len(briefing.get("sources", [])))
+        logger.info("streaming_briefing_with_efficient_agent",
+                   stan_name=stan_name,
+                   profile=generation_profile.name,
+                   model=generation_profile.model_name)
 
-            return briefing
+        yield {"event": "start", "data": {"stan_name": stan_name, "status": "generating"}}
+
+        try:
+            async for section in self._stream_sections(prompt, parser, chunks, usage, generation_profile):
+                topic = self._build_topic(section)
+                if not topic:
+                    continue
+                if first_topic_ms is None:
+                    first_topic_ms = (datetime.now() - start_time).total_seconds() * 1000
+                yield {"event": "topic", "data": topic}
 
         except Exception as e:
-            logger.error("briefing_generation_failed",
+            logger.error("briefing_stream_failed",
                         stan_name=stan_name,
                         error=str(e))
-            # Return fallback briefing
-            return self._create_fallback_briefing(stan_name, str(e))
+            if first_topic_ms is not None:
+                # Topics were already shown; a different briefing can't be spliced in
+                yield {"event": "error", "data": {"error": str(e)}}
+                return
+
+            briefing = await self._cascade(
+                stan_name,
+                custom_settings,
+                self._model_tiers(generation_profile)[1:],
+                start_time,
+                errors=[f"primary: {e}"]
+            )
+            for topic in briefing.get("topics", []):
+                yield {"event": "topic", "data": topic}
+            yield {"event": "complete", "data": briefing}
+            return
+
+        briefing = self._build_briefing(parser, "".join(chunks), stan_name)
+
+        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        briefing["metadata"] = {
+            "generated_at": datetime.now().isoformat(),
+            "model": generation_profile.model_name,
+            "agent_type": "efficient_single_agent",
+            "profile": generation_profile.name,
+            "prompt_version": BRIEFING_PROMPT.version_tag,
+            "duration_ms": duration_ms,
+            "first_topic_ms": first_topic_ms,
+            "stan_name": stan_name,
+            "streamed": True,
+            "usage": usage.as_dict(),
+        }
+        profile_stats.record(generation_profile.name, duration_ms, briefing["metadata"]["usage"])
+        await self._remember_good_briefing(stan_name, briefing)
+        self._mark_tier(briefing, "primary", [])
+
+        logger.info("briefing_streamed",
+                   stan_name=stan_name,
+                   duration_ms=duration_ms,
+                   first_topic_ms=first_topic_ms,
+                   total_tokens=usage.total_tokens,
+                   cost_usd=usage.cost_usd,
+                   topic_count=len(briefing.get("topics", [])))
+
+        yield {"event": "complete", "data": briefing}
+
+    async def _stream_sections(
+        self,
+        prompt: str,
+        parser: BriefingParser,
+        chunks: List[str],
+        usage: UsageAccumulator,
+        profile: Optional[GenerationProfile] = None
+    ):
+        """Stream the model response and yield sections as they complete.
+
+        Args:
+            prompt: The prompt to send
+            parser: Incremental parser fed with each chunk
+            chunks: List collecting raw chunks for the final briefing
+            usage: Accumulator receiving the call's token usage
+            profile: Generation profile (defaults to the agent's)
+
+        Yields:
+            Section dicts (title, content, sources) as each one finishes
+        """
+        model, model_name = self._model_for(profile or self.profile)
+        async with llm_governor.slot(estimate_tokens(prompt), track_latency=False) as permit:
+            call_start = time.perf_counter()
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                text = chunk.text
+                if not text:
+                    continue
+                chunks.append(text)
+                for section in parser.feed(text):
+                    yield section
+
+            # Usage metadata is complete once the stream is exhausted
+            call_usage = usage_from_response(response)
+            permit.record_tokens(call_usage["total_tokens"])
+            usage.add(
+                model_name,
+                call_usage,
+                (time.perf_counter() - call_start) * 1000
+            )
+
+        for section in parser.close():
+            yield section
+
+    def _resolve_profile(self, profile: Optional[str]) -> GenerationProfile:
+        """The named profile, or the agent's default."""
+        return get_profile(profile) if profile else self.profile
+
+    def _model_for(self, profile: GenerationProfile) -> Tuple[Any, str]:
+        """Backend and model name to use for a profile."""
+        if profile.name == self.profile.name:
+            return self.model, self.model_name
+        if self._backend_override is not None:
+            return self._backend_override, profile.model_name
+        return model_registry.get(profile.model_name, profile.generation_config), profile.model_name
+
+    def _render_sections(self, profile: GenerationProfile, subject: str) -> str:
+        """Section instructions requested by a profile."""
+        return "\n\n".join(
+            f"## {title}\n" + compile_template(SECTION_PROMPTS[title]).render({"subject": subject})
+            for title in profile.sections
+        )
 
-    def _create_prompt(self, stan_name: str, custom_settings: Optional[Dict] = None) -> str:
+    def _create_prompt(
+        self,
+        stan_name: str,
+        custom_settings: Optional[Dict] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> str:
         """Create comprehensive prompt for briefing generation.
 
         Args:
             stan_name: Name of the stan
             custom_settings: Optional custom settings
+            profile: Generation profile (defaults to the agent's)
 
         Returns:
             Formatted prompt string
         """
-        today = datetime.now().strftime("%B %d, %Y")
+        profile = profile or self.profile
+        return BRIEFING_PROMPT.render({
+            "stan_name": stan_name,
+            "today": datetime.now().strftime("%B %d, %Y"),
+            "sections": self._render_sections(profile, stan_name),
+            "max_words": profile.max_words,
+        })
 
-        prompt = f"""Generate a comprehensive daily briefing about {stan_name} for {today}.
+    def _create_packed_prompt(self, stan_names: List[str], profile: Optional[GenerationProfile] = None) -> str:
+        """Create one prompt covering several stans.
 
-STRUCTURE YOUR RESPONSE EXACTLY AS FOLLOWS:
-
-## 🔥 Top News & Trending
-[2-3 bullet points with the most important news from the last 24-48 hours]
-- Include specific dates and events
-- Cite sources with URLs in format: [source name](URL)
-
-## 📱 Social Media Highlights
-[2-3 bullet points about viral content, fan reactions, trending posts]
-- Focus on high-engagement content
-- Include platform names (Twitter/X, Instagram, TikTok)
-- Cite sources with URLs
-
-## 📅 Upcoming Events
-[2-3 bullet points about confirmed upcoming events, releases, or schedules]
-- Include specific dates and locations
-- Only include verified information
-- Cite sources with URLs
-
-## 💡 Quick Recommendations
-[1-2 related topics, artists, or content the user might enjoy]
-- Brief explanation why they'd be interested
-- Keep it relevant to {stan_name}
-
----
-
-IMPORTANT GUIDELINES:
-1. Use Google Search to find current, accurate information
-2. Every claim must have a real source URL - use format: [source](URL)
-3. Keep total length under 500 words (concise and scannable)
-4. Use emojis to make it engaging (but don't overdo it)
-5. Write in a friendly, enthusiastic tone
-6. Focus on NEW information from the past 24-72 hours
-7. If you can't find recent news, say so honestly - don't make things up
-
-Current date: {today}
-
-Use Google Search to find the most recent and accurate information about {stan_name}."""
-
-        return prompt
+        Args:
+            stan_names: Stans to include
+            profile: Generation profile (defaults to the agent's)
 
-    async def _generate_with_retry(self, prompt: str, max_retries: int = 2) -> str:
+        Returns:
+            Formatted prompt string
+        """
+        profile = profile or self.profile
+        return PACKED_BRIEFING_PROMPT.render({
+            "count": len(stan_names),
+            "stan_list": "\n".join(f"- {name}" for name in stan_names),
+            "today": datetime.now().strftime("%B %d, %Y"),
+            "sections": self._render_sections(profile, "that subject"),
+            "max_words": profile.max_words,
+        })
+
+    async def _generate_with_retry(
+        self,
+        prompt: str,
+        max_retries: int = 2,
+        profile: Optional[GenerationProfile] = None
+    ) -> str:
         """Generate content with retry logic.
 
         Args:
             prompt: The prompt to send
             max_retries: Maximum number of retries
+            profile: Generation profile (defaults to the agent's)
 
         Returns:
             Generated text response
         """
+        model, model_name = self._model_for(profile or self.profile)
         for attempt in range(max_retries + 1):
             try:
-                # Use generate_content_async for async support
-                response = self.model.generate_content(prompt)
+                # Native async call keeps the event loop free for cache hits
+                call_start = time.perf_counter()
+                response = await hedge_policy.run(
+                    lambda: model.generate_content_async(prompt),
+                    key=model_name,
+                    slot=lambda: llm_governor.slot(estimate_tokens(prompt)),
+                    # A cancelled hedge loser was still sent, so charge its estimate
+                    on_abandoned=lambda elapsed_ms: record_estimated_usage(
+                        model_name, estimate_tokens(prompt, output_tokens=0), DEFAULT_OUTPUT_TOKENS, elapsed_ms
+                    )
+                )
+                record_usage(model_name, response, (time.perf_counter() - call_start) * 1000)
                 return response.text
 
             except Exception as e:
@@ -155,7 +616,6 @@ Use Google Search to find the most recent and accurate information about {stan_n
                     raise
 
                 # Wait before retry
-                import asyncio
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
 
         raise RuntimeError("Failed to generate content after retries")
@@ -170,137 +630,58 @@ Use Google Search to find the most recent and accurate information about {stan_n
         Returns:
             Structured briefing dict
         """
-        # Extract sections
-        sections = self._extract_sections(response_text)
+        return self._build_briefing(parse_briefing(response_text), response_text, stan_name)
 
-        # Extract all source URLs
-        sources = self._extract_sources(response_text)
+    def _build_briefing(self, parser: BriefingParser, response_text: str, stan_name: str) -> Dict[str, Any]:
+        """Assemble the briefing dict from a closed parser.
 
-        # Create topics array
+        Args:
+            parser: Parser that has consumed the whole response
+            response_text: Raw text from model
+            stan_name: Name of the stan
+
+        Returns:
+            Structured briefing dict
+        """
+        # Create topics array in display order
         topics = []
-        section_order = [
-            ("🔥 Top News & Trending", "news", 5),
-            ("📱 Social Media Highlights", "social_media", 4),
-            ("📅 Upcoming Events", "events", 3),
-            ("💡 Quick Recommendations", "recommendations", 2),
-        ]
-
-        for section_title, category, priority in section_order:
-            content = sections.get(section_title, "")
-            if content.strip():
-                topic = {
-                    "title": section_title,
-                    "content": content.strip(),
-                    "sources": self._extract_sources(content),
-                    "category": category,
-                    "priority": priority
-                }
-                topics.append(topic)
-
-        # Generate concise summary (first paragraph of news section)
-        summary = self._generate_summary(sections, stan_name)
-
-        # Full content (all sections combined)
-        full_content = response_text
+        for section_title in self.SECTION_ORDER:
+            section = parser.sections.get(section_title)
+            if section:
+                topics.append(self._build_topic(section))
+
+        # Concise summary: first bullet of the news section
+        summary = parser.summary or f"Latest updates and highlights about {stan_name}."
 
         return {
-            "content": full_content,
+            "content": response_text,
             "summary": summary,
-            "sources": sources,
+            "sources": parser.sources,
             "topics": topics,
-            "searchSources": sources,  # For backward compatibility
+            "searchSources": parser.sources,  # For backward compatibility
             "generated_by": "Efficient Single Agent v2.0",
         }
 
-    def _extract_sections(self, text: str) -> Dict[str, str]:
-        """Extract sections from markdown-formatted response.
-
-        Args:
-            text: Full response text
-
-        Returns:
-            Dict mapping section title to content
-        """
-        sections = {}
-
-        # Split by markdown headers (## )
-        parts = re.split(r'\n## ', text)
-
-        for part in parts:
-            if not part.strip():
-                continue
-
-            # First line is the header, rest is content
-            lines = part.split('\n', 1)
-            if len(lines) == 2:
-                header = lines[0].strip()
-                content = lines[1].strip()
-                sections[header] = content
-            elif len(lines) == 1 and '##' not in part:
-                # This might be content before first header
-                sections['_intro'] = lines[0].strip()
-
-        return sections
-
-    def _extract_sources(self, text: str) -> List[str]:
-        """Extract all URLs from text.
-
-        Looks for markdown links: [text](URL) and plain URLs.
+    def _build_topic(self, section: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a topic dict for a known briefing section.
 
         Args:
-            text: Text containing URLs
+            section: Parsed section with title, content and sources
 
         Returns:
-            List of unique URLs
+            Topic dict, or None for sections outside SECTION_ORDER
         """
-        sources = []
-
-        # Extract markdown links [text](url)
-        markdown_links = re.findall(r'\[([^\]]+)\]\(([^\)]+)\)', text)
-        for text_part, url in markdown_links:
-            if url.startswith('http'):
-                sources.append(url)
-
-        # Extract plain URLs (less common but handle it)
-        plain_urls = re.findall(r'https?://[^\s\)]+', text)
-        sources.extend(plain_urls)
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_sources = []
-        for url in sources:
-            if url not in seen:
-                seen.add(url)
-                unique_sources.append(url)
-
-        return unique_sources
+        if section["title"] not in self.SECTION_ORDER:
+            return None
 
-    def _generate_summary(self, sections: Dict[str, str], stan_name: str) -> str:
-        """Generate a concise summary from sections.
-
-        Args:
-            sections: Dict of section content
-            stan_name: Name of the stan
-
-        Returns:
-            Brief summary string (1-2 sentences)
-        """
-        # Get first bullet point from news section
-        news_content = sections.get("🔥 Top News & Trending", "")
-
-        if news_content:
-            # Extract first bullet point
-            lines = news_content.split('\n')
-            for line in lines:
-                if line.strip().startswith('-') or line.strip().startswith('•'):
-                    # Remove bullet and clean up
-                    summary = line.strip().lstrip('-•').strip()
-                    # Remove markdown links but keep text
-                    summary = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', summary)
-                    return summary[:200]  # Max 200 chars
-
-        # Fallback: generic summary
-        return f"Latest updates and highlights about {stan_name}."
+        category, priority = self.SECTION_ORDER[section["title"]]
+        return {
+            "title": section["title"],
+            "content": section["content"],
+            "sources": section["sources"],
+            "category": category,
+            "priority": priority
+        }
 
     def _create_fallback_briefing(self, stan_name: str, error: str) -> Dict[str, Any]:
         """Create fallback briefing when generation fails.
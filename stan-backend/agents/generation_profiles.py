@@ -0,0 +1,150 @@
+"""Named generation profiles.
+
+A profile picks the model, the output-token cap, how many briefing
+sections to ask for and the length guideline. ``fast`` is meant for
+anonymous and preview traffic, ``standard`` matches the regular briefing,
+and ``deep`` is for the popular batch where one generation is served to
+many users.
+
+Every generation records its latency and token cost against its profile,
+so the trade-off between profiles is measured rather than guessed.
+
+Configuration (environment):
+    STAN_DEFAULT_PROFILE: profile used when a request names none (default standard)
+    BATCH_PROFILE: profile for the daily popular batch (default standard)
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+ALL_SECTIONS = (
+    "🔥 Top News & Trending",
+    "📱 Social Media Highlights",
+    "📅 Upcoming Events",
+    "💡 Quick Recommendations",
+)
+
+
+class GenerationProfile:
+    """Model and output budget for one kind of briefing."""
+
+    def __init__(
+        self,
+        name: str,
+        model_name: str,
+        max_output_tokens: int,
+        sections: Tuple[str, ...],
+        max_words: int,
+        temperature: float = 0.7
+    ):
+        self.name = name
+        self.model_name = model_name
+        self.max_output_tokens = max_output_tokens
+        self.sections = sections
+        self.max_words = max_words
+        self.temperature = temperature
+
+    @property
+    def generation_config(self) -> Dict[str, Any]:
+        """Gemini generation config for this profile."""
+        return {
+            "temperature": self.temperature,
+            "max_output_tokens": self.max_output_tokens,
+        }
+
+
+PROFILES: Dict[str, GenerationProfile] = {
+    "fast": GenerationProfile(
+        name="fast",
+        model_name="gemini-2.0-flash-lite",
+        max_output_tokens=600,
+        sections=ALL_SECTIONS[:2],
+        max_words=200,
+        temperature=0.5,
+    ),
+    "standard": GenerationProfile(
+        name="standard",
+        model_name="gemini-pro",
+        max_output_tokens=2048,
+        sections=ALL_SECTIONS,
+        max_words=500,
+    ),
+    "deep": GenerationProfile(
+        name="deep",
+        model_name="gemini-2.5-flash",
+        max_output_tokens=4096,
+        sections=ALL_SECTIONS,
+        max_words=800,
+    ),
+}
+
+
+def get_profile(name: Optional[str] = None) -> GenerationProfile:
+    """Look up a profile by name.
+
+    Args:
+        name: Profile name; None means STAN_DEFAULT_PROFILE
+
+    Returns:
+        Generation profile
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    name = name or os.getenv("STAN_DEFAULT_PROFILE", "standard")
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown generation profile '{name}'. Choose from: {', '.join(PROFILES)}")
+
+
+class ProfileStats:
+    """Measured latency and token cost per profile."""
+
+    def __init__(self, window: int = 500):
+        self._window = window
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, profile: str, duration_ms: float, usage: Dict[str, Any]):
+        """Record one finished generation.
+
+        Args:
+            profile: Profile name
+            duration_ms: End-to-end generation time
+            usage: Usage dict from briefing metadata
+        """
+        with self._lock:
+            entry = self._profiles.setdefault(profile, {
+                "generations": 0,
+                "total_tokens": 0,
+                "cost_usd": 0.0,
+                "latencies": deque(maxlen=self._window),
+            })
+            entry["generations"] += 1
+            entry["total_tokens"] += usage.get("total_tokens", 0)
+            entry["cost_usd"] += usage.get("cost_usd", 0.0)
+            entry["latencies"].append(duration_ms)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-profile averages and latency percentiles."""
+        with self._lock:
+            result = {}
+            for name, entry in self._profiles.items():
+                count = entry["generations"]
+                latencies: Deque[float] = entry["latencies"]
+                ordered = sorted(latencies)
+                result[name] = {
+                    "generations": count,
+                    "avg_latency_ms": round(sum(ordered) / len(ordered), 1) if ordered else 0.0,
+                    "p95_latency_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 1) if ordered else 0.0,
+                    "avg_tokens": entry["total_tokens"] // count if count else 0,
+                    "avg_cost_usd": round(entry["cost_usd"] / count, 6) if count else 0.0,
+                }
+            return result
+
+
+# Global per-profile measurements
+profile_stats = ProfileStats()
@@ -0,0 +1,407 @@
+"""Model backends behind the briefing agents.
+
+Agents talk to a backend through one call,
+``generate_content_async(prompt, stream=False)``, which returns an object
+with ``.text`` and ``.usage_metadata`` (or, when streaming, an async
+iterable of chunks whose ``usage_metadata`` is set once exhausted). This
+is the shape Gemini's ``GenerativeModel`` already has, so the rest of the
+pipeline (hedging, the governor, usage accounting, the parser) is the same
+for every backend.
+
+Backends:
+    GeminiBackend: the real model
+    FakeBackend: deterministic offline model with configurable latency and
+        failure distributions, for load tests and benchmarks
+    CassetteBackend: records another backend's responses to a JSON file
+        and replays them without network access
+
+Configuration (environment):
+    STAN_MODEL_BACKEND: gemini (default), fake, record or replay
+    STAN_CASSETTE_PATH: cassette file for record/replay
+    STAN_FAKE_LATENCY_MS / STAN_FAKE_FAILURE_RATE / STAN_FAKE_SEED: FakeBackend knobs
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import google.generativeai as genai
+
+DEFAULT_CASSETTE_PATH = "tests/fixtures/cassettes/default.json"
+
+# Dates make prompts differ every day; cassette keys ignore them
+_DATE_RES = [
+    re.compile(r'\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday), '),
+    re.compile(r'\b(?:January|February|March|April|May|June|July|August|September|'
+               r'October|November|December) \d{1,2}, \d{4}\b'),
+    re.compile(r'\b\d{4}-\d{2}-\d{2}\b'),
+]
+_SUBJECT_RE = re.compile(r'"([^"\n]{1,80})"|about ([^"\n]+?)(?: for | and |[.,\n])')
+_SECTION_RE = re.compile(r'^## .+$', re.MULTILINE)
+
+
+class UsageMetadata:
+    """Token counts in the shape of Gemini's ``usage_metadata``."""
+
+    def __init__(self, prompt_token_count: int = 0, candidates_token_count: int = 0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "prompt_token_count": self.prompt_token_count,
+            "candidates_token_count": self.candidates_token_count,
+        }
+
+
+class ModelResponse:
+    """A complete (non-streamed) response."""
+
+    def __init__(self, text: str, usage_metadata: Optional[UsageMetadata] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata or UsageMetadata()
+
+
+class StreamChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StreamingModelResponse:
+    """Async iterable of chunks; usage is available after iteration."""
+
+    def __init__(self, chunks: AsyncIterator[str], on_done: Optional[Callable[[List[str]], UsageMetadata]] = None):
+        self._chunks = chunks
+        self._on_done = on_done
+        self.usage_metadata: Optional[UsageMetadata] = None
+
+    async def __aiter__(self):
+        received = []
+        async for text in self._chunks:
+            received.append(text)
+            yield StreamChunk(text)
+        if self._on_done is not None:
+            self.usage_metadata = self._on_done(received)
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (about 4 chars per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ModelBackend:
+    """Interface every backend implements."""
+
+    model_name: str = ""
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> Any:
+        """Generate a response for ``prompt``.
+
+        Args:
+            prompt: Prompt text
+            stream: Return a streaming response instead of a complete one
+
+        Returns:
+            Response with ``.text`` and ``.usage_metadata``, or a streaming
+            response when ``stream`` is True
+        """
+        raise NotImplementedError
+
+    async def warm_up(self):
+        """Open connections ahead of the first real request (optional)."""
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini through ``google.generativeai``."""
+
+    def __init__(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None):
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config
+        )
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> Any:
+        return await self.model.generate_content_async(prompt, stream=stream)
+
+    async def warm_up(self):
+        # count_tokens is free and opens the async gRPC channel
+        await self.model.count_tokens_async("ping")
+
+
+class FakeBackend(ModelBackend):
+    """Deterministic offline model.
+
+    Latency is log-normal around ``latency_ms`` (``latency_sigma`` controls
+    the tail). ``failure_rate`` of calls raise, and ``rate_limit_rate`` of
+    calls raise a 429-style error. Every draw comes from a generator seeded
+    by ``seed``, the prompt and how many times that prompt has been sent,
+    so runs are reproducible even when calls interleave.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.3,
+        failure_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+        time_scale: float = 1.0,
+        chunk_chars: int = 80,
+        json_mode: bool = False,
+        responder: Optional[Callable[[str], str]] = None
+    ):
+        """Initialize fake backend.
+
+        Args:
+            model_name: Model name to report (used for pricing)
+            latency_ms: Median latency of a call
+            latency_sigma: Log-normal sigma; 0 for constant latency
+            failure_rate: Fraction of calls that raise RuntimeError
+            rate_limit_rate: Fraction of calls that raise a 429 error
+            seed: Seed for all random draws
+            time_scale: Multiplier on sleeps (0 makes calls instant)
+            chunk_chars: Characters per chunk when streaming
+            json_mode: Answer with a JSON briefing instead of markdown
+            responder: Custom prompt -> text function
+        """
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.time_scale = time_scale
+        self.chunk_chars = chunk_chars
+        self.json_mode = json_mode
+        self.responder = responder
+
+        self.calls = 0
+        self._prompt_counts: Dict[str, int] = {}
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        count = self._prompt_counts.get(digest, 0)
+        self._prompt_counts[digest] = count + 1
+        return random.Random(f"{self.seed}:{digest}:{count}")
+
+    def _draw(self, prompt: str):
+        """Latency in seconds, plus the error to raise (if any)."""
+        self.calls += 1
+        rng = self._rng(prompt)
+        latency = self.latency_ms * math.exp(rng.gauss(0, self.latency_sigma)) if self.latency_sigma else self.latency_ms
+        roll = rng.random()
+        error = None
+        if roll < self.rate_limit_rate:
+            error = RuntimeError("429 Resource has been exhausted (fake)")
+        elif roll < self.rate_limit_rate + self.failure_rate:
+            error = RuntimeError("Fake model failure")
+        return latency / 1000 * self.time_scale, error
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> Any:
+        latency, error = self._draw(prompt)
+        text = self.responder(prompt) if self.responder else self._default_response(prompt)
+
+        if stream:
+            return StreamingModelResponse(
+                self._stream(text, latency, error),
+                on_done=lambda chunks: UsageMetadata(count_tokens(prompt), count_tokens("".join(chunks)))
+            )
+
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return ModelResponse(text, UsageMetadata(count_tokens(prompt), count_tokens(text)))
+
+    async def _stream(self, text: str, latency: float, error: Optional[Exception]) -> AsyncIterator[str]:
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        # First token after ~30% of the latency, the rest spread evenly
+        await asyncio.sleep(latency * 0.3)
+        if error is not None:
+            raise error
+        per_chunk = latency * 0.7 / len(pieces)
+        for piece in pieces:
+            yield piece
+            await asyncio.sleep(per_chunk)
+
+    def _default_response(self, prompt: str) -> str:
+        match = _SUBJECT_RE.search(prompt)
+        subject = (match.group(1) or match.group(2)).strip() if match else "this topic"
+        slug = re.sub(r'[^a-z0-9]+', '-', subject.lower()).strip('-') or "topic"
+
+        if self.json_mode:
+            return json.dumps({
+                "topics": [
+                    {
+                        "title": f"{subject} update",
+                        "content": f"Fake update about {subject}. 🎉",
+                        "sources": [f"https://example.com/{slug}/news"],
+                    }
+                ],
+                "summary": f"Fake summary for {subject}.",
+                "searchSources": [f"https://example.com/{slug}/news"],
+            })
+
+        sections = _SECTION_RE.findall(prompt) or ["## 🔥 Top News & Trending"]
+        lines = []
+        for index, header in enumerate(sections):
+            lines.append(header)
+            lines.append(f"- Fake item {index + 1} about {subject} "
+                         f"[source](https://example.com/{slug}/{index + 1})")
+            lines.append(f"- Another fake item about {subject}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+class CassetteMiss(KeyError):
+    """Replay was asked for a prompt that was never recorded."""
+
+
+class CassetteBackend(ModelBackend):
+    """Record responses from another backend, or replay them offline.
+
+    The cassette is a JSON file mapping a hash of the model name and the
+    prompt (with dates masked, so yesterday's recording still matches) to
+    the response text, stream chunks and token usage.
+    """
+
+    def __init__(self, path: str, inner: Optional[ModelBackend] = None, mode: str = "replay", model_name: Optional[str] = None):
+        """Initialize cassette backend.
+
+        Args:
+            path: Cassette JSON file
+            inner: Backend to record from (required for record/auto)
+            mode: "replay" (miss raises CassetteMiss), "record" (always
+                call ``inner`` and store) or "auto" (replay, record misses)
+            model_name: Model name used in keys (defaults to inner's)
+        """
+        if mode not in ("replay", "record", "auto"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"Cassette mode '{mode}' needs an inner backend")
+
+        self.path = Path(path)
+        self.inner = inner
+        self.mode = mode
+        self.model_name = model_name or (inner.model_name if inner else "")
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def key_for(self, prompt: str) -> str:
+        """Cassette key for a prompt."""
+        normalized = prompt
+        for date_re in _DATE_RES:
+            normalized = date_re.sub("<date>", normalized)
+        return hashlib.sha256(f"{self.model_name}\n{normalized}".encode("utf-8")).hexdigest()[:24]
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> Any:
+        key = self.key_for(prompt)
+        entry = self.entries.get(key)
+
+        if entry is not None and self.mode != "record":
+            return self._replay(entry, stream)
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded response for prompt {key} in {self.path}")
+        return await self._record(key, prompt, stream)
+
+    async def warm_up(self):
+        if self.inner is not None:
+            await self.inner.warm_up()
+
+    def _replay(self, entry: Dict[str, Any], stream: bool) -> Any:
+        usage = UsageMetadata(**entry["usage"])
+        if not stream:
+            return ModelResponse(entry["text"], usage)
+
+        async def chunks():
+            for chunk in entry.get("chunks") or [entry["text"]]:
+                yield chunk
+
+        return StreamingModelResponse(chunks(), on_done=lambda _: usage)
+
+    async def _record(self, key: str, prompt: str, stream: bool) -> Any:
+        response = await self.inner.generate_content_async(prompt, stream=stream)
+        if not stream:
+            self._store(key, prompt, response.text, None, response.usage_metadata)
+            return response
+
+        async def chunks():
+            async for chunk in response:
+                yield chunk.text
+
+        def on_done(received: List[str]) -> UsageMetadata:
+            usage = self._usage_of(response.usage_metadata)
+            self._store(key, prompt, "".join(received), received, usage)
+            return usage
+
+        return StreamingModelResponse(chunks(), on_done=on_done)
+
+    def _usage_of(self, usage_metadata: Any) -> UsageMetadata:
+        return UsageMetadata(
+            int(getattr(usage_metadata, "prompt_token_count", 0) or 0),
+            int(getattr(usage_metadata, "candidates_token_count", 0) or 0),
+        )
+
+    def _store(self, key: str, prompt: str, text: str, chunks: Optional[List[str]], usage_metadata: Any):
+        entry = {
+            "prompt_preview": prompt[:120],
+            "text": text,
+            "usage": self._usage_of(usage_metadata).to_dict(),
+        }
+        if chunks is not None:
+            entry["chunks"] = chunks
+        with self._lock:
+            self.entries[key] = entry
+            self.save()
+
+    def save(self):
+        """Write the cassette to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(self.entries, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+def create_backend(model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> ModelBackend:
+    """Create the backend selected by STAN_MODEL_BACKEND.
+
+    Args:
+        model_name: Model the agent wants
+        generation_config: Gemini generation config
+
+    Returns:
+        Model backend
+    """
+    kind = os.getenv("STAN_MODEL_BACKEND", "gemini").lower()
+    json_mode = bool(generation_config and generation_config.get("response_mime_type") == "application/json")
+
+    if kind == "gemini":
+        return GeminiBackend(model_name, generation_config)
+
+    if kind == "fake":
+        return FakeBackend(
+            model_name=model_name,
+            latency_ms=float(os.getenv("STAN_FAKE_LATENCY_MS", "800")),
+            failure_rate=float(os.getenv("STAN_FAKE_FAILURE_RATE", "0")),
+            seed=int(os.getenv("STAN_FAKE_SEED", "0")),
+            json_mode=json_mode
+        )
+
+    cassette_path = os.getenv("STAN_CASSETTE_PATH", DEFAULT_CASSETTE_PATH)
+    if kind == "replay":
+        return CassetteBackend(cassette_path, mode="replay", model_name=model_name)
+    if kind == "record":
+        return CassetteBackend(cassette_path, inner=GeminiBackend(model_name, generation_config), mode="auto")
+
+    raise ValueError(f"Unknown STAN_MODEL_BACKEND: {kind}")
@@ -0,0 +1,102 @@
+"""Process-wide registry of shared model backends.
+
+Agents that use the same model and generation config share one backend
+(and so one client and connection pool) instead of each building its own.
+``warm_up()`` runs at startup and opens every registered backend's
+channel, so the first user request after a deploy does not pay for the
+connection handshake.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from agents.model_backends import ModelBackend, create_backend
+
+logger = structlog.get_logger()
+
+
+class ModelRegistry:
+    """Shares backends keyed by (backend kind, model_name, generation_config)."""
+
+    def __init__(self):
+        self._backends: Dict[Tuple[str, str, str], ModelBackend] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _key(self, model_name: str, generation_config: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+        kind = os.getenv("STAN_MODEL_BACKEND", "gemini").lower()
+        config = json.dumps(generation_config or {}, sort_keys=True)
+        return kind, model_name, config
+
+    def get(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> ModelBackend:
+        """Get the shared backend for a model and config, creating it once.
+
+        Args:
+            model_name: Model name
+            generation_config: Gemini generation config
+
+        Returns:
+            Shared model backend
+        """
+        key = self._key(model_name, generation_config)
+        with self._lock:
+            backend = self._backends.get(key)
+            if backend is not None:
+                self.stats["hits"] += 1
+                return backend
+
+            backend = create_backend(model_name, generation_config)
+            self._backends[key] = backend
+            self.stats["misses"] += 1
+            return backend
+
+    async def warm_up(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Open connections for every registered backend.
+
+        Failures are logged and never block startup.
+
+        Args:
+            timeout: Seconds to wait for each backend
+
+        Returns:
+            Dict with warmed/failed counts and the total duration
+        """
+        start = time.perf_counter()
+        with self._lock:
+            entries = list(self._backends.items())
+
+        async def warm(key, backend):
+            try:
+                await asyncio.wait_for(backend.warm_up(), timeout=timeout)
+                return True
+            except Exception as e:
+                logger.warning("model_warm_up_failed", model=key[1], backend=key[0], error=str(e))
+                return False
+
+        results = await asyncio.gather(*[warm(key, backend) for key, backend in entries])
+        summary = {
+            "warmed": sum(results),
+            "failed": len(results) - sum(results),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        logger.info("model_warm_up_completed", **summary)
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Shared backend count and reuse for metrics endpoints."""
+        return {"backends": len(self._backends), **self.stats}
+
+    def clear(self):
+        """Drop all shared backends (tests)."""
+        with self._lock:
+            self._backends.clear()
+
+
+# Global registry shared by all agents in the process
+model_registry = ModelRegistry()
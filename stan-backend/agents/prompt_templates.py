@@ -0,0 +1,136 @@
+"""Compiled prompt templates.
+
+Templates use ``{name}`` placeholders. Each template is compiled once into
+a substitution plan (literal segments interleaved with field names) and
+cached by the hash of its text, so built-in prompts and user
+``custom_prompt``s from ``stan_prompts`` render in a single join instead
+of rebuilding f-strings or chaining ``.replace()`` calls.
+
+Built-in templates are registered with a version. ``version_tag`` (for
+example ``efficient_briefing@2``) is recorded in briefing metadata so
+cached briefings and benchmark results can be tied to the prompt that
+produced them.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Only identifier-like fields are placeholders; JSON braces pass through
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+MAX_CACHED_TEMPLATES = 1024
+
+
+class CompiledTemplate:
+    """A template compiled into literal segments and field names."""
+
+    def __init__(self, text: str, name: Optional[str] = None, version: Optional[int] = None):
+        self.text = text
+        self.hash = template_hash(text)
+        self.name = name
+        self.version = version
+
+        # literals[i] precedes fields[i]; the last literal has no field
+        self._literals: List[str] = []
+        self._fields: List[str] = []
+
+        position = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            self._literals.append(text[position:match.start()])
+            self._fields.append(match.group(1))
+            position = match.end()
+        self._literals.append(text[position:])
+
+    @property
+    def fields(self) -> List[str]:
+        """Placeholder names in order of appearance."""
+        return list(self._fields)
+
+    @property
+    def version_tag(self) -> str:
+        """Stable identifier for cache keys, metadata and benchmarks."""
+        if self.name:
+            return f"{self.name}@{self.version}"
+        return f"custom@{self.hash}"
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Render the template in one pass.
+
+        Args:
+            values: Field name -> replacement text
+
+        Returns:
+            Rendered prompt. Fields missing from ``values`` are left
+            as ``{name}`` so unknown placeholders in user prompts survive.
+        """
+        parts = []
+        for literal, field in zip(self._literals, self._fields):
+            parts.append(literal)
+            value = values.get(field)
+            parts.append("{" + field + "}" if value is None else str(value))
+        parts.append(self._literals[-1])
+        return "".join(parts)
+
+
+def template_hash(text: str) -> str:
+    """Short content hash used as the compile cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+_cache: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+_registry: Dict[str, CompiledTemplate] = {}
+_lock = threading.Lock()
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    """Compile a template, reusing the cached plan for identical text.
+
+    Args:
+        text: Template text, e.g. a user's custom prompt
+
+    Returns:
+        Compiled template
+    """
+    key = template_hash(text)
+    with _lock:
+        compiled = _cache.get(key)
+        if compiled is not None and compiled.text == text:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledTemplate(text)
+    with _lock:
+        _cache[key] = compiled
+        while len(_cache) > MAX_CACHED_TEMPLATES:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def register_template(name: str, version: int, text: str) -> CompiledTemplate:
+    """Register a versioned built-in template.
+
+    Args:
+        name: Template name
+        version: Version number; bump it whenever the text changes meaningfully
+        text: Template text
+
+    Returns:
+        Compiled template
+    """
+    compiled = CompiledTemplate(text, name=name, version=version)
+    with _lock:
+        _registry[name] = compiled
+    return compiled
+
+
+def get_template(name: str) -> CompiledTemplate:
+    """Get a registered built-in template by name."""
+    return _registry[name]
+
+
+def cache_info() -> Dict[str, int]:
+    """Compile cache statistics."""
+    return {"cached_templates": len(_cache), "registered_templates": len(_registry)}
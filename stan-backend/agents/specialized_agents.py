@@ -1,21 +1,62 @@
 """Specialized ADK agents for different stan categories."""
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import google.adk as genai_adk
+from agents.agent_memo import memoized
 from agents.base_agent import STANBaseAgent
+from agents.briefing_parser import extract_sources
+from agents.stage_graph import StageGraph, StageTimeout
+from agents.usage import track_usage
 from agents.multimodal_agent import MultimodalAgent, VoiceAgent
 import asyncio
 import json
+import os
 from datetime import datetime
 
+# The orchestrator keeps ~300 characters of each specialist answer
+# (see _extract_content), so there is no point paying for 2048 tokens
+SPECIALIST_MAX_OUTPUT_TOKENS = 512
+
+# Per-agent and whole-briefing deadlines for the orchestrated path; agents
+# that miss them are left out of the briefing
+AGENT_TIMEOUT_SECONDS = float(os.getenv("ORCHESTRATOR_AGENT_TIMEOUT_MS", "8000")) / 1000
+BRIEFING_DEADLINE_SECONDS = float(os.getenv("ORCHESTRATOR_DEADLINE_MS", "12000")) / 1000
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv("ORCHESTRATOR_SUMMARY_TIMEOUT_MS", "4000")) / 1000
+# Late agents keep running so their answers still land in the agent cache
+FINISH_LATE_AGENTS = os.getenv("ORCHESTRATOR_FINISH_LATE_AGENTS", "true").lower() == "true"
+
+# How long one search result is shared by every follower of a stan;
+# schedules change slowly, trending topics quickly
+AGENT_MEMO_TTLS = {
+    "news": 1800,
+    "social": 900,
+    "video": 3600,
+    "community": 1800,
+    "events": 6 * 3600,
+    "sentiment": 1800,
+    "trending": 600,
+}
+
+# Custom setting that switches each search agent on or off; these are the
+# only settings the orchestrator reads
+AGENT_SETTINGS = {
+    "news": "include_news",
+    "social": "include_social_media",
+    "video": "include_videos",
+    "fan": "include_fan_reactions",
+    "events": "include_upcoming_events",
+    "trending": "include_trending",
+}
+
 
 class NewsAgent(STANBaseAgent):
     """Agent specialized in gathering news and current events."""
     
     def __init__(self):
-        super().__init__(name="NewsAgent", category="News")
+        super().__init__(name="NewsAgent", category="News", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a news specialist focusing on current events and breaking news. Always provide accurate, timely information with verified sources."
     
+    @memoized(AGENT_MEMO_TTLS["news"])
     async def search_news(self, query: str) -> Dict[str, Any]:
         """Search for latest news about the topic."""
         prompt = f"Find the latest news about {query} from today or this week. Include specific dates, events, and credible source URLs."
@@ -27,9 +68,10 @@ class SocialMediaAgent(STANBaseAgent):
     """Agent specialized in social media content aggregation."""
     
     def __init__(self):
-        super().__init__(name="SocialMediaAgent", category="Social Media")
+        super().__init__(name="SocialMediaAgent", category="Social Media", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a social media specialist tracking Twitter/X, Instagram, TikTok, and other platforms. Focus on viral content, trends, and fan engagement."
     
+    @memoized(AGENT_MEMO_TTLS["social"])
     async def search_social(self, query: str) -> Dict[str, Any]:
         """Search for social media activity."""
         prompt = f"Find recent social media posts, viral content, and fan reactions about {query}. Include platform names and engagement metrics if available."
@@ -41,9 +83,10 @@ class VideoContentAgent(STANBaseAgent):
     """Agent specialized in video content from YouTube, TikTok, etc."""
     
     def __init__(self):
-        super().__init__(name="VideoAgent", category="Video")
+        super().__init__(name="VideoAgent", category="Video", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a video content specialist tracking YouTube, TikTok, and streaming platforms. Focus on new releases, popular clips, and video trends."
     
+    @memoized(AGENT_MEMO_TTLS["video"])
     async def search_videos(self, query: str) -> Dict[str, Any]:
         """Search for video content."""
         prompt = f"Find recent YouTube videos, TikToks, or streaming content about {query}. Include video titles, view counts, and direct links."
@@ -55,9 +98,10 @@ class FanCommunityAgent(STANBaseAgent):
     """Agent specialized in fan community discussions and reactions."""
     
     def __init__(self):
-        super().__init__(name="FanAgent", category="Community")
+        super().__init__(name="FanAgent", category="Community", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a fan community specialist tracking Reddit, Discord, fan forums, and community reactions. Focus on fan theories, discussions, and community events."
     
+    @memoized(AGENT_MEMO_TTLS["community"])
     async def search_community(self, query: str) -> Dict[str, Any]:
         """Search fan community discussions."""
         prompt = f"Find recent fan discussions, theories, and community reactions about {query} from Reddit, forums, or fan sites."
@@ -69,9 +113,10 @@ class UpcomingEventsAgent(STANBaseAgent):
     """Agent specialized in upcoming events and schedules."""
     
     def __init__(self):
-        super().__init__(name="EventsAgent", category="Events")
+        super().__init__(name="EventsAgent", category="Events", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are an events specialist tracking upcoming schedules, releases, tours, and important dates. Focus on confirmed events with specific dates and locations."
     
+    @memoized(AGENT_MEMO_TTLS["events"])
     async def search_events(self, query: str) -> Dict[str, Any]:
         """Search for upcoming events."""
         prompt = f"Find upcoming events, schedules, releases, or important dates for {query}. Include specific dates, locations, and ticket/access information if available."
@@ -83,9 +128,10 @@ class SentimentAnalysisAgent(STANBaseAgent):
     """Agent for analyzing sentiment and fan reactions."""
 
     def __init__(self):
-        super().__init__(name="SentimentAgent", category="Sentiment")
+        super().__init__(name="SentimentAgent", category="Sentiment", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a sentiment analysis specialist. Analyze the emotional tone and fan reactions to news and events."
 
+    @memoized(AGENT_MEMO_TTLS["sentiment"])
     async def analyze_sentiment(self, content: str, stan_name: str) -> Dict[str, Any]:
         """Analyze sentiment of content about a stan."""
         prompt = f"""Analyze the overall sentiment and fan reactions to this content about {stan_name}:
@@ -106,9 +152,10 @@ class TrendingAgent(STANBaseAgent):
     """Agent for identifying trending topics and viral content."""
 
     def __init__(self):
-        super().__init__(name="TrendingAgent", category="Trending")
+        super().__init__(name="TrendingAgent", category="Trending", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a trend specialist tracking viral content, hashtags, and trending topics."
 
+    @memoized(AGENT_MEMO_TTLS["trending"])
     async def find_trending(self, query: str) -> Dict[str, Any]:
         """Find trending topics and viral content."""
         prompt = f"""What's currently trending about {query}? Find:
@@ -126,7 +173,7 @@ class RecommendationAgent(STANBaseAgent):
     """Agent for personalized recommendations."""
 
     def __init__(self):
-        super().__init__(name="RecommendationAgent", category="Recommendations")
+        super().__init__(name="RecommendationAgent", category="Recommendations", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
         self.system_prompt = "You are a recommendation specialist suggesting related content, artists, and topics."
 
     async def get_recommendations(self, stan_name: str, user_history: List[str] = None) -> Dict[str, Any]:
@@ -149,6 +196,9 @@ Provide 3-4 specific recommendations with brief reasons."""
 class BriefingOrchestrator:
     """Main orchestrator using ADK's multi-agent capabilities with enhanced features."""
 
+    # Briefings generated with equal values for these settings are identical
+    setting_keys = tuple(AGENT_SETTINGS.values())
+
     def __init__(self):
         self.news_agent = NewsAgent()
         self.social_agent = SocialMediaAgent()
@@ -160,6 +210,7 @@ class BriefingOrchestrator:
         self.sentiment_agent = SentimentAnalysisAgent()
         self.trending_agent = TrendingAgent()
         self.recommendation_agent = RecommendationAgent()
+        self.summary_agent = STANBaseAgent(name="SummaryAgent", max_output_tokens=SPECIALIST_MAX_OUTPUT_TOKENS)
 
         # Create ADK workflow agent for orchestration
         self.orchestrator = self._create_orchestrator()
@@ -177,121 +228,117 @@ class BriefingOrchestrator:
         include_recommendations: bool = True
     ) -> Dict[str, Any]:
         """Generate comprehensive briefing using all specialized agents with AI personalization."""
+        # Token usage of every agent call below is attributed to this briefing
+        with track_usage() as usage:
+            briefing = await self._generate_with_agents(
+                stan_data,
+                custom_settings,
+                user_history,
+                include_recommendations
+            )
 
-        stan_name = stan_data.get("name", "")
-        tasks = []
-        task_names = []
-
-        # Determine which agents to use based on custom settings
-        if not custom_settings or custom_settings.get("include_news", True):
-            tasks.append(self.news_agent.search_news(stan_name))
-            task_names.append("news")
-
-        if not custom_settings or custom_settings.get("include_social_media", True):
-            tasks.append(self.social_agent.search_social(stan_name))
-            task_names.append("social")
-
-        if not custom_settings or custom_settings.get("include_videos", True):
-            tasks.append(self.video_agent.search_videos(stan_name))
-            task_names.append("video")
-
-        if not custom_settings or custom_settings.get("include_fan_reactions", True):
-            tasks.append(self.fan_agent.search_community(stan_name))
-            task_names.append("fan")
-
-        if not custom_settings or custom_settings.get("include_upcoming_events", True):
-            tasks.append(self.events_agent.search_events(stan_name))
-            task_names.append("events")
-
-        # Add trending analysis
-        if not custom_settings or custom_settings.get("include_trending", True):
-            tasks.append(self.trending_agent.find_trending(stan_name))
-            task_names.append("trending")
-
-        # Run all agents in parallel using asyncio
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Combine results into structured briefing
-        topics = []
-        all_sources = []
-        all_content_for_sentiment = []
-
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                print(f"Agent error: {result}")
-                continue
-
-            if isinstance(result, dict):
-                category = result.get("category", "general")
-                content_key = list(result.keys())[0]
-                content = result.get(content_key, "")
-
-                # Create topic from agent result
-                topic = {
-                    "title": self._get_topic_title(category),
-                    "content": self._extract_content(content),
-                    "sources": self._extract_sources(content),
-                    "category": category,
-                    "priority": self._calculate_priority(category, content)
-                }
-                topics.append(topic)
-                all_sources.extend(topic["sources"])
-                all_content_for_sentiment.append(content)
+        briefing["metadata"]["usage"] = usage.as_dict()
+        return briefing
 
-        # Sort topics by priority (trending and news first)
-        topics.sort(key=lambda x: x.get("priority", 0), reverse=True)
+    async def _generate_with_agents(
+        self,
+        stan_data: Dict[str, Any],
+        custom_settings: Optional[Dict],
+        user_history: Optional[List[str]],
+        include_recommendations: bool
+    ) -> Dict[str, Any]:
+        """Run the specialized agents and assemble their results."""
 
-        # Add sentiment analysis
-        try:
-            combined_content = " ".join(all_content_for_sentiment[:3])  # Analyze top 3
-            sentiment_result = await self.sentiment_agent.analyze_sentiment(
-                combined_content,
-                stan_name
-            )
-            topics.append({
+        stan_name = stan_data.get("name", "")
+        graph = StageGraph(finish_late_in_background=FINISH_LATE_AGENTS)
+
+        # Search agents have no inputs and all start immediately
+        search_agents = [
+            ("news", self.news_agent.search_news),
+            ("social", self.social_agent.search_social),
+            ("video", self.video_agent.search_videos),
+            ("fan", self.fan_agent.search_community),
+            ("events", self.events_agent.search_events),
+            ("trending", self.trending_agent.find_trending),
+        ]
+        task_names = []
+        for name, search in search_agents:
+            # Determine which agents to use based on custom settings
+            if not custom_settings or custom_settings.get(AGENT_SETTINGS[name], True):
+                graph.add(name, lambda _, search=search: search(stan_name), timeout=AGENT_TIMEOUT_SECONDS)
+                task_names.append(name)
+
+        # Sentiment only reads the first three agent results, so it starts
+        # as soon as those are in rather than after the slowest agent
+        async def sentiment(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            contents = [self._agent_content(result) for result in inputs.values()]
+            combined_content = " ".join(c for c in contents if c is not None)
+            sentiment_result = await self.sentiment_agent.analyze_sentiment(combined_content, stan_name)
+            return {
                 "title": "💭 Fan Sentiment",
                 "content": self._extract_content(sentiment_result["sentiment"]),
                 "sources": [],
                 "category": "sentiment",
                 "priority": 4
-            })
-        except Exception as e:
-            print(f"Sentiment analysis error: {e}")
+            }
 
-        # Add personalized recommendations
+        graph.add("sentiment", sentiment, deps=task_names[:3], timeout=AGENT_TIMEOUT_SECONDS)
+
+        # Recommendations need nothing from the other agents
         if include_recommendations:
-            try:
-                rec_result = await self.recommendation_agent.get_recommendations(
-                    stan_name,
-                    user_history
-                )
-                topics.append({
+            async def recommendations(_: Dict[str, Any]) -> Dict[str, Any]:
+                rec_result = await self.recommendation_agent.get_recommendations(stan_name, user_history)
+                return {
                     "title": "✨ You Might Also Like",
                     "content": self._extract_content(rec_result["recommendations"]),
                     "sources": [],
                     "category": "recommendations",
                     "priority": 1
-                })
-            except Exception as e:
-                print(f"Recommendation error: {e}")
+                }
+
+            graph.add("recommendations", recommendations, timeout=AGENT_TIMEOUT_SECONDS)
+
+        # The summary reads every topic, so it is the final stage; it runs
+        # past the deadline with whatever finished in time
+        async def summary(inputs: Dict[str, Any]) -> Tuple[List[Dict], str]:
+            topics = self._assemble_topics([inputs[name] for name in task_names])
+            for extra, label in (("sentiment", "Sentiment analysis"), ("recommendations", "Recommendation")):
+                result = inputs.get(extra)
+                if isinstance(result, StageTimeout):
+                    print(f"{label} skipped: {result}")
+                elif isinstance(result, Exception):
+                    print(f"{label} error: {result}")
+                elif result:
+                    topics.append(result)
+            return topics, await self._generate_smart_summary(stan_name, topics)
+
+        graph.add("summary", summary, deps=graph.stage_names, required=True)
+
+        results = await graph.run(deadline=BRIEFING_DEADLINE_SECONDS)
+        if isinstance(results["summary"], Exception):
+            raise results["summary"]
+        topics, summary_text = results["summary"]
+        all_sources = [source for topic in topics for source in topic["sources"]]
 
         # Generate AI summary from all content
         all_content = " ".join([t["content"] for t in topics])
-        summary = await self._generate_smart_summary(stan_name, topics)
 
         # Add metadata
         metadata = {
             "generated_at": datetime.now().isoformat(),
-            "agent_count": len(tasks),
+            "agent_count": len(task_names),
             "topic_count": len(topics),
             "source_count": len(set(all_sources)),
             "model": "gemini-2.0-flash-exp",
-            "features": ["multi-agent", "sentiment", "recommendations", "trending"]
+            "features": ["multi-agent", "sentiment", "recommendations", "trending"],
+            "stage_timings": graph.get_stats(),
+            "skipped_for_time": graph.skipped_for_time,
+            "partial": bool(graph.skipped_for_time),
         }
 
         return {
             "content": all_content,
-            "summary": summary,
+            "summary": summary_text,
             "sources": list(set(all_sources)),  # Remove duplicates
             "topics": topics,
             "searchSources": list(set(all_sources)),
@@ -299,6 +346,41 @@ class BriefingOrchestrator:
             "metadata": metadata
         }
 
+    def _agent_content(self, result: Any) -> Optional[str]:
+        """Raw text of a search agent result, or None if the agent failed."""
+        if isinstance(result, dict):
+            content_key = list(result.keys())[0]
+            return result.get(content_key, "")
+        return None
+
+    def _assemble_topics(self, results: List[Any]) -> List[Dict]:
+        """Turn search agent results into topics, highest priority first."""
+        topics = []
+        for result in results:
+            if isinstance(result, StageTimeout):
+                print(f"Agent skipped: {result}")
+                continue
+            if isinstance(result, Exception):
+                print(f"Agent error: {result}")
+                continue
+            content = self._agent_content(result)
+            if content is None:
+                continue
+
+            # Create topic from agent result
+            category = result.get("category", "general")
+            topics.append({
+                "title": self._get_topic_title(category),
+                "content": self._extract_content(content),
+                "sources": self._extract_sources(content),
+                "category": category,
+                "priority": self._calculate_priority(category, content)
+            })
+
+        # Sort topics by priority (trending and news first)
+        topics.sort(key=lambda x: x.get("priority", 0), reverse=True)
+        return topics
+
     def _calculate_priority(self, category: str, content: str) -> int:
         """Calculate priority score for topics."""
         priority_map = {
@@ -336,8 +418,10 @@ class BriefingOrchestrator:
 
 Make it concise, exciting, and include 1-2 relevant emojis. Start with the most important update."""
 
-            summary_agent = STANBaseAgent(name="SummaryAgent")
-            summary = await summary_agent.generate_content(prompt)
+            summary = await asyncio.wait_for(
+                self.summary_agent.generate_content(prompt),
+                timeout=SUMMARY_TIMEOUT_SECONDS
+            )
             return summary.strip()
 
         except Exception as e:
@@ -365,8 +449,4 @@ Make it concise, exciting, and include 1-2 relevant emojis. Start with the most
     
     def _extract_sources(self, text: str) -> List[str]:
         """Extract URLs from text content."""
-        import re
-        # Simple URL extraction
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        urls = re.findall(url_pattern, text)
-        return urls[:3] if urls else []  # Limit to 3 sources per topic
\ No newline at end of file
+        return extract_sources(text)[:3]  # Limit to 3 sources per topic
\ No newline at end of file
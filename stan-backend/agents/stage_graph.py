@@ -0,0 +1,195 @@
+"""Dependency-graph scheduler for multi-stage briefing generation.
+
+Each stage declares the stages whose results it needs and starts as soon
+as those have finished, instead of waiting for a whole batch of unrelated
+work. A failing stage does not stop the graph: its exception is handed to
+dependents as its result, the same way ``asyncio.gather(...,
+return_exceptions=True)`` reports failures.
+
+Stages can have their own timeout, and a run can have an overall
+deadline. A stage that misses either resolves to ``StageTimeout`` so the
+rest of the graph carries on with partial results; the late work is
+cancelled, or left to finish in the background when its result is still
+worth having (for example to fill a cache).
+
+Every run records per-stage start/end times and the critical path, the
+chain of stages that determined the total latency.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Late stages left running; referenced so they are not garbage collected
+_background_stages: Set[asyncio.Task] = set()
+
+
+class StageTimeout(Exception):
+    """A stage did not finish within its timeout or the run's deadline."""
+
+    def __init__(self, stage: str, budget_ms: float):
+        super().__init__(f"Stage '{stage}' missed its {budget_ms:.0f}ms deadline")
+        self.stage = stage
+        self.budget_ms = budget_ms
+
+
+class StageGraph:
+    """A small DAG of async stages executed as soon as inputs are ready."""
+
+    def __init__(self, finish_late_in_background: bool = False):
+        """Initialize an empty graph.
+
+        Args:
+            finish_late_in_background: Let stages that miss their deadline
+                keep running detached instead of cancelling them
+        """
+        self.finish_late_in_background = finish_late_in_background
+        self._stages: Dict[str, Tuple[StageFn, Tuple[str, ...], Optional[float], bool]] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.skipped_for_time: List[str] = []
+
+    def add(
+        self,
+        name: str,
+        fn: StageFn,
+        deps: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        required: bool = False
+    ) -> "StageGraph":
+        """Add a stage.
+
+        Dependencies must be added first, which also keeps the graph acyclic.
+
+        Args:
+            name: Unique stage name
+            fn: Coroutine function receiving ``{dep name: result or exception}``
+            deps: Names of the stages this one needs
+            timeout: Seconds the stage may run once started
+            required: Exempt from the run's overall deadline (the stage that
+                assembles the partial results)
+
+        Returns:
+            The graph, for chaining
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        unknown = [dep for dep in deps if dep not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(unknown)}")
+        self._stages[name] = (fn, tuple(deps), timeout, required)
+        return self
+
+    @property
+    def stage_names(self) -> List[str]:
+        """Names of the stages added so far, in insertion order."""
+        return list(self._stages)
+
+    async def run(self, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Run every stage.
+
+        Args:
+            deadline: Seconds from now by which every stage that is not
+                ``required`` must have finished
+
+        Returns:
+            Stage name -> result, or the exception the stage raised
+            (``StageTimeout`` for stages that ran out of time)
+        """
+        self.timings = {}
+        self.skipped_for_time = []
+        started = time.perf_counter()
+        deadline_at = started + deadline if deadline is not None else None
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str, fn: StageFn, deps: Tuple[str, ...], timeout: Optional[float], required: bool) -> Any:
+            inputs = {dep: await tasks[dep] for dep in deps}
+            stage_start = time.perf_counter()
+            budget = timeout
+            if deadline_at is not None and not required:
+                remaining = max(deadline_at - stage_start, 0.0)
+                budget = remaining if budget is None else min(budget, remaining)
+
+            work = asyncio.ensure_future(fn(inputs))
+            try:
+                done, _ = await asyncio.wait({work}, timeout=budget)
+            except BaseException:
+                work.cancel()
+                raise
+
+            timed_out = not done
+            if timed_out:
+                result = StageTimeout(name, budget * 1000)
+                self.skipped_for_time.append(name)
+                self._abandon(name, work)
+                logger.warning("stage_skipped_for_time", stage=name, budget_ms=round(budget * 1000))
+            else:
+                try:
+                    result = work.result()
+                except Exception as e:
+                    logger.warning("stage_failed", stage=name, error=str(e))
+                    result = e
+
+            stage_end = time.perf_counter()
+            self.timings[name] = {
+                "start_ms": round((stage_start - started) * 1000, 1),
+                "end_ms": round((stage_end - started) * 1000, 1),
+                "duration_ms": round((stage_end - stage_start) * 1000, 1),
+            }
+            if timed_out:
+                self.timings[name]["timed_out"] = True
+            return result
+
+        for name, (fn, deps, timeout, required) in self._stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, fn, deps, timeout, required))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return dict(zip(tasks, results))
+
+    def _abandon(self, name: str, work: asyncio.Future):
+        """Cancel a late stage, or let it finish detached."""
+        if not self.finish_late_in_background:
+            work.cancel()
+            return
+
+        def finished(task: asyncio.Future):
+            _background_stages.discard(task)
+            error = None if task.cancelled() else task.exception()
+            logger.info("late_stage_finished", stage=name, error=str(error) if error else None)
+
+        _background_stages.add(work)
+        work.add_done_callback(finished)
+
+    def critical_path(self) -> List[str]:
+        """Stages on the longest chain of the last run, first to last.
+
+        Starting from the stage that finished last, follow the dependency
+        that finished last (the one the stage was actually waiting for).
+        """
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda stage: self.timings[stage]["end_ms"])
+        path = [name]
+        while self._stages[name][1]:
+            name = max(self._stages[name][1], key=lambda dep: self.timings[dep]["end_ms"])
+            path.append(name)
+        return list(reversed(path))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Timings of the last run, for briefing metadata."""
+        path = self.critical_path()
+        return {
+            "stages": self.timings,
+            "critical_path": path,
+            "critical_path_ms": self.timings[path[-1]]["end_ms"] if path else 0.0,
+            "skipped_for_time": self.skipped_for_time,
+        }
@@ -0,0 +1,221 @@
+"""Canonical stan names.
+
+Users type the same stan many ways: "bts", "BTS ", "Bangtan Boys",
+"Ｂｌａｃｋｐｉｎｋ". Every spelling that misses the shared popular cache
+turns into its own custom generation, so names are mapped to their
+canonical popular stan before any cache lookup.
+
+Matching runs from cheap to loose: normalized exact match (NFKC,
+casefold, punctuation and whitespace collapsed) against the canonical
+names and the alias table, the same with spaces removed, then trigram
+similarity for typos. A fuzzy match must have as many words as the name
+it matches, so "LeBron James Jr" stays its own stan instead of becoming
+a typo of "LeBron James". Names that match nothing are custom stans and
+only get their whitespace tidied.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# Canonical popular stan -> other names users search for. Bare first
+# names ("Taylor", "LeBron") and shared single names ("Ronaldo") are left
+# out: they also name other people.
+STAN_ALIASES: Dict[str, List[str]] = {
+    "BTS": ["Bangtan Boys", "Bangtan Sonyeondan", "방탄소년단"],
+    "BlackPink": ["블랙핑크"],
+    "Stray Kids": ["SKZ", "스트레이 키즈"],
+    "TWICE": ["트와이스"],
+    "Seventeen": ["SVT", "세븐틴"],
+    "NewJeans": ["뉴진스"],
+    "Attack on Titan": ["AOT", "Shingeki no Kyojin", "SNK"],
+    "Demon Slayer": ["Kimetsu no Yaiba"],
+    "Jujutsu Kaisen": ["JJK"],
+    "Lionel Messi": ["Messi", "Leo Messi"],
+    "Cristiano Ronaldo": ["CR7"],
+    "LeBron James": ["King James"],
+    "Marvel": ["MCU", "Marvel Cinematic Universe"],
+    "League of Legends": ["LoL"],
+    "Taylor Swift": ["T Swift"],
+    "The Weeknd": ["Weeknd", "Abel Tesfaye"],
+}
+
+# Minimum trigram similarity (Jaccard) for a fuzzy match
+FUZZY_THRESHOLD = 0.7
+# Shorter names are too ambiguous to fuzzy-match
+FUZZY_MIN_LENGTH = 4
+
+_PUNCTUATION_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_stan_name(name: str) -> str:
+    """Normalize a stan name for matching.
+
+    Args:
+        name: Name as typed by the user
+
+    Returns:
+        NFKC-normalized, casefolded name with punctuation and runs of
+        whitespace collapsed to single spaces
+    """
+    text = unicodedata.normalize("NFKC", name).casefold()
+    return " ".join(_PUNCTUATION_RE.sub(" ", text).split())
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StanCanonicalizer:
+    """In-memory alias index that maps incoming names to canonical stans."""
+
+    def __init__(
+        self,
+        canonical_names: Iterable[str],
+        aliases: Optional[Dict[str, List[str]]] = None,
+        fuzzy_threshold: float = FUZZY_THRESHOLD
+    ):
+        """Build the index.
+
+        Args:
+            canonical_names: Canonical stan names (the popular list)
+            aliases: Canonical name -> alternative names
+            fuzzy_threshold: Minimum trigram similarity for a fuzzy match
+        """
+        self.fuzzy_threshold = fuzzy_threshold
+        self._exact: Dict[str, str] = {}
+        self._compact: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._matches: Dict[str, int] = defaultdict(int)
+        self._redirected = 0
+        self._avoided = 0
+
+        canonical_names = list(canonical_names)
+        for name in canonical_names:
+            self._add(name, name)
+        for name, alternatives in (aliases or {}).items():
+            if name not in canonical_names:
+                continue
+            for alias in alternatives:
+                self._add(alias, name)
+
+    def _add(self, spelling: str, canonical: str):
+        normalized = normalize_stan_name(spelling)
+        self._exact.setdefault(normalized, canonical)
+        self._compact.setdefault(normalized.replace(" ", ""), canonical)
+        grams = _trigrams(normalized)
+        self._grams[normalized] = grams
+        for gram in grams:
+            self._index[gram].add(normalized)
+
+    def match(self, name: str) -> Tuple[Optional[str], str]:
+        """Find the canonical stan for a name without recording stats.
+
+        Args:
+            name: Name as typed by the user
+
+        Returns:
+            (canonical name or None, how it matched: exact, normalized,
+            alias, compact, fuzzy or miss)
+        """
+        normalized = normalize_stan_name(name)
+        canonical = self._exact.get(normalized)
+        if canonical:
+            if name == canonical:
+                return canonical, "exact"
+            if normalized == normalize_stan_name(canonical):
+                return canonical, "normalized"
+            return canonical, "alias"
+
+        canonical = self._compact.get(normalized.replace(" ", ""))
+        if canonical:
+            return canonical, "compact"
+
+        canonical = self._fuzzy(normalized)
+        if canonical:
+            return canonical, "fuzzy"
+        return None, "miss"
+
+    def _fuzzy(self, normalized: str) -> Optional[str]:
+        if len(normalized) < FUZZY_MIN_LENGTH:
+            return None
+
+        grams = _trigrams(normalized)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._index.get(gram, ()):
+                shared[candidate] += 1
+
+        words = normalized.count(" ")
+        best, best_score = None, 0.0
+        for candidate, count in shared.items():
+            # Extra words on either side make it a different name, not a typo
+            if candidate.count(" ") != words:
+                continue
+            score = count / (len(grams) + len(self._grams[candidate]) - count)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.fuzzy_threshold:
+            return None
+        return self._exact[best]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Canonical popular stan for a name, or None for custom stans."""
+        return self.match(name)[0]
+
+    def canonicalize(self, name: str) -> str:
+        """Map an incoming name to the name used for cache keys.
+
+        Args:
+            name: Name as typed by the user
+
+        Returns:
+            The canonical popular stan, or the name with whitespace tidied
+            when it is a custom stan
+        """
+        canonical, kind = self.match(name)
+        with self._lock:
+            self._matches[kind] += 1
+            # Spellings that would otherwise have been looked up as custom stans
+            if kind not in ("exact", "miss"):
+                self._redirected += 1
+
+        if canonical is None:
+            return " ".join(name.split())
+        if kind != "exact":
+            logger.info("stan_name_canonicalized",
+                       requested=name,
+                       canonical=canonical,
+                       match=kind)
+        return canonical
+
+    def record_avoided_generation(self):
+        """Count a redirected lookup that was served an existing briefing.
+
+        Callers report this once the redirect actually led to a cache hit or
+        a shared generation; a redirect that still generated saved nothing.
+        """
+        with self._lock:
+            self._avoided += 1
+
+    def get_stats(self) -> Dict[str, object]:
+        """Match counts by kind, redirects to popular stans and the generations they saved."""
+        with self._lock:
+            lookups = sum(self._matches.values())
+            hits = lookups - self._matches.get("miss", 0)
+            return {
+                "lookups": lookups,
+                "matches": dict(self._matches),
+                "popular_hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "redirected_to_popular": self._redirected,
+                "llm_calls_avoided": self._avoided,
+                "indexed_names": len(self._exact),
+            }
@@ -0,0 +1,185 @@
+"""Token usage and cost accounting for model calls.
+
+Every model call records prompt/output/total tokens from the response's
+``usage_metadata`` plus its wall time. Calls are attributed to the
+innermost ``track_usage()`` scope and bubble up to enclosing scopes, so an
+orchestrated briefing that fans out to several agents (including through
+``asyncio.gather``) is accounted as one unit.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICING_PER_1M = {
+    "gemini-pro": (0.50, 1.50),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+DEFAULT_PRICING_PER_1M = (0.50, 1.50)
+
+_current_usage: contextvars.ContextVar[Optional["UsageAccumulator"]] = contextvars.ContextVar(
+    "current_usage", default=None
+)
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """Read token counts from a Gemini response.
+
+    Args:
+        response: Response object exposing ``usage_metadata``
+
+    Returns:
+        Dict with prompt_tokens, output_tokens and total_tokens (0 if unknown)
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    output_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    total_tokens = getattr(metadata, "total_token_count", 0) or (prompt_tokens + output_tokens)
+    return {
+        "prompt_tokens": int(prompt_tokens),
+        "output_tokens": int(output_tokens),
+        "total_tokens": int(total_tokens),
+    }
+
+
+def estimate_cost_usd(model_name: str, usage: Dict[str, int]) -> float:
+    """Estimate the cost of a call from its token counts.
+
+    Args:
+        model_name: Model used for the call
+        usage: Dict from usage_from_response
+
+    Returns:
+        Cost in USD
+    """
+    input_price, output_price = MODEL_PRICING_PER_1M.get(model_name, DEFAULT_PRICING_PER_1M)
+    return (
+        usage.get("prompt_tokens", 0) * input_price
+        + usage.get("output_tokens", 0) * output_price
+    ) / 1_000_000
+
+
+class UsageAccumulator:
+    """Running totals of token usage, cost and model wall time."""
+
+    def __init__(self, parent: Optional["UsageAccumulator"] = None):
+        self.parent = parent
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.llm_calls = 0
+        self.llm_time_ms = 0.0
+        self.cost_usd = 0.0
+        self.started_at = time.perf_counter()
+
+    def add(self, model_name: str, usage: Dict[str, int], wall_time_ms: float):
+        """Record one model call here and in every enclosing scope."""
+        cost = estimate_cost_usd(model_name, usage)
+        accumulator = self
+        while accumulator is not None:
+            accumulator.prompt_tokens += usage.get("prompt_tokens", 0)
+            accumulator.output_tokens += usage.get("output_tokens", 0)
+            accumulator.total_tokens += usage.get("total_tokens", 0)
+            accumulator.llm_calls += 1
+            accumulator.llm_time_ms += wall_time_ms
+            accumulator.cost_usd += cost
+            accumulator = accumulator.parent
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot suitable for briefing metadata and logging."""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_calls": self.llm_calls,
+            "llm_time_ms": round(self.llm_time_ms, 1),
+            "wall_time_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+@contextmanager
+def track_usage():
+    """Collect usage of all model calls made inside the block.
+
+    Yields:
+        UsageAccumulator for the block
+    """
+    accumulator = UsageAccumulator(parent=_current_usage.get())
+    token = _current_usage.set(accumulator)
+    try:
+        yield accumulator
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(model_name: str, response: Any, wall_time_ms: float) -> Dict[str, int]:
+    """Record a finished model call against the current scope.
+
+    Args:
+        model_name: Model used for the call
+        response: Model response (usage is read from ``usage_metadata``)
+        wall_time_ms: Wall time of the call in milliseconds
+
+    Returns:
+        Token counts for this call
+    """
+    usage = usage_from_response(response)
+    accumulator = _current_usage.get()
+    if accumulator is not None:
+        accumulator.add(model_name, usage, wall_time_ms)
+    return usage
+
+
+def record_estimated_usage(
+    model_name: str,
+    prompt_tokens: int,
+    output_tokens: int,
+    wall_time_ms: float
+) -> Dict[str, int]:
+    """Record a call that was cancelled before its usage was reported.
+
+    Hedged calls that lose the race are cancelled mid-flight, but the
+    provider already received (and bills) them, so an estimate is recorded.
+
+    Args:
+        model_name: Model used for the call
+        prompt_tokens: Estimated prompt tokens
+        output_tokens: Estimated output tokens
+        wall_time_ms: Time the call ran before it was cancelled
+
+    Returns:
+        Token counts recorded for this call
+    """
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": prompt_tokens + output_tokens,
+    }
+    accumulator = _current_usage.get()
+    if accumulator is not None:
+        accumulator.add(model_name, usage, wall_time_ms)
+    return usage
+
+
+def split_usage(usage: Dict[str, Any], parts: int) -> Dict[str, Any]:
+    """Evenly attribute one call's usage to ``parts`` briefings (packed prompts)."""
+    share = dict(usage)
+    for field in ("prompt_tokens", "output_tokens", "total_tokens"):
+        share[field] = usage.get(field, 0) // parts
+    for field in ("llm_time_ms", "wall_time_ms"):
+        share[field] = round(usage.get(field, 0.0) / parts, 1)
+    share["cost_usd"] = round(usage.get("cost_usd", 0.0) / parts, 6)
+    return share
+
+
+def empty_usage() -> Dict[str, Any]:
+    """Usage dict for briefings that did not call a model (e.g. cache hits)."""
+    return UsageAccumulator().as_dict() | {"wall_time_ms": 0.0}
@@ -0,0 +1,81 @@
+"""Benchmark for the daily popular batch scheduler.
+
+Runs the popular batch against the fake model backend twice: once with
+the previous scheduler (fixed chunks of five with asyncio.gather and a
+pause between chunks) and once with the worker pool used by
+BatchBriefingGenerator. Latencies are drawn from the same seeded
+log-normal distribution, so the difference is the scheduling alone.
+
+Usage (from stan-backend/):
+    python -m benchmarks.bench_batch [--stans 60] [--latency-ms 800] [--sigma 0.6]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# The cascade's latency budget would otherwise cut off slow fake calls
+os.environ.setdefault("BRIEFING_PRIMARY_BUDGET_MS", "60000")
+
+from agents.batch_generator import POPULAR_STANS, BatchBriefingGenerator  # noqa: E402
+from agents.efficient_agent import EfficientBriefingAgent  # noqa: E402
+from agents.model_backends import FakeBackend  # noqa: E402
+
+
+async def legacy_daily(generator, chunk_size=5, pause=2.0):
+    """Previous generate_popular_briefings_daily loop, for comparison."""
+    units = generator._plan_units()
+    successes = 0
+    for i in range(0, len(units), chunk_size):
+        batch = units[i:i + chunk_size]
+        unit_results = await asyncio.gather(*[generator._generate_unit(unit) for unit in batch])
+        successes += sum(1 for pairs in unit_results for _, result in pairs if not isinstance(result, Exception))
+        if i + chunk_size < len(units):
+            await asyncio.sleep(pause)
+    return successes
+
+
+def make_generator(args):
+    backend = FakeBackend(latency_ms=args.latency_ms, latency_sigma=args.sigma, seed=args.seed)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend), pack_size=1)
+    names = [name for stans in POPULAR_STANS.values() for name in stans]
+    generator.popular_stan_list = [f"{names[i % len(names)]} {i}" for i in range(args.stans)]
+    generator.concurrency = args.concurrency
+    return generator
+
+
+async def run(args):
+    print(f"{args.stans} stans, fake latency {args.latency_ms}ms (sigma {args.sigma}), "
+          f"concurrency {args.concurrency}")
+
+    start = time.perf_counter()
+    successes = await legacy_daily(make_generator(args), pause=args.pause)
+    legacy = time.perf_counter() - start
+    print(f"{'chunked gather':<16} {legacy:7.2f}s  {args.stans / legacy * 60:8.1f} stans/min  ({successes} ok)")
+
+    start = time.perf_counter()
+    stats = await make_generator(args).generate_popular_briefings_daily()
+    pool = time.perf_counter() - start
+    print(f"{'worker pool':<16} {pool:7.2f}s  {args.stans / pool * 60:8.1f} stans/min  ({stats['successes']} ok)")
+
+    print(f"speedup: {legacy / pool:.2f}x")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--stans", type=int, default=60)
+    arg_parser.add_argument("--latency-ms", type=float, default=800)
+    arg_parser.add_argument("--sigma", type=float, default=0.6)
+    arg_parser.add_argument("--concurrency", type=int, default=5)
+    arg_parser.add_argument("--pause", type=float, default=2.0, help="seconds between legacy chunks")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    args = arg_parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
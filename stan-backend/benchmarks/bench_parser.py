@@ -0,0 +1,117 @@
+"""Microbenchmark for briefing parsing.
+
+Compares the single-pass parser in agents/briefing_parser.py against the
+previous multi-pass implementation (re.split + repeated re.findall) on the
+recorded model outputs in tests/fixtures/briefings.
+
+Usage (from stan-backend/):
+    python -m benchmarks.bench_parser [--iterations 2000]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.briefing_parser import BriefingParser, parse_briefing  # noqa: E402
+from agents.efficient_agent import EfficientBriefingAgent  # noqa: E402
+
+CORPUS_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "briefings"
+
+LEGACY_SECTIONS = [
+    ("🔥 Top News & Trending", "news", 5),
+    ("📱 Social Media Highlights", "social_media", 4),
+    ("📅 Upcoming Events", "events", 3),
+    ("💡 Quick Recommendations", "recommendations", 2),
+]
+
+
+def legacy_extract_sources(text):
+    sources = []
+    for _, url in re.findall(r'\[([^\]]+)\]\(([^\)]+)\)', text):
+        if url.startswith('http'):
+            sources.append(url)
+    sources.extend(re.findall(r'https?://[^\s\)]+', text))
+    seen = set()
+    unique = []
+    for url in sources:
+        if url not in seen:
+            seen.add(url)
+            unique.append(url)
+    return unique
+
+
+def legacy_parse(text):
+    """Previous EfficientBriefingAgent._parse_response, for comparison."""
+    sections = {}
+    for part in re.split(r'\n## ', text):
+        if not part.strip():
+            continue
+        lines = part.split('\n', 1)
+        if len(lines) == 2:
+            sections[lines[0].strip()] = lines[1].strip()
+        elif len(lines) == 1 and '##' not in part:
+            sections['_intro'] = lines[0].strip()
+
+    sources = legacy_extract_sources(text)
+    topics = []
+    for title, category, priority in LEGACY_SECTIONS:
+        content = sections.get(title, "")
+        if content.strip():
+            topics.append({
+                "title": title,
+                "content": content.strip(),
+                "sources": legacy_extract_sources(content),
+                "category": category,
+                "priority": priority,
+            })
+
+    summary = None
+    for line in sections.get("🔥 Top News & Trending", "").split('\n'):
+        if line.strip().startswith('-') or line.strip().startswith('•'):
+            summary = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', line.strip().lstrip('-•').strip())[:200]
+            break
+    return topics, sources, summary
+
+
+def streamed_parse(text, chunk_size=128):
+    parser = BriefingParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    parser.close()
+    return parser
+
+
+def bench(name, fn, corpus, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    per_doc_us = elapsed / (iterations * len(corpus)) * 1_000_000
+    print(f"{name:<24} {per_doc_us:8.1f} us/doc  {iterations * len(corpus) / elapsed:10.0f} docs/s")
+    return per_doc_us
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--iterations", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    corpus = [p.read_bytes().decode("utf-8") for p in sorted(CORPUS_DIR.glob("*.md"))]
+    print(f"corpus: {len(corpus)} documents, {sum(map(len, corpus))} chars")
+
+    agent = EfficientBriefingAgent()
+
+    legacy = bench("legacy multi-pass", legacy_parse, corpus, args.iterations)
+    single = bench("single-pass", parse_briefing, corpus, args.iterations)
+    full = bench("agent._parse_response", lambda text: agent._parse_response(text, "bench"), corpus, args.iterations)
+    bench("single-pass (streamed)", streamed_parse, corpus, args.iterations)
+    print(f"speedup: {legacy / single:.2f}x parser, {legacy / full:.2f}x with topic assembly")
+
+
+if __name__ == "__main__":
+    main()
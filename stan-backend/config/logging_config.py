@@ -124,7 +124,12 @@ def log_briefing_generation(
     agent_type: str,
     cost_usd: float,
     success: bool = True,
-    error: str = None
+    error: str = None,
+    prompt_tokens: int = None,
+    output_tokens: int = None,
+    total_tokens: int = None,
+    llm_time_ms: float = None,
+    cache_hit: bool = None
 ):
     """Log briefing generation event.
 
@@ -133,9 +138,14 @@ def log_briefing_generation(
         user_id: User ID
         duration_ms: Generation duration in milliseconds
         agent_type: Type of agent used
-        cost_usd: Estimated cost in USD
+        cost_usd: Cost in USD computed from token usage
         success: Whether generation succeeded
         error: Error message if failed
+        prompt_tokens: Prompt tokens across all model calls
+        output_tokens: Output tokens across all model calls
+        total_tokens: Total tokens across all model calls
+        llm_time_ms: Wall time spent waiting on the model
+        cache_hit: Whether the briefing was served from cache
     """
     logger = get_logger("briefing")
     logger.info(
@@ -146,7 +156,12 @@ def log_briefing_generation(
         agent_type=agent_type,
         cost_usd=cost_usd,
         success=success,
-        error=error
+        error=error,
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        total_tokens=total_tokens,
+        llm_time_ms=llm_time_ms,
+        cache_hit=cache_hit
     )
 
 
@@ -0,0 +1,148 @@
+"""Buffered, batched upserts for Supabase tables.
+
+Writing one row at a time costs a round trip per row (two when the row
+is looked up first to choose between UPDATE and INSERT). ``BulkWriter``
+buffers rows and writes them as one ``upsert(..., on_conflict=...)`` per
+batch, flushing when the batch is full, when ``flush_interval`` passes,
+or on ``close``.
+
+Rows with the same conflict key in one batch are collapsed (last one
+wins), since Postgres rejects an upsert that touches a row twice.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_BATCH_SIZE = int(os.getenv("DB_BULK_BATCH_SIZE", "500"))
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("DB_BULK_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+
+class BulkWriter:
+    """Buffers rows for one table and upserts them in batches."""
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        on_conflict: str,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_retries: int = 1
+    ):
+        """Initialize writer.
+
+        Args:
+            client: Supabase client
+            table: Table to write
+            on_conflict: Comma-separated unique columns, e.g. ``stan_id,date``
+            batch_size: Rows per upsert call
+            flush_interval: Seconds a row may wait before being written
+                (0 disables the background flush)
+            max_retries: Extra attempts for a failed batch before its rows
+                are dropped and counted as failed
+        """
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.conflict_columns = [column.strip() for column in on_conflict.split(",")]
+        self.batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_retries = max_retries
+
+        self._buffer: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {
+            "rows_written": 0,
+            "rows_failed": 0,
+            "rows_collapsed": 0,
+            "batches": 0,
+            "write_seconds": 0.0,
+        }
+
+    async def __aenter__(self) -> "BulkWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def add(self, row: Dict[str, Any]):
+        """Buffer a row, writing a batch once ``batch_size`` rows are waiting."""
+        key = tuple(row.get(column) for column in self.conflict_columns)
+        if key in self._buffer:
+            self.stats["rows_collapsed"] += 1
+        self._buffer[key] = row
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self.flush_interval and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        """Write every buffered row.
+
+        Returns:
+            Rows written
+        """
+        async with self._lock:
+            written = 0
+            while self._buffer:
+                rows = list(self._buffer.values())[:self.batch_size]
+                for key in list(self._buffer)[:self.batch_size]:
+                    del self._buffer[key]
+                written += await self._write(rows)
+            return written
+
+    async def close(self):
+        """Stop the background flush and write what is left."""
+        if self._flusher and self._flusher is not asyncio.current_task():
+            self._flusher.cancel()
+        self._flusher = None
+        await self.flush()
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+            self._flusher = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> int:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                # The Supabase client blocks, so keep it off the event loop
+                await asyncio.to_thread(
+                    lambda: self.client.table(self.table).upsert(rows, on_conflict=self.on_conflict).execute()
+                )
+            except Exception as e:
+                logger.warning("bulk_upsert_failed", table=self.table, rows=len(rows),
+                               attempt=attempt + 1, error=str(e))
+                continue
+            finally:
+                self.stats["write_seconds"] += time.perf_counter() - started
+
+            self.stats["rows_written"] += len(rows)
+            self.stats["batches"] += 1
+            return len(rows)
+
+        self.stats["rows_failed"] += len(rows)
+        logger.error("bulk_upsert_dropped", table=self.table, rows=len(rows))
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rows written and write throughput."""
+        write_seconds = self.stats["write_seconds"]
+        return {
+            "table": self.table,
+            **self.stats,
+            "write_seconds": round(write_seconds, 3),
+            "pending": len(self._buffer),
+            "rows_per_second": round(self.stats["rows_written"] / write_seconds, 1) if write_seconds else 0.0,
+        }
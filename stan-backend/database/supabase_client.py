@@ -1,14 +1,63 @@
 """Supabase client for database operations."""
 
+import asyncio
 import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from database.bulk_writer import BulkWriter
+
 load_dotenv()
 
 
+def daily_briefing_row(user_id: str, stan_id: str, briefing_content: Dict[str, Any]) -> Dict[str, Any]:
+    """Build today's daily_briefings row for a stan.
+
+    ``created_at`` is left to the column default so an upsert that updates
+    an existing row keeps it.
+    """
+    return {
+        "user_id": user_id,
+        "stan_id": stan_id,
+        "date": datetime.now().date().isoformat(),
+        "content": briefing_content.get("content", ""),
+        "summary": briefing_content.get("summary", ""),
+        "sources": briefing_content.get("sources", []),
+        "topics": briefing_content.get("topics", []),
+        "updated_at": datetime.now().isoformat()
+    }
+
+
+def briefing_v2_row(
+    stan_name: str,
+    stan_category: str,
+    briefing: Dict[str, Any],
+    is_popular: bool,
+    cost_usd: float = 0.0,
+    ttl_seconds: int = 86400
+) -> Dict[str, Any]:
+    """Build today's briefings_v2 row; ``content`` keeps the whole briefing."""
+    now = datetime.now()
+    return {
+        "stan_name": stan_name,
+        "stan_category": stan_category,
+        "date": now.date().isoformat(),
+        "topics": briefing.get("topics", []),
+        "sources": briefing.get("sources", []),
+        "summary": briefing.get("summary", ""),
+        "content": briefing,
+        "images": briefing.get("images", []),
+        "is_popular": is_popular,
+        "is_cached": True,
+        "generation_cost_usd": round(cost_usd, 4),
+        "agent_type": briefing.get("metadata", {}).get("agent_type", "efficient_agent"),
+        "generated_at": now.isoformat(),
+        "expires_at": (now + timedelta(seconds=ttl_seconds)).isoformat()
+    }
+
+
 class SupabaseClient:
     """Supabase database client for STAN backend."""
     
@@ -40,26 +89,18 @@ class SupabaseClient:
     async def save_custom_prompt(self, user_id: str, stan_id: str, prompt_data: Dict[str, Any]) -> Dict[str, Any]:
         """Save or update custom prompt."""
         try:
-            # Check if prompt exists
-            existing = await self.get_custom_prompt(user_id, stan_id)
-            
             data = {
                 "user_id": user_id,
                 "stan_id": stan_id,
                 **prompt_data,
                 "updated_at": datetime.now().isoformat()
             }
-            
-            if existing:
-                # Update existing
-                response = self.client.table("stan_prompts").update(data).eq(
-                    "user_id", user_id
-                ).eq("stan_id", stan_id).execute()
-            else:
-                # Insert new
-                data["created_at"] = datetime.now().isoformat()
-                response = self.client.table("stan_prompts").insert(data).execute()
-            
+
+            # One round trip: insert, or update the existing prompt in place
+            response = self.client.table("stan_prompts").upsert(
+                data, on_conflict="user_id,stan_id"
+            ).execute()
+
             return response.data[0] if response.data else {}
         except Exception as e:
             print(f"Error saving custom prompt: {e}")
@@ -88,38 +129,58 @@ class SupabaseClient:
     async def store_daily_briefing(self, user_id: str, stan_id: str, briefing_content: Dict[str, Any]) -> Dict[str, Any]:
         """Store a daily briefing."""
         try:
-            today = datetime.now().date().isoformat()
-            
-            # Check if briefing exists for today
-            existing = self.client.table("daily_briefings").select("id").eq(
-                "user_id", user_id
-            ).eq("stan_id", stan_id).eq("date", today).execute()
-            
-            data = {
-                "user_id": user_id,
-                "stan_id": stan_id,
-                "date": today,
-                "content": briefing_content.get("content", ""),
-                "summary": briefing_content.get("summary", ""),
-                "sources": briefing_content.get("sources", []),
-                "topics": briefing_content.get("topics", []),
-                "updated_at": datetime.now().isoformat()
-            }
-            
-            if existing.data:
-                # Update existing
-                response = self.client.table("daily_briefings").update(data).eq(
-                    "id", existing.data[0]["id"]
-                ).execute()
-            else:
-                # Insert new
-                data["created_at"] = datetime.now().isoformat()
-                response = self.client.table("daily_briefings").insert(data).execute()
-            
+            # One round trip; replaces today's briefing if there is one
+            response = self.client.table("daily_briefings").upsert(
+                daily_briefing_row(user_id, stan_id, briefing_content),
+                on_conflict="stan_id,date"
+            ).execute()
+
             return response.data[0] if response.data else {}
         except Exception as e:
             print(f"Error storing daily briefing: {e}")
             raise
+
+    def bulk_writer(
+        self,
+        table: str,
+        on_conflict: str,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ) -> BulkWriter:
+        """Writer that upserts rows into ``table`` in batches."""
+        return BulkWriter(self.client, table, on_conflict, batch_size=batch_size, flush_interval=flush_interval)
+
+    def daily_briefings_writer(self, batch_size: Optional[int] = None) -> BulkWriter:
+        """Bulk writer for daily_briefing_row rows (one per stan per day)."""
+        return self.bulk_writer("daily_briefings", "stan_id,date", batch_size=batch_size)
+    
+    async def store_briefing_v2(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Upsert a briefings_v2 row built by briefing_v2_row."""
+        try:
+            # The Supabase client blocks, so keep it off the event loop
+            response = await asyncio.to_thread(
+                lambda: self.client.table("briefings_v2").upsert(row, on_conflict="stan_name,date").execute()
+            )
+
+            return response.data[0] if response.data else {}
+        except Exception as e:
+            print(f"Error storing briefing v2: {e}")
+            raise
+
+    async def get_briefings_v2(self, stan_names: List[str], day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get unexpired briefings_v2 rows for the given stans on one day."""
+        try:
+            query = self.client.table("briefings_v2").select(
+                "stan_name, content, expires_at"
+            ).in_("stan_name", stan_names).eq(
+                "date", day or datetime.now().date().isoformat()
+            ).eq("is_cached", True).gt("expires_at", datetime.now().isoformat())
+            response = await asyncio.to_thread(query.execute)
+
+            return response.data if response.data else []
+        except Exception as e:
+            print(f"Error fetching briefings v2: {e}")
+            return []
     
     async def get_user_briefings(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all briefings for a user."""
@@ -171,6 +232,30 @@ class SupabaseClient:
             print(f"Error fetching users with stans: {e}")
             return []
     
+    async def get_stan_popularity(self, limit: int = 1000) -> Dict[str, Dict[str, int]]:
+        """Get subscriber and read counts per stan from user_stans_v2.
+
+        Counted by the stan_popularity function (sql/stan_popularity_function.sql),
+        so only one row per stan comes back.
+
+        Args:
+            limit: Most-followed stans to return
+        """
+        try:
+            query = self.client.rpc("stan_popularity", {"p_limit": limit})
+            response = await asyncio.to_thread(query.execute)
+
+            return {
+                row["stan_name"]: {
+                    "subscribers": row["subscribers"],
+                    "total_reads": row["total_reads"],
+                }
+                for row in response.data or []
+            }
+        except Exception as e:
+            print(f"Error fetching stan popularity: {e}")
+            return {}
+    
     async def clear_user_briefings(self, user_id: str, days_old: int = 7) -> bool:
         """Clear old briefings for a user."""
         try:
@@ -13,9 +13,11 @@ from dotenv import load_dotenv
 import uvicorn
 
 # Import agents
+from agents.agent_memo import agent_memo
 from agents.base_agent import BriefingAgent
+from agents.daily_fanout import DailyBriefingFanout
 from agents.specialized_agents import BriefingOrchestrator
-from agents.multimodal_agent import MultimodalAgent, VoiceAgent
+from agents.model_registry import model_registry
 from database.supabase_client import SupabaseClient
 from services.cache_service import cache_service, briefing_cache_key, daily_briefings_cache_key
 from services.analytics_service import analytics_service
@@ -49,8 +51,9 @@ app.add_middleware(
 # Initialize agents and database
 briefing_agent = BriefingAgent()
 orchestrator = BriefingOrchestrator()
-multimodal_agent = MultimodalAgent()
-voice_agent = VoiceAgent()
+# Reuse the orchestrator's agents instead of building a second pair
+multimodal_agent = orchestrator.multimodal_agent
+voice_agent = orchestrator.voice_agent
 
 # Initialize database client (make it optional for testing)
 try:
@@ -59,6 +62,9 @@ except Exception as e:
     print(f"Warning: Database initialization failed: {e}")
     db_client = None
 
+# Generates each unique daily briefing once for all of its subscribers
+daily_fanout = DailyBriefingFanout(orchestrator, db_client)
+
 
 # Pydantic models
 class Stan(BaseModel):
@@ -84,6 +90,12 @@ class BriefingResponse(BaseModel):
     generated_by: Optional[str] = "ADK Agent System"
 
 
+@app.on_event("startup")
+async def warm_up_models():
+    """Open model connections before the first request."""
+    await model_registry.warm_up()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -186,13 +198,13 @@ async def generate_briefing_stream(request: BriefingRequest):
             # Stream the response
             yield {"event": "start", "data": {"status": "generating"}}
 
-            full_text = ""
+            chunks = []
             async for chunk in briefing_agent.generate_content_stream(prompt):
-                full_text += chunk
+                chunks.append(chunk)
                 yield {"event": "chunk", "data": {"text": chunk}}
 
             # Parse final result
-            parsed = briefing_agent._parse_agent_response(full_text)
+            parsed = briefing_agent._parse_agent_response("".join(chunks))
             yield {"event": "complete", "data": parsed}
 
         except Exception as e:
@@ -217,27 +229,8 @@ async def generate_all_briefings(background_tasks: BackgroundTasks):
     
     async def generate_for_all_users():
         try:
-            # Get all users with stans
-            users = await db_client.get_all_users_with_stans()
-            
-            for user in users:
-                for stan in user["stans"]:
-                    try:
-                        # Generate briefing using orchestrator
-                        briefing = await orchestrator.generate_comprehensive_briefing(
-                            stan_data=stan,
-                            custom_settings=user.get("custom_settings")
-                        )
-                        
-                        # Store in database
-                        await db_client.store_daily_briefing(
-                            user_id=user["id"],
-                            stan_id=stan["id"],
-                            briefing_content=briefing
-                        )
-                    except Exception as e:
-                        print(f"Error generating briefing for {stan['name']}: {e}")
-                        continue
+            stats = await daily_fanout.run()
+            print(f"Daily briefings: {stats['unique_items']} unique of {stats['total_items']} work items")
         except Exception as e:
             print(f"Error in batch generation: {e}")
     
@@ -363,6 +356,8 @@ async def get_metrics():
     """Get analytics metrics."""
     try:
         summary = analytics_service.get_metrics_summary()
+        summary["agent_memo"] = agent_memo.get_stats()
+        summary["daily_briefings"] = daily_fanout.last_run
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
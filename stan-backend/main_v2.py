@@ -9,21 +9,31 @@ Optimized for cost and PMF validation:
 """
 
 import os
+import asyncio
+import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
 import time
 from dotenv import load_dotenv
 import uvicorn
 
 # Import new optimized agents
 from agents.efficient_agent import EfficientBriefingAgent
-from agents.batch_generator import BatchBriefingGenerator, POPULAR_STANS
+from agents.batch_generator import BatchBriefingGenerator, POPULAR_STANS, popular_run_id
+from agents.generation_profiles import get_profile, profile_stats
+from agents.model_registry import model_registry
+from agents.usage import empty_usage
 from database.supabase_client import SupabaseClient
 from services.cache_service import cache_service
+from services.analytics_service import analytics_service
+from services.hedging import hedge_policy
+from services.job_queue import job_queue
+from services.llm_governor import llm_governor
 
 # Import middleware and config
 from middleware.rate_limiter import (
@@ -90,10 +100,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-efficient_agent = EfficientBriefingAgent()
-batch_generator = BatchBriefingGenerator(agent=efficient_agent)
-
 # Initialize database client
 try:
     db_client = SupabaseClient()
@@ -102,6 +108,19 @@ except Exception as e:
     logger.error("database_init_failed", error=str(e))
     db_client = None
 
+# "inline" generates the daily batch and custom briefings in this process;
+# "queue" hands them to worker processes (worker.py) through the Redis job queue
+BATCH_EXECUTION = os.getenv("BATCH_EXECUTION", "inline")
+
+# Initialize services
+efficient_agent = EfficientBriefingAgent()
+# The database supplies subscriber counts for ordering the daily batch
+batch_generator = BatchBriefingGenerator(
+    agent=efficient_agent,
+    db_client=db_client,
+    job_queue=job_queue if BATCH_EXECUTION == "queue" else None
+)
+
 # Initialize rate limiter with Redis
 try:
     redis_client = cache_service.redis if hasattr(cache_service, 'redis') else None
@@ -124,6 +143,7 @@ class Stan(BaseModel):
 class BriefingRequest(BaseModel):
     stan: Stan
     userId: Optional[str] = None
+    profile: Optional[str] = None  # fast | standard | deep
 
 
 class BriefingResponse(BaseModel):
@@ -174,6 +194,34 @@ async def log_requests(request: Request, call_next):
         raise
 
 
+@app.on_event("startup")
+async def warm_up_models():
+    """Open model connections before the first request."""
+    await model_registry.warm_up()
+
+
+@app.on_event("startup")
+async def warm_briefing_cache():
+    """Reload today's popular briefings from briefings_v2 into Redis."""
+    app.state.cache_warm = asyncio.create_task(batch_generator.warm_cache())
+
+
+@app.on_event("startup")
+async def resume_batch_run():
+    """Finish a daily batch that a deploy or crash interrupted."""
+    if BATCH_EXECUTION == "queue":
+        # Workers own the run; expired job leases are requeued by them
+        return
+    # Runs in the background so startup isn't blocked by generation
+    app.state.batch_resume = asyncio.create_task(batch_generator.resume_interrupted_run())
+
+
+@app.on_event("shutdown")
+async def drain_batch_run():
+    """Let in-flight batch generations finish; the rest resume on restart."""
+    await batch_generator.drain(timeout=float(os.getenv("BATCH_DRAIN_TIMEOUT_SECONDS", "25")))
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -181,7 +229,7 @@ async def root():
         "message": "STAN Backend API v2 - Optimized for PMF",
         "version": "2.0.0",
         "status": "operational",
-        "features": ["efficient_agent", "batch_generation", "rate_limiting", "structured_logging"]
+        "features": ["efficient_agent", "batch_generation", "streaming", "rate_limiting", "structured_logging"]
     }
 
 
@@ -210,6 +258,52 @@ async def get_popular_stans():
     }
 
 
+def _track_briefing(
+    stan_name: str,
+    user_id: Optional[str],
+    duration_ms: float,
+    agent_type: str,
+    briefing: Dict[str, Any]
+):
+    """Log and record a served briefing with its real token usage."""
+    metadata = briefing.get("metadata") or {}
+    cache_hit = bool(metadata.get("served_from_cache"))
+    usage = empty_usage() if cache_hit else (metadata.get("usage") or empty_usage())
+
+    log_briefing_generation(
+        stan_name=stan_name,
+        user_id=user_id or "anonymous",
+        duration_ms=duration_ms,
+        agent_type=agent_type,
+        cost_usd=usage["cost_usd"],
+        success=True,
+        prompt_tokens=usage["prompt_tokens"],
+        output_tokens=usage["output_tokens"],
+        total_tokens=usage["total_tokens"],
+        llm_time_ms=usage["llm_time_ms"],
+        cache_hit=cache_hit
+    )
+
+    if not cache_hit:
+        analytics_service.track_briefing_generation(
+            stan_name=stan_name,
+            user_id=user_id,
+            duration_ms=duration_ms,
+            token_count=usage["total_tokens"],
+            cost_usd=usage["cost_usd"]
+        )
+
+
+def _validate_profile(profile: Optional[str]):
+    """Reject unknown generation profiles with a 400."""
+    if profile is None:
+        return
+    try:
+        get_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/api/generate-briefing", response_model=BriefingResponse, dependencies=[Depends(briefing_rate_limit)])
 async def generate_briefing(request: BriefingRequest):
     """Generate a briefing for a specific stan.
@@ -219,6 +313,7 @@ async def generate_briefing(request: BriefingRequest):
     Custom stans require userId and count toward rate limit.
     """
     start_time = datetime.now()
+    _validate_profile(request.profile)
 
     try:
         stan_name = request.stan.name
@@ -227,24 +322,19 @@ async def generate_briefing(request: BriefingRequest):
         logger.info("briefing_requested",
                    stan_name=stan_name,
                    user_id=user_id,
+                   profile=request.profile,
                    is_popular=batch_generator.is_popular_stan(stan_name))
 
         # Use batch generator (handles caching automatically)
         briefing = await batch_generator.get_briefing(
             stan_name=stan_name,
-            user_id=user_id
+            user_id=user_id,
+            profile=request.profile
         )
 
-        # Track generation
+        # Track generation with real token usage (zero cost on cache hits)
         duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-        log_briefing_generation(
-            stan_name=stan_name,
-            user_id=user_id or "anonymous",
-            duration_ms=duration_ms,
-            agent_type="efficient_agent",
-            cost_usd=0.08,  # Estimated cost
-            success=True
-        )
+        _track_briefing(stan_name, user_id, duration_ms, "efficient_agent", briefing)
 
         # Store briefing read event if user is authenticated
         if user_id and db_client:
@@ -278,29 +368,103 @@ async def generate_briefing(request: BriefingRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/generate-briefing-stream", dependencies=[Depends(briefing_rate_limit)])
+async def generate_briefing_stream(request: BriefingRequest, format: str = "sse"):
+    """Stream a briefing topic by topic.
+
+    Each ``## `` section is emitted as a finished topic as soon as it
+    closes, followed by a ``complete`` event with the full briefing.
+    Use ``?format=ndjson`` for newline-delimited JSON instead of SSE.
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    _validate_profile(request.profile)
+
+    stan_name = request.stan.name
+    user_id = request.userId
+
+    if not user_id and not batch_generator.is_popular_stan(stan_name):
+        raise HTTPException(status_code=400, detail=f"Custom stan '{stan_name}' requires userId")
+
+    logger.info("briefing_stream_requested",
+               stan_name=stan_name,
+               user_id=user_id,
+               format=format)
+
+    async def event_stream():
+        start_time = datetime.now()
+        try:
+            async for event in batch_generator.stream_briefing(stan_name, user_id, request.profile):
+                yield event
+
+                if event["event"] == "complete":
+                    duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+                    _track_briefing(stan_name, user_id, duration_ms, "efficient_agent_stream", event["data"])
+        except Exception as e:
+            logger.error("briefing_stream_failed",
+                        stan_name=stan_name,
+                        user_id=user_id,
+                        error=str(e))
+            yield {"event": "error", "data": {"error": str(e)}}
+
+    if format == "ndjson":
+        async def ndjson_stream():
+            async for event in event_stream():
+                yield json.dumps(event) + "\n"
+
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+    async def sse_stream():
+        async for event in event_stream():
+            yield {"event": event["event"], "data": json.dumps(event["data"])}
+
+    return EventSourceResponse(sse_stream())
+
+
 @app.post("/api/batch/generate-popular")
 async def trigger_batch_generation(background_tasks: BackgroundTasks):
     """Trigger batch generation of popular stans (admin/cron only).
 
     This should be called by a cron job at 6am daily.
     Generates all popular stans once, serves to many users.
+    Triggering again the same day resumes today's run and only generates
+    the stans that are not cached yet.
     """
     # TODO: Add authentication for this endpoint (only allow admin/cron)
+    run_id = popular_run_id()
+
+    if BATCH_EXECUTION == "queue":
+        # The job ID is the run ID, so repeated triggers don't fan out twice
+        await job_queue.enqueue("popular_batch", {"run_id": run_id}, job_id=run_id)
+        logger.info("batch_generation_enqueued", run_id=run_id)
+        return {
+            "message": "Batch generation queued",
+            "status": "queued",
+            "run_id": run_id,
+            "popular_stans_count": len(batch_generator.popular_stan_list)
+        }
 
     async def run_batch():
-        logger.info("batch_generation_triggered")
-        stats = await batch_generator.generate_popular_briefings_daily()
-        logger.info("batch_generation_completed", **stats)
+        logger.info("batch_generation_triggered", run_id=run_id)
+        stats = await batch_generator.generate_popular_briefings_daily(run_id)
+        logger.info("batch_generation_finished", **stats)
 
     background_tasks.add_task(run_batch)
 
     return {
         "message": "Batch generation started",
         "status": "processing",
+        "run_id": run_id,
         "popular_stans_count": len(batch_generator.popular_stan_list)
     }
 
 
+@app.get("/api/batch/runs/{run_id}")
+async def get_batch_run(run_id: str):
+    """Progress of a batch run (status and done/failed/pending stans)."""
+    return await batch_generator.get_run_status(run_id)
+
+
 @app.get("/api/user/stans/{user_id}", dependencies=[Depends(api_rate_limit)])
 async def get_user_stans(user_id: str):
     """Get all stans a user follows."""
@@ -420,6 +584,29 @@ async def get_todays_briefings(userId: Optional[str] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """LLM and briefing metrics for monitoring."""
+    return {
+        "analytics": analytics_service.get_metrics_summary(),
+        "hedging": hedge_policy.get_stats(),
+        "llm_governor": llm_governor.get_stats(),
+        "models": model_registry.get_stats(),
+        "profiles": profile_stats.get_stats(),
+        "stan_names": batch_generator.canonicalizer.get_stats(),
+        "popular_reads": batch_generator.read_stats,
+        "durable_briefings": batch_generator.durable_stats,
+        "stale_briefings": batch_generator.stale_stats,
+        "job_queue": await job_queue.get_stats() if BATCH_EXECUTION == "queue" else None,
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus-compatible metrics endpoint."""
+    return Response(content=analytics_service.export_metrics(format="prometheus"), media_type="text/plain")
+
+
 @app.get("/api/test-google-ai")
 async def test_google_ai():
     """Test Google AI integration."""
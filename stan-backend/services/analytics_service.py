@@ -47,18 +47,25 @@ class AnalyticsService:
         user_id: Optional[str],
         duration_ms: float,
         token_count: Optional[int] = None,
-        agent_count: int = 1
+        agent_count: int = 1,
+        cost_usd: Optional[float] = None
     ):
         """Track briefing generation metrics."""
         self.track_event("briefing_generated", {
             "stan_name": stan_name,
             "duration_ms": duration_ms,
             "token_count": token_count,
-            "agent_count": agent_count
+            "agent_count": agent_count,
+            "cost_usd": cost_usd
         }, user_id)
 
         if token_count:
             self.cost_tracking["total_tokens"] += token_count
+
+        if cost_usd is not None:
+            # Cost computed from real prompt/output token usage
+            self.cost_tracking["estimated_cost"] += cost_usd
+        elif token_count:
             # Estimate cost (Gemini 2.0 Flash: ~$0.10 per 1M tokens)
             estimated_cost = (token_count / 1_000_000) * 0.10
             self.cost_tracking["estimated_cost"] += estimated_cost
@@ -94,6 +101,10 @@ class AnalyticsService:
             "context": context or {}
         })
 
+    def record_metric(self, name: str, value: float = 1):
+        """Add to a named counter (exported with the other metrics)."""
+        self.metrics[name] += value
+
     def track_cache_hit(self, cache_key: str):
         """Track cache hit."""
         self.metrics["cache_hits"] += 1
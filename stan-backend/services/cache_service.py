@@ -5,7 +5,7 @@ Redis-based caching service for briefings and API responses
 import os
 import json
 import hashlib
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from datetime import timedelta
 
 try:
@@ -16,6 +16,23 @@ except ImportError:
     print("Warning: redis not available, caching disabled")
 
 
+# Delete the lock only if we still own it (it may have expired and been retaken)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock only if we still own it
+_EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
 class CacheService:
     """Cache service for storing and retrieving briefings."""
 
@@ -80,6 +97,102 @@ class CacheService:
             print(f"Cache delete error: {e}")
             return False
 
+    async def acquire_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """Acquire a short-lived lock (SET NX PX).
+
+        Returns True when the lock was taken, or when Redis is unavailable
+        (there is nothing to coordinate with).
+        """
+        if not self.enabled or not self.redis_client:
+            return True
+
+        try:
+            return bool(await self.redis_client.set(key, token, nx=True, px=ttl_ms))
+        except Exception as e:
+            print(f"Cache lock error: {e}")
+            return True
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock only if it is still held with this token."""
+        if not self.enabled or not self.redis_client:
+            return False
+
+        try:
+            return bool(await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            print(f"Cache unlock error: {e}")
+            return False
+
+    async def increment_score(self, key: str, member: str, amount: float = 1, ttl: int = 86400) -> bool:
+        """Add to a member's score in a sorted set (request counters)."""
+        if not self.enabled or not self.redis_client:
+            return False
+
+        try:
+            await self.redis_client.zincrby(key, amount, member)
+            await self.redis_client.expire(key, ttl)
+            return True
+        except Exception as e:
+            print(f"Cache increment error: {e}")
+            return False
+
+    async def get_scores(self, key: str) -> Dict[str, float]:
+        """All members of a sorted set with their scores."""
+        if not self.enabled or not self.redis_client:
+            return {}
+
+        try:
+            return dict(await self.redis_client.zrange(key, 0, -1, withscores=True))
+        except Exception as e:
+            print(f"Cache scores error: {e}")
+            return {}
+
+    async def extend_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """Push back a lock's expiry if it is still held with this token."""
+        if not self.enabled or not self.redis_client:
+            return True
+
+        try:
+            return bool(await self.redis_client.eval(_EXTEND_LOCK_SCRIPT, 1, key, token, ttl_ms))
+        except Exception as e:
+            print(f"Cache lock extend error: {e}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        """Check whether a key is cached without fetching it."""
+        if not self.enabled or not self.redis_client:
+            return False
+
+        try:
+            return bool(await self.redis_client.exists(key))
+        except Exception as e:
+            print(f"Cache exists error: {e}")
+            return False
+
+    async def set_fields(self, key: str, fields: Dict[str, str], ttl: int = 3600) -> bool:
+        """Set fields of a hash (run checkpoints) and refresh its TTL."""
+        if not self.enabled or not self.redis_client or not fields:
+            return False
+
+        try:
+            await self.redis_client.hset(key, mapping=fields)
+            await self.redis_client.expire(key, ttl)
+            return True
+        except Exception as e:
+            print(f"Cache hset error: {e}")
+            return False
+
+    async def get_fields(self, key: str) -> Dict[str, str]:
+        """All fields of a hash."""
+        if not self.enabled or not self.redis_client:
+            return {}
+
+        try:
+            return await self.redis_client.hgetall(key)
+        except Exception as e:
+            print(f"Cache hgetall error: {e}")
+            return {}
+
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching pattern."""
         if not self.enabled or not self.redis_client:
@@ -151,3 +264,8 @@ def daily_briefings_cache_key(user_id: str) -> str:
 def stan_cache_key(stan_id: str) -> str:
     """Generate cache key for stan data."""
     return cache_service.generate_key("stan", stan_id)
+
+
+def last_good_briefing_key(stan_name: str) -> str:
+    """Generate cache key for the latest successful briefing of a stan."""
+    return cache_service.generate_key("last_good", stan_name)
@@ -0,0 +1,270 @@
+"""Hedged LLM requests to cut tail latency.
+
+When hedging is enabled and a generation has not answered within a
+configurable percentile of recent latency for that model, an identical
+second request is sent. The first successful answer wins and the other
+call is cancelled. A global budget caps hedges at a fraction of all calls
+(5% by default) so the tail-latency win never doubles spend.
+
+Each attempt can hold its own admission slot (e.g. an LLM governor slot).
+Latency is measured from admission, so time spent queued behind the
+governor neither inflates the percentile nor counts toward the hedge
+threshold. An attempt cancelled after admission has already been sent to
+the provider; it is reported through ``on_abandoned`` so its cost can be
+accounted for.
+
+Configuration (environment):
+    LLM_HEDGING_ENABLED: "true" to enable (default off)
+    LLM_HEDGE_PERCENTILE: latency percentile that triggers a hedge (default 95)
+    LLM_HEDGE_BUDGET: max extra calls as a fraction of calls (default 0.05)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncContextManager, Awaitable, Callable, Deque, Dict, Optional
+
+import structlog
+
+from agents.usage import usage_from_response
+from services.analytics_service import analytics_service
+
+logger = structlog.get_logger()
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies for one model."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float):
+        self.samples.append(latency_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def expected_remaining(self, elapsed_ms: float) -> float:
+        """Expected extra wait for a call still running after elapsed_ms."""
+        slower = [s for s in self.samples if s > elapsed_ms]
+        if not slower:
+            return 0.0
+        return sum(slower) / len(slower) - elapsed_ms
+
+
+class _Attempt:
+    """One try of a hedged call, timed from the moment it was admitted."""
+
+    def __init__(self, call: Callable[[], Awaitable[Any]], slot: Optional[Callable[[], AsyncContextManager[Any]]]):
+        self.admitted = asyncio.Event()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task = asyncio.ensure_future(self._run(call, slot))
+
+    async def _run(self, call, slot) -> Any:
+        if slot is None:
+            return await self._call(call)
+        async with slot() as permit:
+            result = await self._call(call)
+            permit.record_tokens(usage_from_response(result)["total_tokens"])
+            return result
+
+    async def _call(self, call) -> Any:
+        self.started_at = time.perf_counter()
+        self.admitted.set()
+        try:
+            return await call()
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        """Time since admission (until completion once finished)."""
+        if self.started_at is None:
+            return 0.0
+        return ((self.finished_at or time.perf_counter()) - self.started_at) * 1000
+
+    async def wait_admitted(self):
+        """Wait until the attempt is admitted or has finished."""
+        waiter = asyncio.ensure_future(self.admitted.wait())
+        try:
+            await asyncio.wait({self.task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+
+
+class HedgePolicy:
+    """Opt-in request hedging with a global extra-call budget."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        budget_ratio: Optional[float] = None,
+        min_samples: int = 20,
+        max_budget_credits: float = 10.0
+    ):
+        """Initialize hedge policy.
+
+        Args:
+            enabled: Enable hedging (defaults to LLM_HEDGING_ENABLED)
+            percentile: Latency percentile that triggers a hedge
+            budget_ratio: Max hedges as a fraction of all calls
+            min_samples: Latency samples needed before hedging a model
+            max_budget_credits: Cap on saved-up hedge credits (burst size)
+        """
+        if enabled is None:
+            enabled = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+        self.enabled = enabled
+        self.percentile = percentile if percentile is not None else float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.budget_ratio = budget_ratio if budget_ratio is not None else float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+        self.min_samples = min_samples
+        self.max_budget_credits = max_budget_credits
+
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self._credits = 0.0
+        self.stats = {
+            "calls": 0,
+            "hedges_sent": 0,
+            "hedges_won": 0,
+            "hedges_denied_by_budget": 0,
+            "abandoned_calls": 0,
+            "saved_ms_total": 0.0,
+        }
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        key: str = "default",
+        slot: Optional[Callable[[], AsyncContextManager[Any]]] = None,
+        on_abandoned: Optional[Callable[[float], Any]] = None
+    ) -> Any:
+        """Run a model call, hedging it if it is slower than usual.
+
+        Args:
+            call: Zero-argument callable creating a fresh call coroutine
+            key: Latency bucket, usually the model name
+            slot: Zero-argument callable returning the admission slot each
+                attempt holds while calling (yields a governor Permit)
+            on_abandoned: Called with the elapsed ms of every attempt that
+                was cancelled after admission, so its spend can be recorded
+
+        Returns:
+            Result of the first call to succeed
+        """
+        tracker = self.trackers.setdefault(key, LatencyTracker())
+        self.stats["calls"] += 1
+        self._credits = min(self._credits + self.budget_ratio, self.max_budget_credits)
+
+        hedge_after_ms = None
+        if self.enabled and len(tracker.samples) >= self.min_samples:
+            hedge_after_ms = tracker.percentile(self.percentile)
+
+        primary = _Attempt(call, slot)
+
+        if hedge_after_ms is None:
+            result = await primary.task
+            tracker.record(primary.elapsed_ms())
+            return result
+
+        try:
+            # The hedge clock starts at admission, not while queued
+            await primary.wait_admitted()
+            remaining_ms = max(hedge_after_ms - primary.elapsed_ms(), 0.0)
+            done, _ = await asyncio.wait({primary.task}, timeout=remaining_ms / 1000)
+        except asyncio.CancelledError:
+            self._abandon([primary], on_abandoned)
+            raise
+
+        if done:
+            result = primary.task.result()
+            tracker.record(primary.elapsed_ms())
+            return result
+
+        if self._credits < 1.0:
+            self.stats["hedges_denied_by_budget"] += 1
+            result = await primary.task
+            tracker.record(primary.elapsed_ms())
+            return result
+
+        return await self._race(primary, call, slot, tracker, key, on_abandoned)
+
+    async def _race(
+        self,
+        primary: _Attempt,
+        call,
+        slot,
+        tracker: LatencyTracker,
+        key: str,
+        on_abandoned
+    ) -> Any:
+        """Send the hedge and return whichever call succeeds first."""
+        self._credits -= 1.0
+        self.stats["hedges_sent"] += 1
+        analytics_service.record_metric("llm_hedges_sent")
+
+        hedge = _Attempt(call, slot)
+        attempts = {primary.task: primary, hedge.task: hedge}
+        pending = set(attempts)
+        error = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+
+                    if task is hedge.task:
+                        primary_elapsed_ms = primary.elapsed_ms()
+                        saved_ms = tracker.expected_remaining(primary_elapsed_ms)
+                        tracker.record(hedge.elapsed_ms())
+                        self.stats["hedges_won"] += 1
+                        self.stats["saved_ms_total"] += saved_ms
+                        analytics_service.record_metric("llm_hedges_won")
+                        analytics_service.record_metric("llm_hedge_saved_ms", saved_ms)
+                        logger.info("llm_hedge_won",
+                                   model=key,
+                                   primary_elapsed_ms=round(primary_elapsed_ms, 1),
+                                   estimated_saved_ms=round(saved_ms, 1))
+                    else:
+                        tracker.record(primary.elapsed_ms())
+                    return task.result()
+        finally:
+            self._abandon([attempts[task] for task in pending], on_abandoned)
+
+        raise error
+
+    def _abandon(self, attempts, on_abandoned):
+        """Cancel attempts and report the ones the provider already received."""
+        for attempt in attempts:
+            attempt.task.cancel()
+            if attempt.started_at is None:
+                continue
+            self.stats["abandoned_calls"] += 1
+            analytics_service.record_metric("llm_hedge_abandoned_calls")
+            if on_abandoned is not None:
+                on_abandoned(attempt.elapsed_ms())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge rate and saved latency for metrics endpoints."""
+        calls = self.stats["calls"]
+        won = self.stats["hedges_won"]
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget_ratio": self.budget_ratio,
+            **self.stats,
+            "hedge_rate": self.stats["hedges_sent"] / calls if calls else 0.0,
+            "avg_saved_ms_per_win": self.stats["saved_ms_total"] / won if won else 0.0,
+        }
+
+
+# Global hedge policy shared by all agents
+hedge_policy = HedgePolicy()
@@ -0,0 +1,289 @@
+"""Redis job queue with leases, heartbeats and dead-lettering.
+
+Generation jobs (daily batch runs, their units and custom briefings) are
+enqueued by the API and consumed by separate worker processes
+(``worker.py``), so generation scales out independently of the API tier
+and never competes with user traffic for the API's event loop.
+
+Layout per queue name:
+    jobs:<name>:pending   list of job IDs (FIFO)
+    jobs:<name>:data      hash job ID -> job JSON
+    jobs:<name>:attempts  hash job ID -> claim count
+    jobs:<name>:leases    sorted set job ID -> lease expiry (unix time)
+    jobs:<name>:owners    hash job ID -> worker ID holding the lease
+    jobs:<name>:dead      list of job IDs that used up their attempts
+    jobs:<name>:dead_jobs hash job ID -> job JSON of dead-lettered jobs
+
+A worker claims a job with a lease and keeps it alive with heartbeats.
+If the worker dies, the lease expires and ``requeue_expired`` puts the
+job back, or dead-letters it once it has used all its attempts.
+Dead-lettered jobs move out of ``data``, so the same job ID can be
+enqueued again (e.g. the next trigger of a failed run). Every state
+change is a Lua script, so a crash between steps cannot lose a job.
+"""
+
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+import structlog
+
+from services.cache_service import cache_service
+
+logger = structlog.get_logger()
+
+_CLAIM_SCRIPT = """
+local job_id = redis.call("rpop", KEYS[1])
+if not job_id then
+    return nil
+end
+redis.call("zadd", KEYS[2], ARGV[1], job_id)
+redis.call("hset", KEYS[3], job_id, ARGV[2])
+local attempts = redis.call("hincrby", KEYS[4], job_id, 1)
+return {job_id, attempts}
+"""
+
+_HEARTBEAT_SCRIPT = """
+if redis.call("hget", KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call("zadd", KEYS[1], "XX", ARGV[3], ARGV[1])
+return 1
+"""
+
+_COMPLETE_SCRIPT = """
+if redis.call("hget", KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call("zrem", KEYS[1], ARGV[1])
+redis.call("hdel", KEYS[2], ARGV[1])
+redis.call("hdel", KEYS[3], ARGV[1])
+redis.call("hdel", KEYS[4], ARGV[1])
+return 1
+"""
+
+# Release a lease and either retry the job or dead-letter it.
+# KEYS: leases, owners, attempts, pending, dead, data, dead_jobs
+# ARGV: job_id, owner ("" = any, used for expired leases), max_attempts, error,
+#       now (expired leases only: the lease must still be held and expired)
+_RELEASE_SCRIPT = """
+local job_id = ARGV[1]
+if ARGV[2] == "" then
+    local expiry = redis.call("zscore", KEYS[1], job_id)
+    if not expiry or tonumber(expiry) > tonumber(ARGV[5]) then
+        return -1
+    end
+elseif redis.call("hget", KEYS[2], job_id) ~= ARGV[2] then
+    return -1
+end
+redis.call("zrem", KEYS[1], job_id)
+redis.call("hdel", KEYS[2], job_id)
+local attempts = tonumber(redis.call("hget", KEYS[3], job_id) or "0")
+if ARGV[4] ~= "" then
+    local job = cjson.decode(redis.call("hget", KEYS[6], job_id))
+    job["last_error"] = ARGV[4]
+    redis.call("hset", KEYS[6], job_id, cjson.encode(job))
+end
+if attempts >= tonumber(ARGV[3]) then
+    redis.call("hset", KEYS[7], job_id, redis.call("hget", KEYS[6], job_id))
+    redis.call("hdel", KEYS[6], job_id)
+    redis.call("hdel", KEYS[3], job_id)
+    redis.call("lrem", KEYS[5], 0, job_id)
+    redis.call("lpush", KEYS[5], job_id)
+    return 0
+end
+redis.call("lpush", KEYS[4], job_id)
+return 1
+"""
+
+
+class Job:
+    """A claimed job."""
+
+    def __init__(self, job_id: str, kind: str, payload: Dict[str, Any], attempts: int, max_attempts: int):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+
+
+class JobQueue:
+    """Reliable FIFO queue of generation jobs on Redis."""
+
+    def __init__(
+        self,
+        name: str = "generation",
+        redis_client=None,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3
+    ):
+        """Initialize queue.
+
+        Args:
+            name: Queue name (key prefix)
+            redis_client: Async Redis client (defaults to cache_service's)
+            lease_seconds: How long a claim lasts without a heartbeat
+            max_attempts: Claims per job before it is dead-lettered
+        """
+        self.name = name
+        self._redis = redis_client
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    @property
+    def redis(self):
+        client = self._redis or cache_service.redis_client
+        if client is None:
+            raise RuntimeError("Job queue requires Redis (set REDIS_URL)")
+        return client
+
+    def _key(self, part: str) -> str:
+        return f"jobs:{self.name}:{part}"
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        job_id: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[str]:
+        """Add a job.
+
+        Args:
+            kind: Handler name, e.g. ``popular_unit`` or ``custom_briefing``
+            payload: JSON-serializable job arguments
+            job_id: Stable ID to make enqueueing idempotent while the job
+                is pending or running
+            max_attempts: Overrides the queue default
+
+        Returns:
+            The job ID, or None if a job with this ID already exists
+        """
+        job_id = job_id or uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "max_attempts": max_attempts or self.max_attempts,
+            "enqueued_at": time.time(),
+        }
+        if not await self.redis.hsetnx(self._key("data"), job_id, json.dumps(job)):
+            return None
+        await self.redis.lpush(self._key("pending"), job_id)
+        logger.info("job_enqueued", queue=self.name, job_id=job_id, kind=kind)
+        return job_id
+
+    async def claim(self, worker_id: str, now: Optional[float] = None) -> Optional[Job]:
+        """Take the oldest pending job under a lease.
+
+        Args:
+            worker_id: ID of the claiming worker
+            now: Current unix time (tests)
+
+        Returns:
+            The job, or None if the queue is empty
+        """
+        now = time.time() if now is None else now
+        claimed = await self.redis.eval(
+            _CLAIM_SCRIPT, 4,
+            self._key("pending"), self._key("leases"), self._key("owners"), self._key("attempts"),
+            now + self.lease_seconds, worker_id
+        )
+        if not claimed:
+            return None
+
+        job_id, attempts = claimed[0], int(claimed[1])
+        raw = await self.redis.hget(self._key("data"), job_id)
+        data = json.loads(raw)
+        return Job(job_id, data["kind"], data["payload"], attempts, data["max_attempts"])
+
+    async def heartbeat(self, job: Job, worker_id: str, now: Optional[float] = None) -> bool:
+        """Extend a lease.
+
+        Returns:
+            False if the lease was lost (expired and requeued)
+        """
+        now = time.time() if now is None else now
+        return bool(await self.redis.eval(
+            _HEARTBEAT_SCRIPT, 2,
+            self._key("leases"), self._key("owners"),
+            job.id, worker_id, now + self.lease_seconds
+        ))
+
+    async def complete(self, job: Job, worker_id: str) -> bool:
+        """Acknowledge a finished job and forget it.
+
+        Returns:
+            False if the lease had been lost in the meantime
+        """
+        return bool(await self.redis.eval(
+            _COMPLETE_SCRIPT, 4,
+            self._key("leases"), self._key("owners"), self._key("attempts"), self._key("data"),
+            job.id, worker_id
+        ))
+
+    async def fail(self, job: Job, worker_id: str, error: str) -> str:
+        """Release a failed job for a retry, or dead-letter it.
+
+        Returns:
+            ``retried``, ``dead`` or ``lost`` (lease no longer held)
+        """
+        outcome = await self._release(job.id, worker_id, job.max_attempts, error)
+        logger.warning("job_failed", queue=self.name, job_id=job.id, kind=job.kind,
+                       attempts=job.attempts, outcome=outcome, error=error)
+        return outcome
+
+    async def _release(self, job_id: str, owner: str, max_attempts: int, error: str, now: float = 0.0) -> str:
+        result = await self.redis.eval(
+            _RELEASE_SCRIPT, 7,
+            self._key("leases"), self._key("owners"), self._key("attempts"),
+            self._key("pending"), self._key("dead"), self._key("data"), self._key("dead_jobs"),
+            job_id, owner, max_attempts, error, now
+        )
+        return {1: "retried", 0: "dead", -1: "lost"}[int(result)]
+
+    async def requeue_expired(self, now: Optional[float] = None) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue.
+
+        Every worker reaps, so the release re-checks the lease atomically:
+        a lease another reaper already released, or one a heartbeat renewed
+        after the scan, is left alone.
+
+        Returns:
+            Number of expired leases released
+        """
+        now = time.time() if now is None else now
+        expired = await self.redis.zrangebyscore(self._key("leases"), "-inf", now)
+        released = 0
+        for job_id in expired:
+            raw = await self.redis.hget(self._key("data"), job_id)
+            max_attempts = json.loads(raw)["max_attempts"] if raw else self.max_attempts
+            outcome = await self._release(job_id, "", max_attempts, "lease expired", now)
+            if outcome == "lost":
+                continue
+            released += 1
+            logger.warning("job_lease_expired", queue=self.name, job_id=job_id, outcome=outcome)
+        return released
+
+    async def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Jobs that used up their attempts, newest first."""
+        job_ids = await self.redis.lrange(self._key("dead"), 0, limit - 1)
+        jobs = []
+        for job_id in job_ids:
+            raw = await self.redis.hget(self._key("dead_jobs"), job_id)
+            if raw:
+                jobs.append(json.loads(raw))
+        return jobs
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Queue depth by state."""
+        return {
+            "pending": await self.redis.llen(self._key("pending")),
+            "leased": await self.redis.zcard(self._key("leases")),
+            "dead": await self.redis.llen(self._key("dead")),
+        }
+
+
+# Global generation queue (on the cache service's Redis)
+job_queue = JobQueue()
@@ -0,0 +1,276 @@
+"""Global admission control for Gemini traffic.
+
+Every model call (orchestrator fan-out, custom briefings, the daily batch)
+passes through one ``LLMGovernor`` so they share a single concurrency
+limit and the provider's requests/tokens-per-minute quotas.
+
+The concurrency limit adapts with AIMD: each healthy call adds
+``1/limit`` (about +1 per window of calls), while a 429 halves the limit
+and a latency spike well above the running baseline trims it. Decreases
+are rate-limited so one burst of failures counts as a single signal.
+
+Configuration (environment):
+    LLM_INITIAL_CONCURRENCY: starting concurrency limit (default 8)
+    LLM_MAX_CONCURRENCY: upper bound for the limit (default 32)
+    LLM_RPM_LIMIT: requests per minute, 0 for unlimited (default 0)
+    LLM_TPM_LIMIT: tokens per minute, 0 for unlimited (default 0)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+import structlog
+
+from agents.usage import usage_from_response
+
+logger = structlog.get_logger()
+
+RATE_WINDOW_SECONDS = 60.0
+
+# Rough output allowance used when estimating a call's token cost up front
+DEFAULT_OUTPUT_TOKENS = 1024
+
+
+def estimate_tokens(prompt: str, output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    """Estimate the tokens a call will consume (about 4 chars per token)."""
+    return len(prompt) // 4 + output_tokens
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception is the provider telling us to slow down."""
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error)
+    return "429" in message or "quota" in message.lower()
+
+
+class Permit:
+    """An admitted call; reports actual token usage back to the governor."""
+
+    def __init__(self, window_entry: List[float]):
+        self._window_entry = window_entry
+
+    def record_tokens(self, total_tokens: int):
+        """Replace the admission estimate with the call's real token count."""
+        if total_tokens:
+            self._window_entry[1] = total_tokens
+
+
+class LLMGovernor:
+    """AIMD concurrency limit plus RPM/TPM budgets for all model calls."""
+
+    def __init__(
+        self,
+        initial_limit: Optional[int] = None,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        latency_spike_ratio: float = 2.5,
+        backoff_cooldown: float = 2.0
+    ):
+        """Initialize governor.
+
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            rpm_limit: Requests per minute (0 or None for unlimited)
+            tpm_limit: Tokens per minute (0 or None for unlimited)
+            latency_spike_ratio: Latency above baseline * ratio triggers backoff
+            backoff_cooldown: Minimum seconds between two decreases
+        """
+        if initial_limit is None:
+            initial_limit = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+        if max_limit is None:
+            max_limit = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+        if rpm_limit is None:
+            rpm_limit = int(os.getenv("LLM_RPM_LIMIT", "0"))
+        if tpm_limit is None:
+            tpm_limit = int(os.getenv("LLM_TPM_LIMIT", "0"))
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.rpm_limit = rpm_limit or None
+        self.tpm_limit = tpm_limit or None
+        self.latency_spike_ratio = latency_spike_ratio
+        self.backoff_cooldown = backoff_cooldown
+
+        self.in_flight = 0
+        self.queue_depth = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._cond_loop: Optional[asyncio.AbstractEventLoop] = None
+        # [timestamp, tokens] per admitted call in the last minute
+        self._window: Deque[List[float]] = deque()
+        self._baseline_ms: Optional[float] = None
+        self._latency_samples = 0
+        self._last_decrease = 0.0
+
+        self.stats = {
+            "admitted": 0,
+            "rate_limited": 0,
+            "latency_backoffs": 0,
+            "max_queue_depth": 0,
+            "queue_wait_ms_total": 0.0,
+        }
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0, track_latency: bool = True) -> AsyncIterator[Permit]:
+        """Hold an admission slot for the duration of a model call.
+
+        Args:
+            estimated_tokens: Expected prompt + output tokens for TPM budgeting
+            track_latency: Feed the call's latency into spike detection
+                (disable for streams, whose duration tracks output length)
+
+        Yields:
+            Permit for reporting the call's real token usage
+        """
+        permit = await self._acquire(estimated_tokens)
+        start = time.perf_counter()
+        try:
+            yield permit
+        except BaseException as e:
+            if isinstance(e, Exception) and is_rate_limit_error(e):
+                self._on_rate_limited()
+            raise
+        else:
+            if track_latency:
+                self._on_success((time.perf_counter() - start) * 1000)
+            else:
+                self._increase()
+        finally:
+            await self._release()
+
+    async def run(self, call: Callable[[], Awaitable[Any]], estimated_tokens: int = 0) -> Any:
+        """Run a non-streaming model call under the governor.
+
+        Args:
+            call: Zero-argument callable creating the call coroutine
+            estimated_tokens: Expected prompt + output tokens
+
+        Returns:
+            The model response
+        """
+        async with self.slot(estimated_tokens) as permit:
+            response = await call()
+            permit.record_tokens(usage_from_response(response)["total_tokens"])
+            return response
+
+    def _condition(self) -> asyncio.Condition:
+        """Condition bound to the running loop (the governor is a global)."""
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._cond_loop is not loop:
+            self._cond = asyncio.Condition()
+            self._cond_loop = loop
+        return self._cond
+
+    async def _acquire(self, estimated_tokens: int) -> Permit:
+        queued_at = time.perf_counter()
+        cond = self._condition()
+        async with cond:
+            self.queue_depth += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+            try:
+                while True:
+                    wait = self._admission_delay(estimated_tokens)
+                    if wait == 0.0:
+                        break
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.queue_depth -= 1
+
+            self.in_flight += 1
+            entry = [time.monotonic(), float(estimated_tokens)]
+            self._window.append(entry)
+            self.stats["admitted"] += 1
+            self.stats["queue_wait_ms_total"] += (time.perf_counter() - queued_at) * 1000
+            return Permit(entry)
+
+    async def _release(self):
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    def _admission_delay(self, estimated_tokens: int) -> Optional[float]:
+        """0.0 to admit now, otherwise seconds to wait (None until notified)."""
+        if self.in_flight >= int(self.limit):
+            return None
+
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= RATE_WINDOW_SECONDS:
+            self._window.popleft()
+        if not self._window:
+            return 0.0
+
+        until_oldest_expires = RATE_WINDOW_SECONDS - (now - self._window[0][0])
+        if self.rpm_limit and len(self._window) >= self.rpm_limit:
+            return until_oldest_expires
+        if self.tpm_limit:
+            used = sum(tokens for _, tokens in self._window)
+            if used + estimated_tokens > self.tpm_limit:
+                return until_oldest_expires
+        return 0.0
+
+    def _on_success(self, latency_ms: float):
+        self._latency_samples += 1
+        if self._baseline_ms is None:
+            self._baseline_ms = latency_ms
+        elif self._latency_samples > 10 and latency_ms > self._baseline_ms * self.latency_spike_ratio:
+            if self._decrease(0.8):
+                self.stats["latency_backoffs"] += 1
+                logger.info("llm_governor_latency_backoff",
+                           latency_ms=round(latency_ms, 1),
+                           baseline_ms=round(self._baseline_ms, 1),
+                           limit=self.limit)
+            return
+        else:
+            self._baseline_ms = 0.9 * self._baseline_ms + 0.1 * latency_ms
+        self._increase()
+
+    def _on_rate_limited(self):
+        self.stats["rate_limited"] += 1
+        if self._decrease(0.5):
+            logger.warning("llm_governor_rate_limited", limit=self.limit)
+
+    def _increase(self):
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, factor: float) -> bool:
+        now = time.monotonic()
+        if now - self._last_decrease < self.backoff_cooldown:
+            return False
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Concurrency, queue and budget usage for metrics endpoints."""
+        now = time.monotonic()
+        recent = [tokens for ts, tokens in self._window if now - ts < RATE_WINDOW_SECONDS]
+        admitted = self.stats["admitted"]
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "requests_last_minute": len(recent),
+            "tokens_last_minute": int(sum(recent)),
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "baseline_latency_ms": round(self._baseline_ms or 0.0, 1),
+            **self.stats,
+            "avg_queue_wait_ms": self.stats["queue_wait_ms_total"] / admitted if admitted else 0.0,
+        }
+
+
+# Global governor shared by all agents
+llm_governor = LLMGovernor()
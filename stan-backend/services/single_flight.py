@@ -0,0 +1,297 @@
+"""Single-flight coalescing of duplicate generations.
+
+When many requests miss the cache for the same key at once (e.g. hundreds
+of users opening the app before the 6am batch has finished), only one
+generation should run. ``SingleFlight.do`` runs the callback once per key
+per process and hands its result to every concurrent caller.
+
+Across processes a short Redis lock (``lock:<key>``) elects one generator;
+the other processes wait for the result to appear in the cache. Waiters
+that time out fall back to polling the cache, and generate themselves only
+if nothing shows up.
+
+``SingleFlight.stream`` does the same for streamed generations: one task
+drives the stream and every concurrent caller follows its events.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from services.analytics_service import analytics_service
+from services.cache_service import cache_service
+
+logger = structlog.get_logger()
+
+CacheGetter = Callable[[], Awaitable[Optional[Any]]]
+
+
+class _Broadcast:
+    """Events of one streamed generation, replayed to every follower."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.executed = False
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Any):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        """Every event so far, then the rest as they are published."""
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """Run at most one generation per key and share its result."""
+
+    def __init__(
+        self,
+        wait_timeout: float = 60.0,
+        lock_ttl: float = 120.0,
+        poll_interval: float = 0.5,
+        distributed: bool = True
+    ):
+        """Initialize single-flight group.
+
+        Args:
+            wait_timeout: Seconds a waiter waits for the running generation
+            lock_ttl: Seconds before a Redis lock expires (crashed holders)
+            poll_interval: Seconds between cache polls while waiting
+            distributed: Coordinate with other processes through Redis
+        """
+        self.wait_timeout = wait_timeout
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.distributed = distributed
+
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0,
+            "remote_waits": 0,
+            "timeouts": 0,
+        }
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cache_get: Optional[CacheGetter] = None
+    ) -> Tuple[Any, bool]:
+        """Run ``fn`` once for ``key`` across all concurrent callers.
+
+        Args:
+            key: Coalescing key, normally the briefing cache key
+            fn: Zero-argument coroutine function producing the result
+            cache_get: Reads the result from the cache (used when waiting
+                on another process or after a timeout)
+
+        Returns:
+            Tuple of (result, executed). ``executed`` is True only for the
+            caller whose ``fn`` actually ran.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            analytics_service.record_metric("single_flight_coalesced")
+            logger.info("single_flight_joined", key=key)
+            return await self._wait(key, future, fn, cache_get), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result, executed = await self._lead(key, fn, cache_get)
+            future.set_result(result)
+            return result, executed
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure is not logged by asyncio
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _lead(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cache_get: Optional[CacheGetter]
+    ) -> Tuple[Any, bool]:
+        """Generate as this process's leader, deferring to a remote holder."""
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+
+        if self.distributed and cache_get is not None:
+            acquired = await cache_service.acquire_lock(lock_key, token, int(self.lock_ttl * 1000))
+            if not acquired:
+                self.stats["remote_waits"] += 1
+                logger.info("single_flight_waiting_on_remote", key=key)
+                cached = await self._poll_cache(cache_get, self.wait_timeout)
+                if cached is not None:
+                    return cached, False
+                self.stats["timeouts"] += 1
+                logger.warning("single_flight_remote_timeout", key=key)
+                return await self._execute(fn), True
+
+            try:
+                return await self._execute(fn), True
+            finally:
+                await cache_service.release_lock(lock_key, token)
+
+        return await self._execute(fn), True
+
+    async def _execute(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["executions"] += 1
+        return await fn()
+
+    async def _wait(
+        self,
+        key: str,
+        future: asyncio.Future,
+        fn: Callable[[], Awaitable[Any]],
+        cache_get: Optional[CacheGetter]
+    ) -> Any:
+        """Wait for the in-process leader, then fall back to the cache."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.wait_timeout)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The leader's request was cancelled; take over the generation
+            logger.info("single_flight_leader_cancelled", key=key)
+            result, _ = await self.do(key, fn, cache_get)
+            return result
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning("single_flight_wait_timeout", key=key)
+
+        if cache_get is not None:
+            cached = await self._poll_cache(cache_get, self.wait_timeout)
+            if cached is not None:
+                return cached
+        raise asyncio.TimeoutError(f"Timed out waiting for generation of {key}")
+
+    async def _poll_cache(self, cache_get: CacheGetter, timeout: float) -> Optional[Any]:
+        """Poll the cache until a value appears or the timeout passes."""
+        deadline = time.monotonic() + timeout
+        while True:
+            cached = await cache_get()
+            if cached is not None:
+                return cached
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(self.poll_interval)
+
+    async def stream(
+        self,
+        key: str,
+        fn: Callable[[], AsyncIterator[Any]],
+        cache_get: Optional[CacheGetter] = None,
+        replay: Optional[Callable[[Any], List[Any]]] = None
+    ) -> AsyncIterator[Tuple[Any, bool]]:
+        """Stream ``fn`` once for ``key``; concurrent callers follow its events.
+
+        The stream runs in its own task, so a caller that disconnects
+        doesn't cut it short for the others (or before it is cached).
+
+        Args:
+            key: Coalescing key, normally the briefing cache key
+            fn: Zero-argument function returning the event stream
+            cache_get: Reads the finished result from the cache (used when
+                another process holds the key)
+            replay: Turns a cached result into events
+
+        Yields:
+            Tuples of (event, executed). ``executed`` is True only for the
+            caller that started a stream which actually generated.
+        """
+        broadcast = self._streams.get(key)
+        started = broadcast is None
+        if started:
+            broadcast = self._streams[key] = _Broadcast()
+            broadcast.task = asyncio.create_task(self._drive(key, broadcast, fn, cache_get, replay))
+        else:
+            self.stats["coalesced"] += 1
+            analytics_service.record_metric("single_flight_coalesced")
+            logger.info("single_flight_stream_joined", key=key)
+
+        async for event in broadcast.follow():
+            yield event, started and broadcast.executed
+
+    async def _drive(
+        self,
+        key: str,
+        broadcast: _Broadcast,
+        fn: Callable[[], AsyncIterator[Any]],
+        cache_get: Optional[CacheGetter],
+        replay: Optional[Callable[[Any], List[Any]]]
+    ):
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        locked = False
+        try:
+            if self.distributed and cache_get is not None and replay is not None:
+                locked = await cache_service.acquire_lock(lock_key, token, int(self.lock_ttl * 1000))
+                if not locked:
+                    self.stats["remote_waits"] += 1
+                    logger.info("single_flight_waiting_on_remote", key=key)
+                    cached = await self._poll_cache(cache_get, self.wait_timeout)
+                    if cached is not None:
+                        for event in replay(cached):
+                            broadcast.publish(event)
+                        broadcast.finish()
+                        return
+                    self.stats["timeouts"] += 1
+                    logger.warning("single_flight_remote_timeout", key=key)
+
+            self.stats["executions"] += 1
+            broadcast.executed = True
+            async for event in fn():
+                broadcast.publish(event)
+            broadcast.finish()
+        except BaseException as e:
+            broadcast.finish(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            del self._streams[key]
+            if locked:
+                await cache_service.release_lock(lock_key, token)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being generated in this process."""
+        return len(self._inflight) + len(self._streams)
+
+
+# Global single-flight group for briefing generation
+single_flight = SingleFlight()
@@ -0,0 +1,144 @@
+"""Bounded worker pool for batch generation.
+
+A fixed number of workers pull items from a queue, so a new request
+starts the moment any earlier one finishes instead of waiting for the
+slowest member of a fixed chunk. Failed items are re-queued with backoff
+without holding a worker, and an optional target rate spaces out request
+starts for upstream quotas.
+
+``drain`` stops handing out new items and lets the ones in flight finish,
+for graceful shutdown; items that never started are left out of the
+results.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# Result placeholder for items that were never started (drained)
+_NOT_RUN = object()
+
+
+class WorkerPool:
+    """Run a handler over many items with bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = 5,
+        max_retries: int = 1,
+        retry_backoff: float = 1.0,
+        rate_per_second: Optional[float] = None
+    ):
+        """Initialize pool.
+
+        Args:
+            concurrency: Workers running at once
+            max_retries: Extra attempts per item after a failure
+            retry_backoff: Seconds before the first retry (doubles each time)
+            rate_per_second: Maximum item starts per second (None = unlimited)
+        """
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.rate_per_second = rate_per_second
+        self.stats: Dict[str, Any] = {}
+        self._draining = False
+        self._in_flight = 0
+        self._all_done: Optional[asyncio.Event] = None
+
+    def drain(self):
+        """Stop starting new items; ``run`` returns once in-flight items finish."""
+        self._draining = True
+        if self._all_done and self._in_flight == 0:
+            self._all_done.set()
+
+    async def run(
+        self,
+        items: Sequence[Any],
+        handler: Callable[[Any], Awaitable[Any]]
+    ) -> List[Tuple[Any, Any]]:
+        """Process every item.
+
+        Args:
+            items: Work items
+            handler: Coroutine function called with one item; raising
+                triggers a retry
+
+        Returns:
+            (item, result or final exception) pairs in input order, for
+            every item that ran
+        """
+        started = time.perf_counter()
+        self.stats = {"items": len(items), "attempts": 0, "retries": 0, "failures": 0, "drained": 0}
+        if not items:
+            self.stats["duration_ms"] = 0.0
+            return []
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item, 0))
+
+        results: List[Any] = [_NOT_RUN] * len(items)
+        remaining = len(items)
+        all_done = self._all_done = asyncio.Event()
+        if self._draining:
+            all_done.set()
+        next_start = started
+        loop = asyncio.get_running_loop()
+
+        async def pace():
+            nonlocal next_start
+            if not self.rate_per_second:
+                return
+            now = time.perf_counter()
+            slot = max(now, next_start)
+            next_start = slot + 1.0 / self.rate_per_second
+            if slot > now:
+                await asyncio.sleep(slot - now)
+
+        async def worker():
+            nonlocal remaining
+            while True:
+                index, item, attempt = await queue.get()
+                await pace()
+                if self._draining:
+                    continue
+                self.stats["attempts"] += 1
+                self._in_flight += 1
+                try:
+                    results[index] = await handler(item)
+                except Exception as e:
+                    if attempt < self.max_retries:
+                        self.stats["retries"] += 1
+                        delay = self.retry_backoff * (2 ** attempt)
+                        logger.warning("worker_pool_retry", attempt=attempt + 1, delay_s=delay, error=str(e))
+                        loop.call_later(delay, queue.put_nowait, (index, item, attempt + 1))
+                        continue
+                    self.stats["failures"] += 1
+                    results[index] = e
+                finally:
+                    self._in_flight -= 1
+                    if self._draining and self._in_flight == 0:
+                        all_done.set()
+
+                remaining -= 1
+                if remaining == 0:
+                    all_done.set()
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(items)))]
+        try:
+            await all_done.wait()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        duration = time.perf_counter() - started
+        finished = [(item, result) for item, result in zip(items, results) if result is not _NOT_RUN]
+        self.stats["drained"] = len(items) - len(finished)
+        self.stats["duration_ms"] = round(duration * 1000, 1)
+        self.stats["items_per_minute"] = round(len(finished) / duration * 60, 1) if duration else 0.0
+        return finished
@@ -0,0 +1,23 @@
+-- Subscriber and read counts per stan, aggregated in the database
+-- Used to order the daily batch: one row per stan instead of one per
+-- subscription, so the result stays small and under PostgREST's row cap.
+CREATE INDEX IF NOT EXISTS idx_user_stans_v2_stan ON user_stans_v2(stan_name);
+
+CREATE OR REPLACE FUNCTION stan_popularity(p_limit INTEGER DEFAULT 1000)
+RETURNS TABLE (stan_name TEXT, subscribers BIGINT, total_reads BIGINT) AS $$
+  SELECT
+    us.stan_name,
+    COUNT(*) AS subscribers,
+    COALESCE(SUM(us.total_reads), 0) AS total_reads
+  FROM user_stans_v2 us
+  GROUP BY us.stan_name
+  -- Most-followed first, so a limit only drops the long tail
+  ORDER BY subscribers DESC
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Only the backend (service role) reads everyone's subscriptions
+REVOKE EXECUTE ON FUNCTION stan_popularity FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION stan_popularity TO service_role;
+
+COMMENT ON FUNCTION stan_popularity IS 'Subscribers and total reads per stan_name, most-followed first';
@@ -0,0 +1,73 @@
+"""Tests for cross-user memoization of agent calls."""
+
+import asyncio
+import pytest
+from agents.agent_memo import AgentMemo, agent_memo, memoized
+
+
+class CountingAgent:
+    def __init__(self, name="NewsAgent"):
+        self.name = name
+        self.calls = 0
+
+    @memoized(1800)
+    async def search_news(self, query):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"news": f"news about {query} #{self.calls}", "category": "news"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    agent_memo.clear()
+    yield
+    agent_memo.clear()
+
+
+@pytest.mark.asyncio
+async def test_followers_share_one_call_per_normalized_query():
+    agent = CountingAgent()
+
+    results = await asyncio.gather(*[
+        agent.search_news(query) for query in ["BTS", "bts", " BTS ", "BTS"]
+    ])
+
+    assert agent.calls == 1
+    assert all(result == results[0] for result in results)
+    assert (await agent.search_news("Ｂｔｓ"))["news"] == results[0]["news"]
+
+
+@pytest.mark.asyncio
+async def test_agents_and_queries_are_keyed_separately():
+    news, events = CountingAgent("NewsAgent"), CountingAgent("EventsAgent")
+
+    await news.search_news("BTS")
+    await news.search_news("TWICE")
+    await events.search_news("BTS")
+
+    assert news.calls == 2
+    assert events.calls == 1
+
+
+def test_key_rolls_over_with_the_time_bucket():
+    memo = AgentMemo()
+
+    first = memo.key("EventsAgent", "search_events", ("BTS",), 3600, now=7200.0)
+    same = memo.key("EventsAgent", "search_events", ("bts",), 3600, now=10799.0)
+    next_bucket = memo.key("EventsAgent", "search_events", ("BTS",), 3600, now=10800.0)
+
+    assert first == same
+    assert first != next_bucket
+    # Long arguments such as sentiment content are hashed
+    assert len(memo.key("SentimentAgent", "analyze_sentiment", ("x" * 5000,), 60, 0.0)) < 80
+
+
+@pytest.mark.asyncio
+async def test_stats_count_saved_calls():
+    agent = CountingAgent()
+    await agent.search_news("Messi")
+    await agent.search_news("messi")
+
+    stats = agent_memo.get_stats()
+    assert stats["llm_calls_saved"] >= 1
+    assert stats["hit_rate"] > 0
@@ -0,0 +1,108 @@
+"""Tests that LLM generations do not block the event loop."""
+
+import pytest
+import asyncio
+import time
+from agents import batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator
+from agents.base_agent import STANBaseAgent
+from agents.efficient_agent import EfficientBriefingAgent
+
+
+GENERATION_SECONDS = 0.5
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class SlowModel:
+    """Model stub: the sync path blocks the thread, the async path yields."""
+
+    def __init__(self):
+        self.async_calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(GENERATION_SECONDS)
+        return _FakeResponse("## 🔥 Top News & Trending\n- Blocking call")
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.async_calls += 1
+        await asyncio.sleep(GENERATION_SECONDS)
+        return _FakeResponse("## 🔥 Top News & Trending\n- Async call")
+
+
+class InMemoryCache:
+    """Minimal stand-in for cache_service."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=3600):
+        self.data[key] = value
+        return True
+
+    async def increment_score(self, key, member, amount=1, ttl=86400):
+        scores = self.data.setdefault(key, {})
+        scores[member] = scores.get(member, 0) + amount
+        return True
+
+    async def get_scores(self, key):
+        return dict(self.data.get(key, {}))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = InMemoryCache()
+    monkeypatch.setattr(batch_module, "cache_service", fake)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_keep_latency_during_generations(cache):
+    """Cache hits stay fast while several cold generations are in flight."""
+    agent = EfficientBriefingAgent()
+    agent.model = SlowModel()
+    generator = BatchBriefingGenerator(agent=agent)
+
+    # Warm the popular cache for BTS
+    await generator._generate_and_cache_briefing("BTS")
+
+    # Start several custom (cold) generations
+    cold = [
+        asyncio.create_task(generator.get_briefing(f"CustomStan{i}", user_id="user_1"))
+        for i in range(4)
+    ]
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    for _ in range(10):
+        start = time.perf_counter()
+        briefing = await generator.get_briefing("BTS")
+        latencies.append(time.perf_counter() - start)
+        assert "topics" in briefing
+
+    results = await asyncio.gather(*cold)
+
+    assert max(latencies) < GENERATION_SECONDS / 5
+    assert all("Async call" in r["content"] for r in results)
+    assert agent.model.async_calls == 5
+
+
+@pytest.mark.asyncio
+async def test_base_agent_generations_run_concurrently():
+    """Several base agent calls overlap instead of running back to back."""
+    agents = [STANBaseAgent(name=f"Agent{i}") for i in range(4)]
+    for agent in agents:
+        agent.model = SlowModel()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[a.generate_content("ping") for a in agents])
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 4
+    assert elapsed < GENERATION_SECONDS * 2
@@ -0,0 +1,77 @@
+"""Tests for popularity-ordered batch runs."""
+
+import pytest
+from datetime import date
+from agents.batch_generator import BatchBriefingGenerator, stan_requests_key
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from agents.stan_canonicalizer import STAN_ALIASES, StanCanonicalizer
+from services.cache_service import cache_service
+
+
+class FakeDB:
+    async def get_stan_popularity(self):
+        # Raw user-entered names; canonicalized before scoring
+        return {
+            "messi": {"subscribers": 40, "total_reads": 900},
+            "Bangtan Boys": {"subscribers": 50000, "total_reads": 10},
+            "Some Band": {"subscribers": 99999, "total_reads": 0},
+        }
+
+
+class OrderRecordingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(time_scale=0)
+        self.subjects = []
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.subjects.append(prompt.split(" about ", 1)[1].split(" for ", 1)[0])
+        return await super().generate_content_async(prompt, stream=stream)
+
+
+@pytest.fixture
+def request_counts(monkeypatch):
+    counts = {stan_requests_key(date.today()): {"Marvel": 300.0, "TWICE": 3.0}}
+
+    async def fake_get_scores(key):
+        return counts.get(key, {})
+
+    monkeypatch.setattr(cache_service, "get_scores", fake_get_scores)
+    return counts
+
+
+@pytest.mark.asyncio
+async def test_batch_generates_most_read_stans_first(request_counts):
+    backend = OrderRecordingBackend()
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend), db_client=FakeDB())
+    generator.popular_stan_list = ["TWICE", "Marvel", "Lionel Messi", "BTS", "Valorant"]
+    generator.canonicalizer = StanCanonicalizer(generator.popular_stan_list, STAN_ALIASES)
+    generator.concurrency = 1
+
+    stats = await generator.generate_popular_briefings_daily()
+
+    # 50000 subscribers, 40 subscribers + 300/3 requests a day, 40, 1, none
+    assert backend.subjects == ["BTS", "Marvel", "Lionel Messi", "TWICE", "Valorant"]
+    assert stats["first_stans"][0] == "BTS"
+
+
+@pytest.mark.asyncio
+async def test_popular_reads_are_reported_warm_or_cold(request_counts, monkeypatch):
+    cache = {}
+
+    async def fake_get(key):
+        return cache.get(key)
+
+    async def fake_set(key, value, ttl=3600):
+        cache[key] = value
+        return True
+
+    monkeypatch.setattr(cache_service, "get", fake_get)
+    monkeypatch.setattr(cache_service, "set", fake_set)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=FakeBackend(time_scale=0)))
+
+    await generator.get_briefing("BTS")
+    await generator.get_briefing("bts")
+    await generator.get_briefing("My Local Band", user_id="u1")
+
+    assert generator.read_stats == {"warm": 1, "cold": 1}
@@ -0,0 +1,150 @@
+"""Tests for checkpointed, resumable batch runs."""
+
+import asyncio
+import time
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator, batch_run_key, popular_run_id
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+
+
+class RedisLikeCache:
+    """In-memory stand-in for the cache_service calls batch runs make."""
+
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+        self.locks = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=3600):
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return key in self.data
+
+    async def get_fields(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def set_fields(self, key, fields, ttl=3600):
+        self.hashes.setdefault(key, {}).update(fields)
+        return True
+
+    def _lock_holder(self, key):
+        token, expires_at = self.locks.get(key, (None, 0.0))
+        return token if time.monotonic() < expires_at else None
+
+    async def acquire_lock(self, key, token, ttl_ms):
+        if self._lock_holder(key):
+            return False
+        self.locks[key] = (token, time.monotonic() + ttl_ms / 1000)
+        return True
+
+    async def extend_lock(self, key, token, ttl_ms):
+        if self._lock_holder(key) != token:
+            return False
+        self.locks[key] = (token, time.monotonic() + ttl_ms / 1000)
+        return True
+
+    async def release_lock(self, key, token):
+        if self._lock_holder(key) == token:
+            del self.locks[key]
+            return True
+        return False
+
+    async def get_scores(self, key):
+        return {}
+
+    async def increment_score(self, key, member, amount=1, ttl=86400):
+        return True
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", fake)
+    return fake
+
+
+def make_generator(latency_ms=0):
+    backend = FakeBackend(latency_ms=latency_ms, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend))
+    generator.popular_stan_list = ["BTS", "TWICE", "Messi", "Valorant"]
+    return generator, backend
+
+
+@pytest.mark.asyncio
+async def test_rerun_only_generates_missing_stans(cache):
+    generator, backend = make_generator()
+
+    first = await generator.generate_popular_briefings_daily()
+    cache.data.pop(generator._popular_cache_key("Messi"))
+    cache.hashes[batch_run_key(popular_run_id())].pop("stan:Messi")
+    second = await generator.generate_popular_briefings_daily()
+
+    assert first["successes"] == 4
+    assert second["skipped"] == 3
+    assert second["planned_requests"] == 1
+    assert second["resumed"] is True
+    assert backend.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_drained_run_resumes_after_restart(cache):
+    generator, backend = make_generator(latency_ms=50)
+    generator.concurrency = 1
+
+    run = asyncio.create_task(generator.generate_popular_briefings_daily())
+    await asyncio.sleep(0.02)
+    assert await generator.drain(timeout=2)
+    stats = await run
+
+    assert stats["status"] == "interrupted"
+    assert stats["successes"] == 1
+    status = await generator.get_run_status(popular_run_id())
+    assert status["status"] == "interrupted"
+    assert status["pending"] == 3
+
+    # A new process picks the run up where it stopped
+    restarted, restarted_backend = make_generator()
+    resumed = await restarted.resume_interrupted_run()
+
+    assert resumed["status"] == "completed"
+    assert resumed["successes"] == 3
+    assert backend.calls + restarted_backend.calls == 4
+    assert await restarted.resume_interrupted_run() is None
+
+
+@pytest.mark.asyncio
+async def test_resume_waits_out_the_crashed_processs_lock(cache, monkeypatch):
+    monkeypatch.setattr(batch_module, "RUN_LOCK_TTL_MS", 200)
+    monkeypatch.setattr(batch_module, "RESUME_POLL_SECONDS", 0.05)
+    run_id = popular_run_id()
+    cache.hashes[batch_run_key(run_id)] = {"status": "running", "stan:BTS": "done"}
+    # The crashed process took the lock just before dying
+    await cache.acquire_lock(f"lock:{batch_run_key(run_id)}", "dead-process", 200)
+
+    restarted, backend = make_generator()
+    resumed = await restarted.resume_interrupted_run()
+
+    assert resumed["status"] == "completed"
+    assert resumed["successes"] == 3
+    assert backend.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_trigger_does_not_start_a_second_run(cache):
+    generator, _ = make_generator(latency_ms=30)
+    other, other_backend = make_generator()
+
+    run = asyncio.create_task(generator.generate_popular_briefings_daily())
+    await asyncio.sleep(0.01)
+    duplicate = await other.generate_popular_briefings_daily()
+    await run
+
+    assert duplicate["status"] == "already_running"
+    assert other_backend.calls == 0
@@ -0,0 +1,78 @@
+"""Golden-corpus tests for the single-pass briefing parser."""
+
+import json
+from pathlib import Path
+
+import pytest
+from agents.briefing_parser import BriefingParser, extract_sources, parse_briefing
+from agents.efficient_agent import EfficientBriefingAgent
+
+
+CORPUS_DIR = Path(__file__).parent / "fixtures" / "briefings"
+CORPUS = sorted(CORPUS_DIR.glob("*.md"))
+
+
+def _load(path: Path):
+    text = path.read_bytes().decode("utf-8")  # keep CRLF line endings
+    expected = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    return text, expected
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return EfficientBriefingAgent()
+
+
+def test_corpus_is_not_empty():
+    assert len(CORPUS) >= 5
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.stem)
+def test_parse_response_matches_golden_output(agent, path):
+    """Recorded model outputs parse to the recorded briefings."""
+    text, expected = _load(path)
+
+    briefing = agent._parse_response(text, path.stem)
+
+    assert briefing["content"] == text
+    assert briefing["summary"] == expected["summary"]
+    assert briefing["sources"] == expected["sources"]
+    assert briefing["searchSources"] == expected["sources"]
+    assert briefing["topics"] == expected["topics"]
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.stem)
+def test_streamed_parse_matches_golden_output(agent, path):
+    """Feeding the same output in small chunks gives the same briefing."""
+    text, expected = _load(path)
+
+    parser = BriefingParser()
+    for i in range(0, len(text), 13):
+        parser.feed(text[i:i + 13])
+    parser.close()
+    briefing = agent._build_briefing(parser, text, path.stem)
+
+    assert briefing["summary"] == expected["summary"]
+    assert briefing["sources"] == expected["sources"]
+    assert briefing["topics"] == expected["topics"]
+
+
+def test_global_sources_are_deduplicated_in_order():
+    text = (
+        "## A\n- [one](https://a.example/1) and https://b.example/2.\n"
+        "## B\n- again [one](https://a.example/1)\n"
+    )
+    parser = parse_briefing(text)
+
+    assert parser.sources == ["https://a.example/1", "https://b.example/2"]
+    assert parser.sections["B"]["sources"] == ["https://a.example/1"]
+
+
+def test_extract_sources_ignores_non_http_links():
+    text = "[local](/relative/path) see <https://c.example/x> and [mail](mailto:x@y.z)"
+    assert extract_sources(text) == ["https://c.example/x"]
+
+
+def test_summary_falls_back_without_news_bullets(agent):
+    briefing = agent._parse_response("## 📅 Upcoming Events\n- Concert", "BTS")
+    assert briefing["summary"] == "Latest updates and highlights about BTS."
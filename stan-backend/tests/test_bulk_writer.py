@@ -0,0 +1,100 @@
+"""Tests for batched upserts."""
+
+import asyncio
+import pytest
+from database.bulk_writer import BulkWriter
+
+
+class FakeSupabase:
+    """Records upserts the way PostgREST applies them."""
+
+    def __init__(self, failures=0):
+        self.rows = {}
+        self.calls = []
+        self.failures = failures
+
+    def table(self, name):
+        return FakeUpsert(self, name)
+
+
+class FakeUpsert:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+
+    def upsert(self, rows, on_conflict):
+        self.batch = rows if isinstance(rows, list) else [rows]
+        self.columns = on_conflict.split(",")
+        return self
+
+    def execute(self):
+        if self.db.failures:
+            self.db.failures -= 1
+            raise ConnectionError("connection reset")
+        keys = [tuple(row[column] for column in self.columns) for row in self.batch]
+        if len(set(keys)) != len(keys):
+            raise ValueError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+        self.db.calls.append((self.table, len(self.batch)))
+        for key, row in zip(keys, self.batch):
+            self.db.rows[(self.table, *key)] = row
+        return self
+
+
+def row(stan_id, content="today", date="2026-01-01"):
+    return {"stan_id": stan_id, "date": date, "content": content}
+
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_batches():
+    db = FakeSupabase()
+    async with BulkWriter(db, "daily_briefings", "stan_id,date", batch_size=4, flush_interval=0) as writer:
+        for i in range(10):
+            await writer.add(row(f"s{i}"))
+        assert [size for _, size in db.calls] == [4, 4]
+
+    assert [size for _, size in db.calls] == [4, 4, 2]
+    stats = writer.get_stats()
+    assert stats["rows_written"] == 10
+    assert stats["batches"] == 3
+    assert stats["pending"] == 0
+    assert stats["rows_per_second"] > 0
+
+
+@pytest.mark.asyncio
+async def test_same_key_in_a_batch_keeps_the_last_row():
+    db = FakeSupabase()
+    async with BulkWriter(db, "daily_briefings", "stan_id,date", batch_size=10, flush_interval=0) as writer:
+        await writer.add(row("s1", "first"))
+        await writer.add(row("s1", "second"))
+        await writer.add(row("s1", "other day", date="2026-01-02"))
+
+    assert db.rows[("daily_briefings", "s1", "2026-01-01")]["content"] == "second"
+    assert writer.stats["rows_collapsed"] == 1
+    assert writer.stats["rows_written"] == 2
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_flushed_after_the_interval():
+    db = FakeSupabase()
+    writer = BulkWriter(db, "daily_briefings", "stan_id,date", batch_size=100, flush_interval=0.05)
+    await writer.add(row("s1"))
+    assert db.calls == []
+
+    await asyncio.sleep(0.1)
+    assert db.calls == [("daily_briefings", 1)]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried_then_counted():
+    db = FakeSupabase(failures=1)
+    async with BulkWriter(db, "daily_briefings", "stan_id,date", batch_size=2, flush_interval=0) as writer:
+        await writer.add(row("s1"))
+        await writer.add(row("s2"))
+    assert writer.stats["rows_written"] == 2
+
+    db.failures = 5
+    async with BulkWriter(db, "daily_briefings", "stan_id,date", batch_size=2, flush_interval=0) as writer:
+        await writer.add(row("s3"))
+    assert writer.stats["rows_failed"] == 1
+    assert ("daily_briefings", "s3", "2026-01-01") not in db.rows
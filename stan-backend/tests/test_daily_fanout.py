@@ -0,0 +1,113 @@
+"""Tests for deduplicated daily briefing generation."""
+
+import asyncio
+import pytest
+from agents.daily_fanout import DailyBriefingFanout, settings_fingerprint
+from database.bulk_writer import BulkWriter
+from tests.test_bulk_writer import FakeSupabase
+
+SETTING_KEYS = ("include_news", "include_videos")
+
+
+class FakeOrchestrator:
+    setting_keys = SETTING_KEYS
+
+    def __init__(self, fail_for=()):
+        self.calls = []
+        self.fail_for = set(fail_for)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_comprehensive_briefing(self, stan_data, custom_settings=None):
+        self.calls.append((stan_data["name"], custom_settings))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if stan_data["name"] in self.fail_for:
+            raise RuntimeError("model unavailable")
+        return {"content": f"{stan_data['name']} today", "summary": "", "sources": [], "topics": []}
+
+
+class FakeDatabase:
+    def __init__(self, users):
+        self.users = users
+        self.client = FakeSupabase()
+
+    @property
+    def stored(self):
+        return {(row["user_id"], row["stan_id"]): row for row in self.client.rows.values()}
+
+    async def get_all_users_with_stans(self):
+        return self.users
+
+    def daily_briefings_writer(self):
+        return BulkWriter(self.client, "daily_briefings", "stan_id,date", batch_size=20, flush_interval=0)
+
+
+def user(user_id, *stans, settings=None):
+    return {
+        "id": user_id,
+        "stans": [{"id": f"{user_id}-{name}", "name": name} for name in stans],
+        "custom_settings": settings or {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_followers_of_a_stan_share_one_generation():
+    users = [user(f"u{i}", "BTS") for i in range(50)]
+    users.append(user("x", "bts", "Taylor Swift"))
+    db = FakeDatabase(users)
+    orchestrator = FakeOrchestrator()
+
+    stats = await DailyBriefingFanout(orchestrator, db).run()
+
+    assert stats["total_items"] == 52
+    assert stats["unique_items"] == 2
+    assert stats["stored"] == 52
+    assert stats["generations_saved"] == 50
+    assert sorted(name for name, _ in orchestrator.calls) == ["BTS", "Taylor Swift"]
+    assert db.stored[("x", "x-bts")]["content"] == "BTS today"
+    # 52 rows in three upserts instead of 104 round trips
+    assert len(db.client.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_settings_that_change_the_briefing_split_groups():
+    users = [
+        user("a", "BTS", settings={"a-BTS": {"id": 1, "include_videos": False}}),
+        user("b", "BTS", settings={"b-BTS": {"id": 2, "include_videos": False, "updated_at": "x"}}),
+        user("c", "BTS", settings={"c-BTS": {"id": 3, "include_news": True}}),
+        user("d", "BTS"),
+    ]
+    orchestrator = FakeOrchestrator()
+
+    stats = await DailyBriefingFanout(orchestrator, FakeDatabase(users)).run()
+
+    # a/b differ only in bookkeeping fields; c spells out the default
+    assert stats["unique_items"] == 2
+    assert len(orchestrator.calls) == 2
+
+
+def test_fingerprint_ignores_bookkeeping_and_defaults():
+    assert settings_fingerprint(None, SETTING_KEYS) == settings_fingerprint(
+        {"id": 7, "include_news": True}, SETTING_KEYS)
+    assert settings_fingerprint(None, SETTING_KEYS) != settings_fingerprint(
+        {"include_news": False}, SETTING_KEYS)
+
+
+@pytest.mark.asyncio
+async def test_generation_is_bounded_and_failures_are_isolated(monkeypatch):
+    monkeypatch.setenv("DAILY_BRIEFING_CONCURRENCY", "3")
+    monkeypatch.setenv("DAILY_BRIEFING_MAX_RETRIES", "0")
+    users = [user(f"u{i}", f"Custom Stan {i}") for i in range(10)]
+    db = FakeDatabase(users)
+    orchestrator = FakeOrchestrator(fail_for={"Custom Stan 4"})
+
+    stats = await DailyBriefingFanout(orchestrator, db).run()
+
+    assert orchestrator.max_in_flight == 3
+    assert stats["generated"] == 9
+    assert stats["failed"] == 1
+    assert ("u4", "u4-Custom Stan 4") not in db.stored
+    assert len(db.stored) == 9
@@ -0,0 +1,134 @@
+"""Tests for briefings_v2 as the durable tier behind Redis."""
+
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from tests.test_batch_runs import RedisLikeCache
+
+
+class FakeBriefingsTable:
+    """briefings_v2 rows keyed by (stan_name, date)."""
+
+    def __init__(self, fail_writes=False):
+        self.rows = {}
+        self.fail_writes = fail_writes
+
+    async def store_briefing_v2(self, row):
+        if self.fail_writes:
+            raise ConnectionError("database unavailable")
+        self.rows[(row["stan_name"], row["date"])] = row
+        return row
+
+    async def get_briefings_v2(self, stan_names, day=None):
+        day = day or datetime.now().date().isoformat()
+        return [row for (name, row_day), row in self.rows.items() if name in stan_names and row_day == day]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", fake)
+    return fake
+
+
+def make_generator(db):
+    backend = FakeBackend(latency_ms=0, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend), db_client=db)
+    generator.popular_stan_list = ["BTS", "TWICE", "Messi"]
+    return generator, backend
+
+
+@pytest.mark.asyncio
+async def test_generated_briefings_are_written_through(cache):
+    db = FakeBriefingsTable()
+    generator, _ = make_generator(db)
+
+    briefing = await generator.get_briefing("BTS")
+
+    row = db.rows[("BTS", datetime.now().date().isoformat())]
+    assert row["is_popular"] is True
+    assert row["stan_category"] == "kpop"
+    assert row["content"]["summary"] == briefing["summary"]
+    assert generator.durable_stats["written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_miss_is_served_from_the_table_and_recached(cache):
+    db = FakeBriefingsTable()
+    generator, backend = make_generator(db)
+    first = await generator.get_briefing("BTS")
+    calls = backend.calls
+
+    cache.data.clear()  # Redis flushed or restarted
+    again = await generator.get_briefing("bts")
+
+    assert backend.calls == calls
+    assert again["summary"] == first["summary"]
+    assert again["metadata"]["served_from_cache"] is True
+    assert await cache.exists(generator._popular_cache_key("BTS"))
+    assert generator.read_stats == {"warm": 1, "cold": 1}
+
+
+@pytest.mark.asyncio
+async def test_daily_run_after_a_flush_reuses_stored_briefings(cache):
+    db = FakeBriefingsTable()
+    generator, backend = make_generator(db)
+    await generator.generate_popular_briefings_daily(run_id="day-1")
+    calls = backend.calls
+
+    cache.data.clear()
+    restarted, restarted_backend = make_generator(db)
+    assert await restarted.warm_cache() == 3
+    stats = await restarted.generate_popular_briefings_daily(run_id="day-1-retry")
+
+    assert calls == 3
+    assert restarted_backend.calls == 0
+    assert stats["skipped"] == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_rows_are_regenerated(cache):
+    db = FakeBriefingsTable()
+    generator, backend = make_generator(db)
+    await generator.get_briefing("BTS")
+    for row in db.rows.values():
+        row["expires_at"] = (datetime.now() - timedelta(minutes=1)).isoformat()
+
+    cache.data.clear()
+    await generator.get_briefing("BTS")
+
+    assert backend.calls == 2
+    assert generator.durable_stats["restored"] == 0
+
+
+@pytest.mark.asyncio
+async def test_database_write_failure_does_not_fail_generation(cache):
+    generator, _ = make_generator(FakeBriefingsTable(fail_writes=True))
+
+    briefing = await generator.get_briefing("TWICE")
+
+    assert briefing["topics"]
+    assert generator.durable_stats["write_failures"] == 1
+    assert await cache.exists(generator._popular_cache_key("TWICE"))
+
+
+@pytest.mark.asyncio
+async def test_readers_behind_a_miss_query_the_table_once(cache):
+    db = FakeBriefingsTable()
+    generator, _ = make_generator(db)
+    generator.agent = EfficientBriefingAgent(backend=FakeBackend(latency_ms=30, latency_sigma=0))
+    queries = []
+    get_rows = db.get_briefings_v2
+
+    async def counting_get(stan_names, day=None):
+        queries.append(stan_names)
+        return await get_rows(stan_names, day)
+
+    db.get_briefings_v2 = counting_get
+    await asyncio.gather(*[generator.get_briefing("TWICE") for _ in range(5)])
+
+    assert queries == [["TWICE"]]
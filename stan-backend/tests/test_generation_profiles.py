@@ -0,0 +1,107 @@
+"""Tests for selectable generation profiles."""
+
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.generation_profiles import ProfileStats, get_profile, profile_stats
+from agents.model_backends import FakeBackend
+from tests.test_batch_runs import RedisLikeCache
+
+
+class RecordingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(time_scale=0)
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        return await super().generate_content_async(prompt, stream=stream)
+
+
+@pytest.mark.asyncio
+async def test_fast_profile_asks_for_fewer_sections():
+    backend = RecordingBackend()
+    agent = EfficientBriefingAgent(backend=backend)
+
+    briefing = await agent.generate_briefing("BTS", profile="fast")
+
+    assert "## 📅 Upcoming Events" not in backend.prompts[0]
+    assert "under 200 words" in backend.prompts[0]
+    assert len(briefing["topics"]) == 2
+    assert briefing["metadata"]["profile"] == "fast"
+    assert briefing["metadata"]["model"] == get_profile("fast").model_name
+
+
+@pytest.mark.asyncio
+async def test_profile_latency_and_cost_are_recorded():
+    agent = EfficientBriefingAgent(backend=FakeBackend(time_scale=0), profile="deep")
+    before = profile_stats.get_stats().get("deep", {}).get("generations", 0)
+
+    events = [e async for e in agent.generate_briefing_stream("Messi")]
+
+    assert events[-1]["data"]["metadata"]["profile"] == "deep"
+    stats = profile_stats.get_stats()["deep"]
+    assert stats["generations"] == before + 1
+    assert stats["avg_tokens"] > 0
+
+
+def test_profile_stats_percentiles():
+    stats = ProfileStats()
+    for latency in range(1, 101):
+        stats.record("fast", float(latency), {"total_tokens": 10, "cost_usd": 0.001})
+
+    fast = stats.get_stats()["fast"]
+    assert fast["generations"] == 100
+    assert fast["p95_latency_ms"] == 96.0
+    assert fast["avg_tokens"] == 10
+    assert fast["avg_cost_usd"] == pytest.approx(0.001)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown generation profile"):
+        get_profile("turbo")
+
+
+@pytest.mark.asyncio
+async def test_profiles_use_their_own_shared_model(monkeypatch):
+    monkeypatch.setenv("STAN_MODEL_BACKEND", "fake")
+    monkeypatch.setenv("STAN_FAKE_LATENCY_MS", "0")
+    agent = EfficientBriefingAgent()
+
+    fast_model, fast_name = agent._model_for(get_profile("fast"))
+    standard_model, standard_name = agent._model_for(get_profile("standard"))
+
+    assert fast_name == "gemini-2.0-flash-lite"
+    assert fast_model.model_name == "gemini-2.0-flash-lite"
+    assert standard_model is agent.model
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_its_profile():
+    backend = RecordingBackend()
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend), profile="deep")
+
+    stats = await generator._generate_and_cache_briefing("Valorant")
+
+    assert stats["briefing"]["metadata"]["profile"] == "deep"
+    assert "under 800 words" in backend.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_custom_briefings_are_cached_per_profile(monkeypatch):
+    monkeypatch.setattr(batch_module, "cache_service", RedisLikeCache())
+    backend = RecordingBackend()
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend, profile="standard"))
+
+    fast = await generator.get_briefing("My Local Band", user_id="u1", profile="fast")
+    deep = await generator.get_briefing("My Local Band", user_id="u1", profile="deep")
+    default = await generator.get_briefing("My Local Band", user_id="u1")
+    standard = await generator.get_briefing("My Local Band", user_id="u1", profile="standard")
+
+    assert fast["metadata"]["profile"] == "fast"
+    assert deep["metadata"]["profile"] == "deep"
+    assert "served_from_cache" not in deep["metadata"]
+    assert default["metadata"]["profile"] == "standard"
+    assert standard["metadata"]["served_from_cache"] is True
+    assert len(backend.prompts) == 3
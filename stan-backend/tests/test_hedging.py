@@ -0,0 +1,177 @@
+"""Tests for hedged LLM requests."""
+
+import pytest
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from agents.usage import record_estimated_usage, track_usage
+from services.hedging import HedgePolicy
+
+
+def _call_with_latencies(latencies, calls):
+    """Call factory whose n-th call sleeps latencies[n] seconds."""
+    def factory():
+        index = len(calls)
+        calls.append({"index": index, "cancelled": False})
+
+        async def run():
+            try:
+                await asyncio.sleep(latencies[index])
+            except asyncio.CancelledError:
+                calls[index]["cancelled"] = True
+                raise
+            return index
+
+        return run()
+    return factory
+
+
+class _Permit:
+    def record_tokens(self, total_tokens):
+        pass
+
+
+def _queued_slot(waits):
+    """Slot factory whose n-th admission is delayed waits[n] seconds."""
+    admissions = []
+
+    @asynccontextmanager
+    async def slot():
+        index = len(admissions)
+        admissions.append(index)
+        await asyncio.sleep(waits[index])
+        yield _Permit()
+
+    return slot
+
+
+async def _warm_up(policy, samples=20, latency=0.01):
+    calls = []
+    factory = _call_with_latencies([latency] * samples, calls)
+    for _ in range(samples):
+        await policy.run(factory, key="model")
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_hedge_wins():
+    policy = HedgePolicy(enabled=True, percentile=95, budget_ratio=0.5)
+    await _warm_up(policy)
+
+    calls = []
+    start = time.perf_counter()
+    result = await policy.run(_call_with_latencies([1.0, 0.01], calls), key="model")
+    elapsed = time.perf_counter() - start
+
+    assert result == 1  # the hedge answered
+    assert elapsed < 0.5
+    await asyncio.sleep(0)  # let the cancelled primary unwind
+    assert calls[0]["cancelled"] is True
+
+    stats = policy.get_stats()
+    assert stats["hedges_sent"] == 1
+    assert stats["hedges_won"] == 1
+    assert stats["hedge_rate"] == pytest.approx(1 / 21)
+
+
+@pytest.mark.asyncio
+async def test_hedges_respect_budget():
+    policy = HedgePolicy(enabled=True, percentile=95, budget_ratio=0.0)
+    await _warm_up(policy)
+
+    calls = []
+    result = await policy.run(_call_with_latencies([0.1, 0.01], calls), key="model")
+
+    assert result == 0
+    assert len(calls) == 1
+    assert policy.get_stats()["hedges_denied_by_budget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_policy_never_hedges():
+    policy = HedgePolicy(enabled=False)
+    await _warm_up(policy)
+
+    calls = []
+    assert await policy.run(_call_with_latencies([0.1, 0.01], calls), key="model") == 0
+    assert len(calls) == 1
+    assert policy.get_stats()["hedges_sent"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary():
+    policy = HedgePolicy(enabled=True, percentile=50, budget_ratio=1.0)
+    await _warm_up(policy)
+
+    attempts = []
+
+    def factory():
+        attempts.append(len(attempts))
+        is_hedge = len(attempts) == 2
+
+        async def run():
+            if is_hedge:
+                raise RuntimeError("hedge failed")
+            await asyncio.sleep(0.1)
+            return "primary"
+
+        return run()
+
+    assert await policy.run(factory, key="model") == "primary"
+    assert policy.get_stats()["hedges_won"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_time_is_not_counted_as_latency():
+    policy = HedgePolicy(enabled=True, percentile=95, budget_ratio=1.0)
+    await _warm_up(policy)
+
+    calls = []
+    slot = _queued_slot([0.3, 0.0])
+    result = await policy.run(_call_with_latencies([0.01, 0.01], calls), key="model", slot=slot)
+
+    assert result == 0
+    assert len(calls) == 1  # a long governor queue does not trigger a hedge
+    assert policy.get_stats()["hedges_sent"] == 0
+    assert max(policy.trackers["model"].samples) < 200
+
+
+@pytest.mark.asyncio
+async def test_cancelled_loser_is_reported_as_abandoned():
+    policy = HedgePolicy(enabled=True, percentile=95, budget_ratio=0.5)
+    await _warm_up(policy)
+
+    calls = []
+    with track_usage() as usage:
+        result = await policy.run(
+            _call_with_latencies([1.0, 0.01], calls),
+            key="model",
+            slot=_queued_slot([0.0, 0.0]),
+            on_abandoned=lambda elapsed_ms: record_estimated_usage("gemini-2.0-flash", 1000, 500, elapsed_ms)
+        )
+
+    assert result == 1
+    assert policy.get_stats()["abandoned_calls"] == 1
+    assert usage.llm_calls == 1
+    assert usage.total_tokens == 1500
+    assert usage.cost_usd > 0
+
+
+@pytest.mark.asyncio
+async def test_loser_still_queued_is_not_reported():
+    policy = HedgePolicy(enabled=True, percentile=95, budget_ratio=0.5)
+    await _warm_up(policy)
+
+    calls = []
+    abandoned = []
+    result = await policy.run(
+        _call_with_latencies([0.2, 0.01], calls),
+        key="model",
+        slot=_queued_slot([0.0, 1.0]),
+        on_abandoned=abandoned.append
+    )
+
+    assert result == 0  # the hedge never left the queue
+    assert policy.get_stats()["hedges_sent"] == 1
+    assert len(calls) == 1
+    assert abandoned == []
+    assert policy.get_stats()["abandoned_calls"] == 0
@@ -0,0 +1,226 @@
+"""Tests for the Redis job queue and the generation worker."""
+
+import asyncio
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator, batch_run_key
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from services.job_queue import JobQueue
+from tests.test_batch_runs import RedisLikeCache
+from worker import GenerationWorker
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(redis_client=fakeredis.aioredis.FakeRedis(decode_responses=True), lease_seconds=30)
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_claimed_in_order_and_enqueue_is_idempotent(queue):
+    assert await queue.enqueue("popular_unit", {"stans": ["BTS"]}, job_id="a") == "a"
+    await queue.enqueue("popular_unit", {"stans": ["TWICE"]}, job_id="b")
+    assert await queue.enqueue("popular_unit", {"stans": ["BTS"]}, job_id="a") is None
+
+    first = await queue.claim("w1")
+    second = await queue.claim("w2")
+    assert (first.id, first.payload, first.attempts) == ("a", {"stans": ["BTS"]}, 1)
+    assert second.id == "b"
+    assert await queue.claim("w1") is None
+
+    assert await queue.complete(first, "w1")
+    assert not await queue.complete(second, "w1")  # w2 holds that lease
+    assert await queue.get_stats() == {"pending": 0, "leased": 1, "dead": 0}
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_the_lease(queue):
+    await queue.enqueue("popular_unit", {}, job_id="a")
+    job = await queue.claim("w1", now=1000)
+
+    assert await queue.heartbeat(job, "w1", now=1025)
+    assert await queue.requeue_expired(now=1040) == 0
+    assert not await queue.heartbeat(job, "w2", now=1040)
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_retried_then_dead_lettered(queue):
+    await queue.enqueue("popular_unit", {"stans": ["BTS"]}, job_id="a", max_attempts=2)
+
+    job = await queue.claim("w1", now=1000)
+    assert await queue.requeue_expired(now=1031) == 1
+    assert not await queue.heartbeat(job, "w1", now=1031)  # the dead worker lost it
+
+    retry = await queue.claim("w2", now=1031)
+    assert retry.attempts == 2
+    assert await queue.fail(retry, "w2", "model unavailable") == "dead"
+
+    assert await queue.claim("w3") is None
+    dead = await queue.dead_letters()
+    assert [job["id"] for job in dead] == ["a"]
+    assert dead[0]["last_error"] == "model unavailable"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reapers_requeue_an_expired_job_once(queue):
+    await queue.enqueue("popular_unit", {}, job_id="a")
+    await queue.claim("w1", now=1000)
+    scan = queue.redis.zrangebyscore
+    scanned = []
+    all_scanned = asyncio.Event()
+
+    async def scan_together(*args, **kwargs):
+        # Every reaper sees the lease as expired before any of them releases it
+        expired = await scan(*args, **kwargs)
+        scanned.append(expired)
+        if len(scanned) == 3:
+            all_scanned.set()
+        await all_scanned.wait()
+        return expired
+
+    queue.redis.zrangebyscore = scan_together
+    released = await asyncio.gather(*[queue.requeue_expired(now=1031) for _ in range(3)])
+
+    assert sum(released) == 1
+    assert await queue.redis.lrange(queue._key("pending"), 0, -1) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_lease_renewed_after_the_scan_is_not_requeued(queue):
+    await queue.enqueue("popular_unit", {}, job_id="a")
+    job = await queue.claim("w1", now=1000)
+    scan = queue.redis.zrangebyscore
+
+    async def scan_then_heartbeat(*args, **kwargs):
+        expired = await scan(*args, **kwargs)
+        # The owner heartbeats between the reaper's scan and its release
+        assert await queue.heartbeat(job, "w1", now=1031)
+        return expired
+
+    queue.redis.zrangebyscore = scan_then_heartbeat
+    assert await queue.requeue_expired(now=1031) == 0
+    assert await queue.get_stats() == {"pending": 0, "leased": 1, "dead": 0}
+    assert await queue.complete(job, "w1")
+
+
+@pytest.mark.asyncio
+async def test_dead_lettered_job_id_can_be_enqueued_again(queue):
+    await queue.enqueue("popular_batch", {"run_id": "run-1"}, job_id="run-1", max_attempts=1)
+    job = await queue.claim("w1")
+    assert await queue.fail(job, "w1", "redis timeout") == "dead"
+
+    # The next trigger of the same run is not deduplicated away
+    assert await queue.enqueue("popular_batch", {"run_id": "run-1"}, job_id="run-1") == "run-1"
+    retry = await queue.claim("w1")
+    assert retry.attempts == 1
+    assert await queue.fail(retry, "w1", "redis timeout again") == "retried"
+    assert [job["last_error"] for job in await queue.dead_letters()] == ["redis timeout"]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_by_another_worker(queue):
+    await queue.enqueue("popular_unit", {}, job_id="a")
+    job = await queue.claim("w1")
+
+    assert await queue.fail(job, "w1", "timeout") == "retried"
+    assert (await queue.claim("w2")).attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_complete_a_distributed_run(queue, monkeypatch):
+    cache = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", cache)
+    backend = FakeBackend(latency_ms=0, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend))
+    generator.popular_stan_list = ["BTS", "TWICE", "Messi", "Valorant"]
+
+    await queue.enqueue("popular_batch", {"run_id": "run-1"}, job_id="run-1")
+    workers = [GenerationWorker(queue, generator, concurrency=2, poll_interval=0.01, worker_id=f"w{i}")
+               for i in range(2)]
+    tasks = [asyncio.create_task(worker.run()) for worker in workers]
+
+    for _ in range(200):
+        if (await generator.get_run_status("run-1")).get("status") == "completed":
+            break
+        await asyncio.sleep(0.01)
+    for worker in workers:
+        worker.stop()
+    await asyncio.gather(*tasks)
+
+    checkpoint = cache.hashes[batch_run_key("run-1")]
+    assert checkpoint["status"] == "completed"
+    assert all(checkpoint[f"stan:{name}"] == "done" for name in generator.popular_stan_list)
+    assert await queue.get_stats() == {"pending": 0, "leased": 0, "dead": 0}
+    assert sum(worker.processed["completed"] for worker in workers) == 1 + len(generator._plan_units(generator.popular_stan_list))
+
+
+class StanFailingBackend(FakeBackend):
+    """Fails every prompt that mentions one stan."""
+
+    def __init__(self, failing):
+        super().__init__(latency_ms=0, latency_sigma=0)
+        self.failing = failing
+
+    async def generate_content_async(self, prompt, stream=False):
+        if self.failing in prompt:
+            raise ConnectionError("model unavailable")
+        return await super().generate_content_async(prompt, stream=stream)
+
+
+@pytest.mark.asyncio
+async def test_distributed_run_finishes_with_cached_and_failed_stans(monkeypatch):
+    queue = JobQueue(redis_client=fakeredis.aioredis.FakeRedis(decode_responses=True), max_attempts=1)
+    cache = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", cache)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=StanFailingBackend("Valorant")))
+    generator.popular_stan_list = ["BTS", "TWICE", "Messi", "Valorant"]
+    cache.data[generator._popular_cache_key("Messi")] = {"summary": "cached", "topics": [], "sources": []}
+
+    await queue.enqueue("popular_batch", {"run_id": "run-1"}, job_id="run-1")
+    worker = GenerationWorker(queue, generator, concurrency=2, poll_interval=0.01, worker_id="w1")
+    task = asyncio.create_task(worker.run())
+
+    for _ in range(300):
+        if (await generator.get_run_status("run-1")).get("status", "").startswith("completed"):
+            break
+        await asyncio.sleep(0.05)
+    worker.stop()
+    await task
+
+    status = await generator.get_run_status("run-1")
+    checkpoint = cache.hashes[batch_run_key("run-1")]
+    assert status["status"] == "completed_with_failures"
+    assert status["pending"] == 0
+    assert status["skipped"] == 1
+    assert checkpoint["stan:Messi"] == "skipped"
+    assert checkpoint["stan:Valorant"] == "failed"
+    assert (await queue.get_stats())["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_api_waits_for_custom_briefings_generated_by_workers(queue, monkeypatch):
+    cache = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", cache)
+    monkeypatch.setattr(batch_module, "CUSTOM_JOB_POLL_SECONDS", 0.01)
+    api_backend = FakeBackend(latency_ms=0, latency_sigma=0)
+    worker_backend = FakeBackend(latency_ms=20, latency_sigma=0)
+    api = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=api_backend), job_queue=queue)
+    worker = GenerationWorker(
+        queue, BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=worker_backend)),
+        poll_interval=0.01, worker_id="w1")
+    task = asyncio.create_task(worker.run())
+
+    briefings = await asyncio.gather(*[
+        api.get_briefing("My Local Band", user_id="u1", profile="fast") for _ in range(3)
+    ])
+    events = [event async for event in api.stream_briefing("My Local Band", user_id="u1", profile="fast")]
+    worker.stop()
+    await task
+
+    assert api_backend.calls == 0
+    assert worker_backend.calls == 1
+    assert worker.processed == {"completed": 1, "failed": 0}
+    assert all(briefing["metadata"]["profile"] == "fast" for briefing in briefings)
+    assert events[-1]["data"]["summary"] == briefings[0]["summary"]
@@ -0,0 +1,84 @@
+"""Tests for the global LLM admission governor."""
+
+import pytest
+import asyncio
+import time
+import services.llm_governor as governor_module
+from services.llm_governor import LLMGovernor
+
+
+class RateLimited(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_concurrency_never_exceeds_limit():
+    governor = LLMGovernor(initial_limit=2, max_limit=2)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*[governor.run(call) for _ in range(10)])
+
+    assert results == ["ok"] * 10
+    assert peak == 2
+    assert governor.stats["max_queue_depth"] >= 8
+    assert governor.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_halves_limit_and_success_probes_up():
+    governor = LLMGovernor(initial_limit=8, max_limit=32)
+
+    async def throttled():
+        raise RateLimited("429 Resource has been exhausted")
+
+    with pytest.raises(RateLimited):
+        await governor.run(throttled)
+    assert governor.limit == 4
+    assert governor.stats["rate_limited"] == 1
+
+    async def ok():
+        return "ok"
+
+    for _ in range(8):
+        await governor.run(ok)
+    assert governor.limit > 5
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_budget_delays_admission(monkeypatch):
+    monkeypatch.setattr(governor_module, "RATE_WINDOW_SECONDS", 0.2)
+    governor = LLMGovernor(initial_limit=8, rpm_limit=3)
+
+    async def ok():
+        return "ok"
+
+    start = time.perf_counter()
+    await asyncio.gather(*[governor.run(ok) for _ in range(4)])
+
+    # The 4th request had to wait for the first to leave the window
+    assert time.perf_counter() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_tokens_per_minute_budget_uses_estimates(monkeypatch):
+    monkeypatch.setattr(governor_module, "RATE_WINDOW_SECONDS", 0.2)
+    governor = LLMGovernor(initial_limit=8, tpm_limit=1000)
+
+    async def ok():
+        return "ok"
+
+    await governor.run(ok, estimated_tokens=800)
+    assert governor.get_stats()["tokens_last_minute"] == 800
+
+    start = time.perf_counter()
+    await governor.run(ok, estimated_tokens=800)
+    assert time.perf_counter() - start >= 0.15
@@ -0,0 +1,100 @@
+"""Tests for pluggable model backends."""
+
+import pytest
+import json
+from agents.base_agent import STANBaseAgent
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import CassetteBackend, CassetteMiss, FakeBackend, create_backend
+
+
+async def _latencies_and_failures(backend, prompts):
+    outcomes = []
+    for prompt in prompts:
+        latency, error = backend._draw(prompt)
+        outcomes.append((round(latency, 6), str(error) if error else None))
+    return outcomes
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_is_deterministic_per_seed():
+    prompts = [f"prompt {i % 3}" for i in range(20)]
+
+    first = await _latencies_and_failures(FakeBackend(seed=7, failure_rate=0.3), prompts)
+    second = await _latencies_and_failures(FakeBackend(seed=7, failure_rate=0.3), prompts)
+    other = await _latencies_and_failures(FakeBackend(seed=8, failure_rate=0.3), prompts)
+
+    assert first == second
+    assert first != other
+    assert any(error for _, error in first)
+    assert any(error is None for _, error in first)
+
+
+@pytest.mark.asyncio
+async def test_efficient_agent_runs_offline_with_fake_backend():
+    agent = EfficientBriefingAgent(backend=FakeBackend(model_name="gemini-pro", time_scale=0))
+
+    briefing = await agent.generate_briefing("BTS")
+
+    assert [t["title"] for t in briefing["topics"]] == [
+        "🔥 Top News & Trending",
+        "📱 Social Media Highlights",
+        "📅 Upcoming Events",
+        "💡 Quick Recommendations",
+    ]
+    assert "https://example.com/bts/1" in briefing["sources"]
+    assert briefing["metadata"]["usage"]["total_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_and_batch_run_on_fake_backend():
+    agent = EfficientBriefingAgent(backend=FakeBackend(time_scale=0, chunk_chars=17))
+
+    events = [e async for e in agent.generate_briefing_stream("Valorant")]
+    assert [e["event"] for e in events].count("topic") == 4
+    assert events[-1]["event"] == "complete"
+
+    stats = await BatchBriefingGenerator(agent=agent)._generate_and_cache_briefing("Valorant")
+    assert stats["total_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_base_agent_gets_json_from_fake_backend(monkeypatch):
+    monkeypatch.setenv("STAN_MODEL_BACKEND", "fake")
+    monkeypatch.setenv("STAN_FAKE_LATENCY_MS", "0")
+    agent = STANBaseAgent(name="Offline")
+
+    text = await agent.generate_content('Search the web for "Messi" and create a briefing.')
+
+    assert json.loads(text)["topics"][0]["title"] == "Messi update"
+
+
+@pytest.mark.asyncio
+async def test_cassette_records_then_replays(tmp_path):
+    path = tmp_path / "cassette.json"
+    live = FakeBackend(model_name="gemini-pro", time_scale=0, chunk_chars=10)
+
+    recorder = CassetteBackend(str(path), inner=live, mode="record")
+    recorded = await recorder.generate_content_async("Tell me about BTS for October 17, 2026.")
+    stream = await recorder.generate_content_async("Stream about BTS for October 17, 2026!", stream=True)
+    recorded_chunks = [chunk.text async for chunk in stream]
+
+    # Replaying on another day still matches because dates are masked
+    player = CassetteBackend(str(path), mode="replay", model_name="gemini-pro")
+    replayed = await player.generate_content_async("Tell me about BTS for October 18, 2026.")
+    assert replayed.text == recorded.text
+    assert replayed.usage_metadata.total_token_count == recorded.usage_metadata.total_token_count
+
+    replayed_stream = await player.generate_content_async("Stream about BTS for October 18, 2026!", stream=True)
+    assert [chunk.text async for chunk in replayed_stream] == recorded_chunks
+    assert replayed_stream.usage_metadata.total_token_count == stream.usage_metadata.total_token_count
+
+    assert live.calls == 2
+    with pytest.raises(CassetteMiss):
+        await player.generate_content_async("never recorded")
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("STAN_MODEL_BACKEND", "carrier-pigeon")
+    with pytest.raises(ValueError, match="STAN_MODEL_BACKEND"):
+        create_backend("gemini-pro")
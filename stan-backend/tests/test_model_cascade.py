@@ -0,0 +1,127 @@
+"""Tests for the degrade-don't-fail briefing cascade."""
+
+import asyncio
+import json
+import pytest
+import agents.batch_generator as batch_module
+import agents.efficient_agent as efficient_agent
+from agents.batch_generator import BatchBriefingGenerator, batch_run_key
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from services.cache_service import cache_service
+from tests.test_batch_runs import RedisLikeCache
+
+
+class TieredBackend(FakeBackend):
+    """Hangs or fails on the standard prompt; the fast prompt asks for 200 words."""
+
+    def __init__(self, primary="hang", fallback="ok"):
+        super().__init__(time_scale=0)
+        self.behaviour = {"primary": primary, "fallback": fallback}
+
+    async def generate_content_async(self, prompt, stream=False):
+        mode = self.behaviour["fallback" if "under 200 words" in prompt else "primary"]
+        if mode == "hang":
+            await asyncio.sleep(10)
+        if mode == "fail":
+            raise ConnectionError("model unavailable")
+        return await super().generate_content_async(prompt, stream=stream)
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    store = {}
+
+    async def fake_get(key):
+        return json.loads(store[key]) if key in store else None
+
+    async def fake_set(key, value, ttl=3600):
+        store[key] = json.dumps(value)
+        return True
+
+    monkeypatch.setattr(cache_service, "get", fake_get)
+    monkeypatch.setattr(cache_service, "set", fake_set)
+    monkeypatch.setattr(efficient_agent, "PRIMARY_BUDGET_MS", 100)
+    monkeypatch.setattr(efficient_agent, "FALLBACK_BUDGET_MS", 100)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_primary_success_is_remembered(memory_cache):
+    agent = EfficientBriefingAgent(backend=TieredBackend(primary="ok"))
+
+    briefing = await agent.generate_briefing("BTS")
+
+    assert briefing["metadata"]["tier"] == "primary"
+    assert briefing["metadata"]["degraded"] is False
+    assert len(memory_cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_falls_back_to_cheaper_model(memory_cache):
+    agent = EfficientBriefingAgent(backend=TieredBackend(primary="hang"))
+
+    briefing = await agent.generate_briefing("BTS")
+
+    assert briefing["metadata"]["tier"] == "fallback_model"
+    assert briefing["metadata"]["profile"] == "fast"
+    assert "no response within 100ms" in briefing["metadata"]["tier_errors"][0]
+
+
+@pytest.mark.asyncio
+async def test_failing_models_serve_stale_briefing(memory_cache):
+    backend = TieredBackend(primary="ok")
+    agent = EfficientBriefingAgent(backend=backend)
+    fresh = await agent.generate_briefing("Messi")
+
+    backend.behaviour.update(primary="fail", fallback="hang")
+    briefing = await agent.generate_briefing("Messi")
+
+    assert briefing["metadata"]["tier"] == "stale_cache"
+    assert briefing["metadata"]["stale_generated_at"] == fresh["metadata"]["generated_at"]
+    assert briefing["metadata"]["usage"]["cost_usd"] == 0
+    assert briefing["topics"] == fresh["topics"]
+
+
+@pytest.mark.asyncio
+async def test_stub_only_when_nothing_else_is_left(memory_cache):
+    agent = EfficientBriefingAgent(backend=TieredBackend(primary="fail", fallback="fail"))
+
+    briefing = await agent.generate_briefing("Valorant")
+
+    assert briefing["metadata"]["tier"] == "stub"
+    assert briefing["summary"] == "Briefing temporarily unavailable"
+    assert "primary" in briefing["metadata"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_degrades_before_first_topic(memory_cache):
+    agent = EfficientBriefingAgent(backend=TieredBackend(primary="fail"))
+
+    events = [e async for e in agent.generate_briefing_stream("Marvel")]
+
+    assert [e["event"] for e in events] == ["start", "topic", "topic", "complete"]
+    assert events[-1]["data"]["metadata"]["tier"] == "fallback_model"
+
+
+@pytest.mark.asyncio
+async def test_batch_never_caches_or_checkpoints_a_degraded_briefing(memory_cache, monkeypatch):
+    cache = RedisLikeCache()
+    monkeypatch.setattr(batch_module, "cache_service", cache)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=TieredBackend(primary="fail", fallback="fail")))
+    generator.popular_stan_list = ["BTS"]
+    generator.max_retries = 0
+
+    stats = await generator.generate_popular_briefings_daily(run_id="run-1")
+
+    assert stats["failures"] == 1
+    assert stats["status"] == "completed_with_failures"
+    assert cache.hashes[batch_run_key("run-1")]["stan:BTS"] == "failed"
+    assert not await cache.exists(generator._popular_cache_key("BTS"))
+
+    # A reader still gets the stub, uncached, and a re-run tries again
+    briefing = await generator.get_briefing("BTS")
+    assert briefing["metadata"]["tier"] == "stub"
+    assert not await cache.exists(generator._popular_cache_key("BTS"))
+    rerun = await generator.generate_popular_briefings_daily(run_id="run-1")
+    assert rerun["planned_requests"] == 1
@@ -0,0 +1,53 @@
+"""Tests for the shared model registry."""
+
+import pytest
+from agents.base_agent import STANBaseAgent
+from agents.model_backends import ModelBackend
+from agents.model_registry import ModelRegistry, model_registry
+
+
+class WarmableBackend(ModelBackend):
+    def __init__(self, fail=False):
+        self.warmed = False
+        self.fail = fail
+
+    async def warm_up(self):
+        if self.fail:
+            raise ConnectionError("unreachable")
+        self.warmed = True
+
+
+def test_agents_with_same_config_share_one_backend(monkeypatch):
+    monkeypatch.setenv("STAN_MODEL_BACKEND", "fake")
+    model_registry.clear()
+
+    agents = [STANBaseAgent(name=f"Agent{i}") for i in range(10)]
+
+    assert len({id(agent.model) for agent in agents}) == 1
+    assert model_registry.get_stats()["backends"] == 1
+
+
+def test_different_configs_get_different_backends(monkeypatch):
+    monkeypatch.setenv("STAN_MODEL_BACKEND", "fake")
+    registry = ModelRegistry()
+
+    a = registry.get("gemini-pro", {"temperature": 0.7, "top_p": 0.95})
+    b = registry.get("gemini-pro", {"top_p": 0.95, "temperature": 0.7})
+    c = registry.get("gemini-pro", {"temperature": 0.2})
+
+    assert a is b
+    assert a is not c
+
+
+@pytest.mark.asyncio
+async def test_warm_up_tolerates_failures():
+    registry = ModelRegistry()
+    good, bad = WarmableBackend(), WarmableBackend(fail=True)
+    registry._backends[("fake", "good", "{}")] = good
+    registry._backends[("fake", "bad", "{}")] = bad
+
+    summary = await registry.warm_up(timeout=1.0)
+
+    assert good.warmed
+    assert summary["warmed"] == 1
+    assert summary["failed"] == 1
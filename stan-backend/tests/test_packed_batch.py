@@ -0,0 +1,113 @@
+"""Tests for packed multi-stan batch generation."""
+
+import pytest
+import re
+from agents.batch_generator import BatchBriefingGenerator
+from agents.briefing_parser import PACKED_DELIMITER, split_packed_response
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+
+SECTIONS = [
+    "## 🔥 Top News & Trending",
+    "## 📱 Social Media Highlights",
+    "## 📅 Upcoming Events",
+    "## 💡 Quick Recommendations",
+]
+
+
+def _briefing_text(name):
+    lines = []
+    for index, header in enumerate(SECTIONS):
+        lines += [header, f"- {name} item {index} [src](https://example.com/{index})", ""]
+    return "\n".join(lines)
+
+
+class PackedResponder:
+    """Answers packed prompts, dropping and truncating configured stans."""
+
+    def __init__(self, drop=(), truncate=()):
+        self.drop = set(drop)
+        self.truncate = set(truncate)
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        packed = re.findall(r'^- (.+)$', prompt.split("Start each")[0], re.MULTILINE)
+        if not packed:
+            # Single-stan prompt
+            return _briefing_text("single")
+        parts = []
+        for name in packed:
+            if name in self.drop:
+                continue
+            text = _briefing_text(name)
+            if name in self.truncate:
+                text = text[:text.index("## 📅")]
+            parts.append(PACKED_DELIMITER.format(name=name.upper()) + "\n" + text)
+        # Dropped/truncated stans come back on a retry
+        self.drop.clear()
+        self.truncate.clear()
+        return "\n".join(parts)
+
+
+def test_split_packed_response_matches_names_loosely():
+    text = "\r\n".join([
+        "Intro the model added",
+        "===== BRIEFING: bts =====",
+        "## 🔥 Top News & Trending",
+        "- BTS news",
+        "=== BRIEFING:  Taylor   Swift ===",
+        "## 🔥 Top News & Trending",
+        "- Taylor news",
+        "===== BRIEFING: Not Requested =====",
+        "- ignored",
+    ])
+
+    parts = split_packed_response(text, ["BTS", "Taylor Swift", "Messi"])
+
+    assert set(parts) == {"BTS", "Taylor Swift"}
+    assert parts["BTS"] == "## 🔥 Top News & Trending\n- BTS news"
+
+
+@pytest.mark.asyncio
+async def test_packed_generation_retries_only_missing_stans():
+    responder = PackedResponder(drop={"Messi"}, truncate={"Valorant"})
+    agent = EfficientBriefingAgent(backend=FakeBackend(time_scale=0, responder=responder))
+
+    briefings = await agent.generate_briefings_packed(["BTS", "Messi", "Valorant", "Marvel"])
+
+    assert list(briefings) == ["BTS", "Messi", "Valorant", "Marvel"]
+    assert all(len(b["topics"]) == 4 for b in briefings.values())
+    # One pack for all four, then one smaller pack for the two missing
+    assert len(responder.prompts) == 2
+    assert "- Messi\n- Valorant" in responder.prompts[1]
+    assert "BTS" not in responder.prompts[1].split("Start each")[0]
+    assert briefings["BTS"]["metadata"]["pack_size"] == 4
+    assert briefings["Messi"]["metadata"]["pack_size"] == 2
+    assert briefings["BTS"]["topics"][0]["content"].startswith("- BTS item 0")
+
+
+@pytest.mark.asyncio
+async def test_single_missing_stan_falls_back_to_single_prompt():
+    responder = PackedResponder(drop={"Marvel"})
+    agent = EfficientBriefingAgent(backend=FakeBackend(time_scale=0, responder=responder))
+
+    briefings = await agent.generate_briefings_packed(["BTS", "Marvel"])
+
+    assert len(responder.prompts) == 2
+    assert "packed" not in briefings["Marvel"]["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_daily_batch_uses_fewer_requests_when_packed():
+    responder = PackedResponder()
+    agent = EfficientBriefingAgent(backend=FakeBackend(time_scale=0, responder=responder))
+    generator = BatchBriefingGenerator(agent=agent, pack_size=4)
+    generator.popular_stan_list = ["BTS", "TWICE", "Messi", "Valorant", "Marvel", "Minecraft"]
+
+    stats = await generator.generate_popular_briefings_daily()
+
+    assert stats["successes"] == 6
+    assert stats["planned_requests"] == 2
+    assert len(responder.prompts) == 2
+    assert stats["total_tokens"] > 0
@@ -0,0 +1,69 @@
+"""Tests for compiled prompt templates."""
+
+from agents.base_agent import BriefingAgent, DEFAULT_BRIEFING_PROMPT
+from agents.efficient_agent import BRIEFING_PROMPT, EfficientBriefingAgent
+from agents.prompt_templates import compile_template, get_template
+
+
+CONTEXT = {
+    "date": "Monday, March 02, 2026",
+    "stan_name": "BTS",
+    "category": "K-Pop",
+    "custom_settings": {"focus_areas": ["tours", "albums"], "tone": "casual"},
+}
+
+
+def test_compile_template_is_cached_by_hash():
+    text = "Briefing for {stan_name} on {date}"
+    assert compile_template(text) is compile_template(text)
+    assert compile_template(text).fields == ["stan_name", "date"]
+
+
+def test_custom_prompt_matches_replace_chain():
+    """One-pass rendering gives the same result as the old .replace() chain."""
+    custom_prompt = "{date}: news on {stan_name} ({category}). Focus: {focus_areas}. Tone: {tone}. {stan_name}!"
+    expected = custom_prompt.replace(
+        '{date}', CONTEXT['date']
+    ).replace(
+        '{stan_name}', CONTEXT['stan_name']
+    ).replace(
+        '{category}', CONTEXT['category']
+    ).replace(
+        '{focus_areas}', 'tours, albums'
+    ).replace(
+        '{tone}', 'casual'
+    )
+
+    agent = BriefingAgent()
+    assert agent._apply_custom_prompt(custom_prompt, CONTEXT) == expected
+
+
+def test_unknown_placeholders_and_json_braces_survive():
+    template = compile_template('Use {stan_name} and keep {unknown} and {"a": 1}')
+    assert template.render({"stan_name": "TWICE"}) == 'Use TWICE and keep {unknown} and {"a": 1}'
+
+
+def test_substituted_values_are_not_rescanned():
+    template = compile_template("{stan_name} on {date}")
+    assert template.render({"stan_name": "{date}", "date": "today"}) == "{date} on today"
+
+
+def test_builtin_templates_are_versioned():
+    assert get_template("efficient_briefing") is BRIEFING_PROMPT
+    assert BRIEFING_PROMPT.version_tag == f"efficient_briefing@{BRIEFING_PROMPT.version}"
+    assert compile_template("x {y}").version_tag.startswith("custom@")
+
+    prompt = EfficientBriefingAgent()._create_prompt("NewJeans")
+    assert "{" not in prompt
+    assert prompt.count("NewJeans") == 3
+
+
+def test_default_prompt_renders_json_example():
+    agent = BriefingAgent()
+    context = dict(CONTEXT, description="Seven-member group")
+    prompt = agent._build_default_prompt(context, {"tone": "casual", "exclude_topics": ["rumors"]})
+
+    assert '"topics": [' in prompt
+    assert "Please avoid mentioning: rumors" in prompt
+    assert "Tone: casual" in prompt
+    assert set(DEFAULT_BRIEFING_PROMPT.fields) >= {"date", "stan_name", "sections"}
@@ -0,0 +1,123 @@
+"""Tests for single-flight coalescing of generations."""
+
+import pytest
+import asyncio
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from services.single_flight import SingleFlight
+
+
+class CountingAgent:
+    def __init__(self, delay=0.05):
+        self.calls = 0
+        self.delay = delay
+
+    async def generate_briefing(self, stan_name):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {
+            "content": f"Briefing for {stan_name}",
+            "topics": [],
+            "sources": [],
+            "metadata": {"agent_type": "counting"},
+        }
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_generate_once():
+    agent = CountingAgent()
+    generator = BatchBriefingGenerator(agent=agent)
+
+    briefings = await asyncio.gather(*[generator.get_briefing("BTS") for _ in range(200)])
+
+    assert agent.calls == 1
+    assert all(b["content"] == "Briefing for BTS" for b in briefings)
+    # Exactly one caller paid for the generation
+    served_from_cache = [b["metadata"].get("served_from_cache", False) for b in briefings]
+    assert served_from_cache.count(False) == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_is_shared_and_next_call_retries():
+    group = SingleFlight(distributed=False)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model down")
+
+    results = await asyncio.gather(*[group.do("k", failing) for _ in range(5)], return_exceptions=True)
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def working():
+        return "ok"
+
+    assert await group.do("k", working) == ("ok", True)
+
+
+@pytest.mark.asyncio
+async def test_waiter_timeout_falls_back_to_cache():
+    group = SingleFlight(wait_timeout=0.05, poll_interval=0.01, distributed=False)
+    cache = {}
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return "generated"
+
+    async def cache_get():
+        return cache.get("k")
+
+    leader = asyncio.create_task(group.do("k", slow, cache_get=cache_get))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(group.do("k", slow, cache_get=cache_get))
+
+    # Another process finishes first and fills the cache
+    await asyncio.sleep(0.07)
+    cache["k"] = "from cache"
+
+    assert await waiter == ("from cache", False)
+    assert await leader == ("generated", True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_generate_once():
+    backend = FakeBackend(latency_ms=50, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend))
+
+    async def collect():
+        return [event async for event in generator.stream_briefing("My Local Band", user_id="u1")]
+
+    streams = await asyncio.gather(*[collect() for _ in range(20)])
+
+    assert backend.calls == 1
+    assert all([e["event"] for e in events] == [e["event"] for e in streams[0]] for events in streams)
+    # Exactly one stream paid for the generation
+    completes = [events[-1]["data"]["metadata"].get("served_from_cache", False) for events in streams]
+    assert completes.count(False) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_followers_finish_when_the_first_caller_disconnects():
+    group = SingleFlight(distributed=False)
+
+    async def events():
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield i
+
+    first = group.stream("k", events)
+    assert await first.__anext__() == (0, True)
+    follower = asyncio.create_task(asyncio.wait_for(
+        _collect(group.stream("k", events)), timeout=1))
+    await asyncio.sleep(0)
+    await first.aclose()
+
+    assert await follower == [(0, False), (1, False), (2, False)]
+    assert group.in_flight() == 0
+
+
+async def _collect(stream):
+    return [item async for item in stream]
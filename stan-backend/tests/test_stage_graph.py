@@ -0,0 +1,87 @@
+"""Tests for the orchestrator's stage scheduler."""
+
+import asyncio
+import pytest
+from agents.stage_graph import StageGraph, StageTimeout
+
+
+def _stage(delay, value=None, fail=False):
+    async def run(inputs):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("stage broke")
+        return value if value is not None else sorted(inputs)
+    return run
+
+
+@pytest.mark.asyncio
+async def test_stage_starts_when_its_inputs_are_ready():
+    graph = StageGraph()
+    graph.add("news", _stage(0.01, "n"))
+    graph.add("social", _stage(0.01, "s"))
+    graph.add("slow", _stage(0.2, "x"))
+    graph.add("sentiment", _stage(0.01), deps=["news", "social"])
+    graph.add("recommendations", _stage(0.01, "r"))
+    graph.add("summary", _stage(0.0), deps=graph.stage_names)
+
+    results = await graph.run()
+
+    assert results["sentiment"] == ["news", "social"]
+    # Sentiment finished long before the slow agent, not after it
+    assert graph.timings["sentiment"]["end_ms"] < graph.timings["slow"]["end_ms"] / 2
+    assert graph.timings["recommendations"]["start_ms"] < 10
+    assert graph.critical_path() == ["slow", "summary"]
+    assert graph.get_stats()["critical_path_ms"] >= 200
+
+
+@pytest.mark.asyncio
+async def test_failures_are_passed_to_dependents():
+    graph = StageGraph()
+    graph.add("news", _stage(0, fail=True))
+    graph.add("summary", lambda inputs: asyncio.sleep(0, type(inputs["news"]).__name__), deps=["news"])
+
+    results = await graph.run()
+
+    assert isinstance(results["news"], RuntimeError)
+    assert results["summary"] == "RuntimeError"
+
+
+def test_dependencies_must_exist():
+    graph = StageGraph()
+    with pytest.raises(ValueError, match="unknown stages: news"):
+        graph.add("sentiment", _stage(0), deps=["news"])
+
+
+@pytest.mark.asyncio
+async def test_deadline_skips_late_stages_and_keeps_partial_results():
+    graph = StageGraph()
+    graph.add("news", _stage(0.01, "n"))
+    graph.add("video", _stage(5, "v"))
+    graph.add("fan", _stage(5, "f"), timeout=0.05)
+    graph.add("summary", _stage(0.01), deps=graph.stage_names, required=True)
+
+    results = await graph.run(deadline=0.2)
+
+    assert results["news"] == "n"
+    assert isinstance(results["fan"], StageTimeout)
+    assert isinstance(results["video"], StageTimeout)
+    assert results["summary"] == ["fan", "news", "video"]
+    assert graph.skipped_for_time == ["fan", "video"]
+    assert graph.timings["summary"]["end_ms"] < 500
+
+
+@pytest.mark.asyncio
+async def test_late_stage_can_finish_in_background():
+    finished = asyncio.Event()
+
+    async def slow(_):
+        await asyncio.sleep(0.1)
+        finished.set()
+
+    graph = StageGraph(finish_late_in_background=True)
+    graph.add("video", slow, timeout=0.01)
+
+    results = await graph.run()
+
+    assert isinstance(results["video"], StageTimeout)
+    await asyncio.wait_for(finished.wait(), timeout=1)
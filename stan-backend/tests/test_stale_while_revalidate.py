@@ -0,0 +1,126 @@
+"""Tests for serving yesterday's briefing across the midnight rollover."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator, popular_briefing_ttl
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from tests.test_batch_runs import RedisLikeCache
+
+
+class TTLRecordingCache(RedisLikeCache):
+    def __init__(self):
+        super().__init__()
+        self.ttls = {}
+
+    async def set(self, key, value, ttl=3600):
+        self.ttls[key] = ttl
+        return await super().set(key, value, ttl)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = TTLRecordingCache()
+    monkeypatch.setattr(batch_module, "cache_service", fake)
+    return fake
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(batch_module, "BRIEFING_TTL_JITTER_SECONDS", 0)
+    monkeypatch.setattr(batch_module, "BATCH_SCHEDULE_HOUR", 6)
+
+
+def make_generator(latency_ms=0):
+    backend = FakeBackend(latency_ms=latency_ms, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend))
+    generator.popular_stan_list = ["BTS", "TWICE"]
+    return generator, backend
+
+
+async def finish_refreshes(generator):
+    while generator._refreshing:
+        await asyncio.gather(*generator._refreshing.values())
+
+
+def test_ttl_lasts_until_the_next_days_batch(no_jitter):
+    day = date(2026, 3, 1)
+
+    assert popular_briefing_ttl(day, now=datetime(2026, 3, 1, 6, 0)) == 24 * 3600
+    # Refreshed just after midnight: still alive through the next rollover
+    assert popular_briefing_ttl(day, now=datetime(2026, 3, 1, 0, 30)) == 29 * 3600 + 1800
+
+
+def test_ttl_jitter_spreads_expiries(monkeypatch):
+    monkeypatch.setattr(batch_module, "BRIEFING_TTL_JITTER_SECONDS", 600)
+    now = datetime(2026, 3, 1, 6, 0)
+    ttls = {popular_briefing_ttl(date(2026, 3, 1), now=now) for _ in range(20)}
+
+    assert all(24 * 3600 <= ttl <= 24 * 3600 + 600 for ttl in ttls)
+    assert len(ttls) > 1
+
+
+@pytest.mark.asyncio
+async def test_generated_briefings_use_the_batch_ttl(cache, no_jitter):
+    generator, _ = make_generator()
+
+    await generator.get_briefing("BTS")
+
+    ttl = cache.ttls[generator._popular_cache_key("BTS")]
+    assert abs(ttl - popular_briefing_ttl(date.today())) <= 1
+
+
+@pytest.mark.asyncio
+async def test_after_midnight_yesterday_is_served_stale_while_one_refresh_runs(cache):
+    generator, backend = make_generator(latency_ms=50)
+    yesterday = date.today() - timedelta(days=1)
+    cache.data[generator._popular_cache_key("BTS", yesterday)] = {
+        "summary": "yesterday", "topics": [], "sources": [], "content": "",
+        "metadata": {"generated_at": "06:00"},
+    }
+
+    briefings = await asyncio.gather(*[generator.get_briefing("BTS") for _ in range(5)])
+
+    for briefing in briefings:
+        assert briefing["summary"] == "yesterday"
+        assert briefing["metadata"]["stale"] is True
+        assert briefing["metadata"]["stale_date"] == yesterday.isoformat()
+        assert briefing["metadata"]["served_from_cache"] is True
+    assert generator.read_stats["cold"] == 0
+
+    await finish_refreshes(generator)
+    assert backend.calls == 1
+    assert generator.stale_stats == {"served": 5, "refreshes": 1, "refresh_failures": 0}
+
+    fresh = await generator.get_briefing("BTS")
+    assert "stale" not in fresh["metadata"]
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_briefings_stream_with_stale_status(cache):
+    generator, _ = make_generator()
+    yesterday = date.today() - timedelta(days=1)
+    cache.data[generator._popular_cache_key("TWICE", yesterday)] = {
+        "summary": "yesterday", "topics": [{"title": "t"}], "sources": [], "content": "",
+    }
+
+    events = [event async for event in generator.stream_briefing("TWICE")]
+    await finish_refreshes(generator)
+
+    assert events[0]["data"]["status"] == "stale"
+    assert events[-1]["data"]["metadata"]["stale"] is True
+    assert await cache.exists(generator._popular_cache_key("TWICE"))
+
+
+@pytest.mark.asyncio
+async def test_without_yesterdays_briefing_the_miss_generates(cache):
+    generator, backend = make_generator()
+
+    briefing = await generator.get_briefing("TWICE")
+
+    assert backend.calls == 1
+    assert "stale" not in briefing["metadata"]
+    assert generator.stale_stats["served"] == 0
@@ -0,0 +1,99 @@
+"""Tests for stan name canonicalization."""
+
+import pytest
+import agents.batch_generator as batch_module
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from agents.stan_canonicalizer import STAN_ALIASES, StanCanonicalizer, normalize_stan_name
+from services.cache_service import cache_service
+from tests.test_batch_runs import RedisLikeCache
+
+POPULAR = ["BTS", "Stray Kids", "Lionel Messi", "Star Wars", "Attack on Titan"]
+
+
+@pytest.fixture
+def canonicalizer():
+    return StanCanonicalizer(POPULAR, STAN_ALIASES)
+
+
+def test_normalize_handles_case_width_and_punctuation():
+    assert normalize_stan_name("  Ｂｌａｃｋ-Pink!! ") == "black pink"
+    assert normalize_stan_name("Stray\tKids") == "stray kids"
+
+
+@pytest.mark.parametrize("typed, expected, kind", [
+    ("BTS", "BTS", "exact"),
+    ("bts ", "BTS", "normalized"),
+    ("Bangtan Boys", "BTS", "alias"),
+    ("방탄소년단", "BTS", "alias"),
+    ("StrayKids", "Stray Kids", "compact"),
+    ("Lionel Mesi", "Lionel Messi", "fuzzy"),
+    ("AOT", "Attack on Titan", "alias"),
+])
+def test_spellings_resolve_to_canonical(canonicalizer, typed, expected, kind):
+    assert canonicalizer.match(typed) == (expected, kind)
+
+
+def test_loose_matches_do_not_swallow_other_stans(canonicalizer):
+    assert canonicalizer.resolve("Star Wars Outlaws") is None
+    assert canonicalizer.resolve("BTX") is None
+    # Aliases for stans outside the popular list are not indexed
+    assert canonicalizer.resolve("JJK") is None
+
+
+@pytest.mark.parametrize("typed", ["LeBron James Jr", "Tom Brady Jr", "Lionel Messi Sr", "Taylor", "Ronaldo"])
+def test_related_but_distinct_names_stay_custom(typed):
+    canonicalizer = StanCanonicalizer(
+        ["Lionel Messi", "LeBron James", "Tom Brady", "Taylor Swift", "Cristiano Ronaldo"], STAN_ALIASES)
+
+    assert canonicalizer.resolve(typed) is None
+
+
+def test_canonicalize_counts_redirects(canonicalizer):
+    assert canonicalizer.canonicalize("Bangtan Boys") == "BTS"
+    assert canonicalizer.canonicalize("BTS") == "BTS"
+    assert canonicalizer.canonicalize("  My   Local Band ") == "My Local Band"
+
+    stats = canonicalizer.get_stats()
+    assert stats["lookups"] == 3
+    assert stats["redirected_to_popular"] == 1
+    # A redirect alone doesn't save a generation
+    assert stats["llm_calls_avoided"] == 0
+    assert stats["matches"] == {"alias": 1, "exact": 1, "miss": 1}
+    assert stats["popular_hit_rate"] == pytest.approx(0.667)
+
+
+@pytest.mark.asyncio
+async def test_aliases_share_the_popular_cache(monkeypatch):
+    requested_keys = []
+
+    async def fake_get(key):
+        requested_keys.append(key)
+        return {"summary": "cached", "topics": [], "metadata": {}}
+
+    monkeypatch.setattr(cache_service, "get", fake_get)
+    generator = BatchBriefingGenerator()
+
+    await generator.get_briefing("bangtan boys")
+    await generator.get_briefing("BTS ")
+
+    assert requested_keys[0] == requested_keys[1]
+    assert requested_keys[0].startswith("public:briefing:BTS:")
+    assert generator.is_popular_stan("Messi")
+
+
+@pytest.mark.asyncio
+async def test_only_redirects_served_an_existing_briefing_count_as_avoided(monkeypatch):
+    monkeypatch.setattr(batch_module, "cache_service", RedisLikeCache())
+    backend = FakeBackend(latency_ms=0, latency_sigma=0)
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=backend))
+
+    await generator.get_briefing("bangtan boys")  # redirected, but generated
+    await generator.get_briefing("BTS ")  # redirected to the cached briefing
+    await generator.get_briefing("BTS")  # exact: nothing to redirect
+
+    stats = generator.canonicalizer.get_stats()
+    assert backend.calls == 1
+    assert stats["redirected_to_popular"] == 2
+    assert stats["llm_calls_avoided"] == 1
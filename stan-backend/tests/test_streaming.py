@@ -0,0 +1,115 @@
+"""Tests for incremental briefing parsing and streaming."""
+
+import pytest
+from agents.briefing_parser import BriefingParser
+from agents.efficient_agent import EfficientBriefingAgent
+
+
+SAMPLE_RESPONSE = """Here is today's briefing.
+
+## 🔥 Top News & Trending
+- BTS announced a world tour [Billboard](https://www.billboard.com/bts-tour)
+- New single tops charts
+
+## 📱 Social Media Highlights
+- Fans trend #BTSTour on X [X](https://x.com/bts_bighit)
+
+## 📅 Upcoming Events
+- Seoul concert on June 13
+
+## 💡 Quick Recommendations
+- Try TXT for similar vibes
+"""
+
+
+def _chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _StreamResponse:
+    def __init__(self, chunks, log):
+        self._chunks = chunks
+        self._log = log
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, chunk in enumerate(self._chunks):
+            self._log.append(("chunk", i))
+            yield _Chunk(chunk)
+
+
+class StreamingModel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.log = []
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        assert stream
+        return _StreamResponse(self.chunks, self.log)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, len(SAMPLE_RESPONSE)])
+def test_incremental_parser_matches_any_chunking(chunk_size):
+    """Sections come out the same however the stream is chunked."""
+    parser = BriefingParser()
+    sections = []
+    for chunk in _chunked(SAMPLE_RESPONSE, chunk_size):
+        sections.extend(parser.feed(chunk))
+    sections.extend(parser.close())
+
+    titles = [section["title"] for section in sections]
+    assert titles == [
+        "_intro",
+        "🔥 Top News & Trending",
+        "📱 Social Media Highlights",
+        "📅 Upcoming Events",
+        "💡 Quick Recommendations",
+    ]
+    assert sections[1]["content"].startswith("- BTS announced a world tour")
+    assert sections[1]["sources"] == ["https://www.billboard.com/bts-tour"]
+
+
+def test_incremental_parser_emits_section_when_next_header_starts():
+    """A section is emitted as soon as the following header begins."""
+    parser = BriefingParser()
+    assert parser.feed("## 🔥 Top News & Trending\n- Big news\n#") == []
+    completed = parser.feed("# 📱 Social")
+    assert completed == [{"title": "🔥 Top News & Trending", "content": "- Big news", "sources": []}]
+    assert parser.feed(" Media Highlights\n- Viral clip") == []
+    assert parser.close()[0]["title"] == "📱 Social Media Highlights"
+
+
+@pytest.mark.asyncio
+async def test_agent_streams_topics_before_response_finishes():
+    """The first topic event is yielded before the last chunk is read."""
+    agent = EfficientBriefingAgent()
+    chunks = _chunked(SAMPLE_RESPONSE, 16)
+    agent.model = StreamingModel(chunks)
+
+    events = []
+    first_topic_after_chunks = None
+    async for event in agent.generate_briefing_stream("BTS"):
+        events.append(event)
+        if event["event"] == "topic" and first_topic_after_chunks is None:
+            first_topic_after_chunks = len(agent.model.log)
+
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == "start"
+    assert kinds[-1] == "complete"
+    assert kinds.count("topic") == 4
+    assert first_topic_after_chunks < len(chunks)
+
+    first_topic = events[1]["data"]
+    assert first_topic["category"] == "news"
+    assert first_topic["sources"] == ["https://www.billboard.com/bts-tour"]
+
+    briefing = events[-1]["data"]
+    assert briefing["content"] == SAMPLE_RESPONSE
+    assert briefing["metadata"]["streamed"] is True
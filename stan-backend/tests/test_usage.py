@@ -0,0 +1,72 @@
+"""Tests for token usage capture."""
+
+import pytest
+import asyncio
+from agents.base_agent import STANBaseAgent
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.usage import estimate_cost_usd, track_usage, usage_from_response
+
+
+class _UsageMetadata:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class _FakeResponse:
+    def __init__(self, text, prompt_tokens, output_tokens):
+        self.text = text
+        self.usage_metadata = _UsageMetadata(prompt_tokens, output_tokens)
+
+
+class UsageModel:
+    def __init__(self, prompt_tokens=1200, output_tokens=400):
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(0.01)
+        return _FakeResponse("## 🔥 Top News & Trending\n- News", self.prompt_tokens, self.output_tokens)
+
+
+def test_usage_from_response_handles_missing_metadata():
+    assert usage_from_response(object()) == {"prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+def test_cost_uses_input_and_output_prices():
+    usage = {"prompt_tokens": 1_000_000, "output_tokens": 1_000_000, "total_tokens": 2_000_000}
+    assert estimate_cost_usd("gemini-2.0-flash", usage) == pytest.approx(0.50)
+
+
+@pytest.mark.asyncio
+async def test_efficient_agent_records_usage_in_metadata():
+    agent = EfficientBriefingAgent()
+    agent.model = UsageModel(prompt_tokens=1200, output_tokens=400)
+
+    briefing = await agent.generate_briefing("BTS")
+    usage = briefing["metadata"]["usage"]
+
+    assert usage["prompt_tokens"] == 1200
+    assert usage["output_tokens"] == 400
+    assert usage["total_tokens"] == 1600
+    assert usage["llm_calls"] == 1
+    assert usage["llm_time_ms"] > 0
+    assert usage["cost_usd"] == pytest.approx(estimate_cost_usd(agent.model_name, usage))
+
+
+@pytest.mark.asyncio
+async def test_usage_is_attributed_across_gather_and_nested_scopes():
+    agents = [STANBaseAgent(name=f"Agent{i}") for i in range(3)]
+    for agent in agents:
+        agent.model = UsageModel(prompt_tokens=100, output_tokens=50)
+
+    with track_usage() as outer:
+        with track_usage() as inner:
+            await asyncio.gather(*[a.generate_content("ping") for a in agents])
+        await agents[0].generate_content("pong")
+
+    assert inner.llm_calls == 3
+    assert inner.total_tokens == 450
+    assert outer.llm_calls == 4
+    assert outer.total_tokens == 600
@@ -0,0 +1,80 @@
+"""Tests for the batch worker pool."""
+
+import asyncio
+import time
+import pytest
+from agents.batch_generator import BatchBriefingGenerator
+from agents.efficient_agent import EfficientBriefingAgent
+from agents.model_backends import FakeBackend
+from services.worker_pool import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_slow_item_does_not_hold_up_the_rest():
+    running = 0
+    peak = 0
+
+    async def handle(delay):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delay)
+        running -= 1
+        return delay
+
+    pool = WorkerPool(concurrency=3)
+    start = time.perf_counter()
+    results = await pool.run([0.3] + [0.02] * 20, handle)
+    elapsed = time.perf_counter() - start
+
+    assert [result for _, result in results] == [0.3] + [0.02] * 20
+    assert peak == 3
+    # 20 short items on two free workers finish while the slow one runs
+    assert elapsed < 0.45
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_retried_then_reported():
+    attempts = {}
+
+    async def handle(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == "flaky" and attempts[item] == 1:
+            raise ConnectionError("blip")
+        if item == "broken":
+            raise ValueError("always")
+        return item
+
+    pool = WorkerPool(concurrency=2, max_retries=2, retry_backoff=0.01)
+    results = dict(await pool.run(["ok", "flaky", "broken"], handle))
+
+    assert results["flaky"] == "flaky"
+    assert isinstance(results["broken"], ValueError)
+    assert attempts == {"ok": 1, "flaky": 2, "broken": 3}
+    assert pool.stats["retries"] == 3
+    assert pool.stats["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_target_rate_spaces_out_starts():
+    starts = []
+
+    async def handle(item):
+        starts.append(time.perf_counter())
+
+    await WorkerPool(concurrency=10, rate_per_second=50).run(list(range(6)), handle)
+
+    assert starts[-1] - starts[0] >= 5 / 50 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_daily_batch_reports_pool_stats():
+    generator = BatchBriefingGenerator(agent=EfficientBriefingAgent(backend=FakeBackend(time_scale=0)))
+    generator.popular_stan_list = [f"Stan {i}" for i in range(12)]
+
+    stats = await generator.generate_popular_briefings_daily()
+
+    assert stats["successes"] == 12
+    assert stats["concurrency"] == 5
+    assert stats["retries"] == 0
+    assert stats["stans_per_minute"] > 0
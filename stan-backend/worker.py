@@ -0,0 +1,205 @@
+"""Generation worker process.
+
+Consumes generation jobs from the Redis job queue so briefing generation
+runs outside the API processes and scales out independently:
+
+    python worker.py
+
+Job kinds:
+    popular_batch    {"run_id"}: plan a daily batch run and fan its units out
+    popular_unit     {"run_id", "stans"}: generate and checkpoint one unit
+    custom_briefing  {"stan_name", "user_id", "profile", "result_key"}:
+                     generate a custom briefing the API is waiting for
+
+Configuration (environment):
+    ENVIRONMENT: "production" loads .env.production, anything else .env
+    REDIS_URL: Redis holding the queue and caches (required)
+    WORKER_CONCURRENCY: jobs processed at once (default 4)
+    JOB_LEASE_SECONDS: lease length; heartbeats renew it (default 60)
+"""
+
+import asyncio
+import os
+import signal
+import socket
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import structlog
+from dotenv import load_dotenv
+
+from services.job_queue import Job, JobQueue
+
+logger = structlog.get_logger()
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class GenerationWorker:
+    """Claims jobs, keeps their leases alive and acknowledges the outcome."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        batch_generator,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        worker_id: Optional[str] = None
+    ):
+        """Initialize worker.
+
+        Args:
+            queue: Queue to consume
+            batch_generator: BatchBriefingGenerator doing the generation
+            concurrency: Jobs processed at once
+            poll_interval: Seconds to wait when the queue is empty
+            worker_id: Lease owner ID (defaults to host:pid)
+        """
+        self.queue = queue
+        self.batch_generator = batch_generator
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_interval = queue.lease_seconds / 3
+        self.processed = {"completed": 0, "failed": 0}
+
+        self.handlers: Dict[str, JobHandler] = {
+            "popular_batch": self._handle_popular_batch,
+            "popular_unit": self._handle_popular_unit,
+            "custom_briefing": self._handle_custom_briefing,
+        }
+        # Called once a job has used up its attempts
+        self.dead_letter_handlers: Dict[str, JobHandler] = {
+            "popular_unit": self._popular_unit_dead,
+        }
+        self._stopping = asyncio.Event()
+        self._active: Set[asyncio.Task] = set()
+
+    async def run(self):
+        """Process jobs until ``stop`` is called, then finish the active ones."""
+        logger.info("worker_started", worker_id=self.worker_id, concurrency=self.concurrency)
+        next_reap = 0.0
+        loop = asyncio.get_running_loop()
+
+        while not self._stopping.is_set():
+            # Any worker may release leases of workers that died
+            if loop.time() >= next_reap:
+                await self.queue.requeue_expired()
+                next_reap = loop.time() + self.heartbeat_interval
+
+            if len(self._active) >= self.concurrency:
+                await asyncio.wait(self._active, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            job = await self.queue.claim(self.worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._process(job))
+            self._active.add(task)
+            task.add_done_callback(self._active.discard)
+
+        if self._active:
+            await asyncio.gather(*self._active, return_exceptions=True)
+        logger.info("worker_stopped", worker_id=self.worker_id, **self.processed)
+
+    def stop(self):
+        """Stop claiming jobs; in-flight jobs still finish."""
+        self._stopping.set()
+
+    async def _process(self, job: Job):
+        handler = self.handlers.get(job.kind)
+        work = asyncio.create_task(handler(job.payload)) if handler else None
+        heartbeat = asyncio.create_task(self._keep_lease(job, work)) if work else None
+
+        try:
+            if work is None:
+                raise ValueError(f"Unknown job kind '{job.kind}'")
+            await work
+        except asyncio.CancelledError:
+            # Lease lost; another worker owns the job now
+            logger.warning("job_abandoned", job_id=job.id, kind=job.kind)
+        except Exception as e:
+            self.processed["failed"] += 1
+            outcome = await self.queue.fail(job, self.worker_id, str(e))
+            if outcome == "dead" and job.kind in self.dead_letter_handlers:
+                await self.dead_letter_handlers[job.kind](job.payload)
+        else:
+            self.processed["completed"] += 1
+            await self.queue.complete(job, self.worker_id)
+            logger.info("job_completed", job_id=job.id, kind=job.kind, attempts=job.attempts)
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+
+    async def _keep_lease(self, job: Job, work: asyncio.Task):
+        while not work.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            if not await self.queue.heartbeat(job, self.worker_id):
+                logger.warning("job_lease_lost", job_id=job.id)
+                work.cancel()
+                return
+
+    async def _handle_popular_batch(self, payload: Dict[str, Any]):
+        return await self.batch_generator.enqueue_run(payload["run_id"], self.queue)
+
+    async def _handle_popular_unit(self, payload: Dict[str, Any]):
+        results = await self.batch_generator.run_checkpointed_unit(payload["run_id"], payload["stans"])
+        await self.batch_generator.mark_run_finished_if_done(payload["run_id"])
+        return results
+
+    async def _handle_custom_briefing(self, payload: Dict[str, Any]):
+        return await self.batch_generator.run_custom_job(payload)
+
+    async def _popular_unit_dead(self, payload: Dict[str, Any]):
+        await self.batch_generator.mark_unit_failed(payload["run_id"], payload["stans"])
+        await self.batch_generator.mark_run_finished_if_done(payload["run_id"])
+
+
+async def _serve():
+    from agents.batch_generator import BatchBriefingGenerator
+    from agents.efficient_agent import EfficientBriefingAgent
+    from agents.model_registry import model_registry
+
+    try:
+        from database.supabase_client import SupabaseClient
+        db_client = SupabaseClient()
+    except Exception as e:
+        logger.warning("worker_database_unavailable", error=str(e))
+        db_client = None
+
+    queue = JobQueue(lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")))
+    worker = GenerationWorker(
+        queue,
+        BatchBriefingGenerator(agent=EfficientBriefingAgent(), db_client=db_client),
+        concurrency=int(os.getenv("WORKER_CONCURRENCY", "4"))
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await model_registry.warm_up()
+    await worker.run()
+
+
+def main():
+    # Same env file selection as the API (main_v2)
+    if os.getenv("ENVIRONMENT", "development") == "production":
+        load_dotenv('.env.production')
+    else:
+        load_dotenv()
+
+    import google.generativeai as genai
+    google_api_key = os.getenv("GOOGLE_AI_API_KEY")
+    if google_api_key:
+        genai.configure(api_key=google_api_key)
+
+    asyncio.run(_serve())
+
+
+if __name__ == "__main__":
+    main()